@@ -0,0 +1,162 @@
+import argparse
+import sqlite3
+import sys
+from typing import NamedTuple
+from database import get_expense_columns, initialize_databases
+
+try:
+    import numpy as np
+except ImportError:  # Expense analytics are optional
+    np = None
+
+class ExpenseData:
+    """The expenses of a date range as NumPy columns, oldest first.
+
+    `dates` is a datetime64[D] array and `amounts` a float64 array. Credits
+    add to savings and debits subtract from them; other types count for
+    neither, as in database.get_monthly_summary.
+    """
+
+    def __init__(self, dates, amounts, types, descriptions):
+        self.dates = np.array(dates, dtype='datetime64[D]')
+        self.amounts = np.array(amounts, dtype=np.float64)
+        self.types = np.array(types, dtype=str)
+        self.descriptions = np.array(descriptions, dtype=str)
+        self.credit = self.types == 'credit'
+        self.debit = self.types == 'debit'
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def signed(self):
+        """The amounts with debits negated and other types zeroed."""
+        return np.where(self.credit, self.amounts, np.where(self.debit, -self.amounts, 0.0))
+
+class Pivot(NamedTuple):
+    periods: object  # datetime64 array, one entry per month or year
+    credits: object
+    debits: object
+    savings: object
+
+class ExpenseReport(NamedTuple):
+    count: int
+    years: Pivot
+    months: Pivot
+    balance: object  # Savings accumulated up to the end of each month
+    average: object  # Moving average of the monthly savings
+    window: int
+    top_debits: list
+    top_credits: list
+
+def load_expenses(start=None, end=None):
+    """Read the expenses dated within [start, end] into an ExpenseData with one query.
+
+    Either bound may be None. Raises RuntimeError if NumPy is not installed.
+    """
+    if np is None:
+        raise RuntimeError("Expense analytics need numpy (pip install numpy)")
+    return ExpenseData(*get_expense_columns(start, end))
+
+def _pivot(data, unit):
+    periods = data.dates.astype(f'datetime64[{unit}]')
+    if not len(periods):
+        empty = np.zeros(0)
+        return Pivot(periods, empty, empty, empty)
+    # The dates are sorted, so the periods run from the first to the last one
+    # with the empty ones in between filled with zeros
+    first = periods[0]
+    index = (periods - first).astype(np.intp)
+    count = int(index[-1]) + 1
+    credits = np.bincount(index, weights=np.where(data.credit, data.amounts, 0.0), minlength=count)
+    debits = np.bincount(index, weights=np.where(data.debit, data.amounts, 0.0), minlength=count)
+    return Pivot(first + np.arange(count), credits, debits, credits - debits)
+
+def monthly_pivot(data):
+    """Return the credits, debits and savings of every month from the first expense to the last."""
+    return _pivot(data, 'M')
+
+def yearly_pivot(data):
+    """Return the credits, debits and savings of every year from the first expense to the last."""
+    return _pivot(data, 'Y')
+
+def running_balance(data):
+    """Return (dates, balance): the savings accumulated up to and including each expense."""
+    return data.dates, np.cumsum(data.signed)
+
+def moving_average(values, window=3):
+    """Return the mean of each `window` consecutive values, aligned with the last of them.
+
+    The first `window - 1` averages are NaN.
+    """
+    if window < 1:
+        raise ValueError("The window must be at least 1")
+    values = np.asarray(values, dtype=np.float64)
+    averages = np.full(len(values), np.nan)
+    if window <= len(values):
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        averages[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return averages
+
+def top_descriptions(data, count=10, type='debit'):
+    """Return (description, total, times) for the `count` descriptions with the largest totals of `type`."""
+    selected = data.types == type
+    names, index = np.unique(np.char.strip(data.descriptions[selected]), return_inverse=True)
+    totals = np.bincount(index, weights=data.amounts[selected], minlength=len(names))
+    times = np.bincount(index, minlength=len(names))
+    order = np.argsort(-totals, kind='stable')[:count]
+    return [(str(names[i]), float(totals[i]), int(times[i])) for i in order]
+
+def expense_report(start=None, end=None, window=3, top=10):
+    """Compute the yearly and monthly pivots, balance, moving average and top descriptions."""
+    data = load_expenses(start, end)
+    months = monthly_pivot(data)
+    return ExpenseReport(
+        count=len(data),
+        years=yearly_pivot(data),
+        months=months,
+        balance=np.cumsum(months.savings),
+        average=moving_average(months.savings, window),
+        window=window,
+        top_debits=top_descriptions(data, top, 'debit'),
+        top_credits=top_descriptions(data, top, 'credit'),
+    )
+
+def format_report(report):
+    """Return `report` as a plain text table."""
+    if not report.count:
+        return "No expenses in this period."
+    lines = [f"{report.count} expenses from {report.months.periods[0]} to {report.months.periods[-1]}", ""]
+    lines.append(f"{'Year':<8}{'Credits':>13}{'Debits':>13}{'Savings':>13}")
+    for year, credits, debits, savings in zip(*report.years):
+        lines.append(f"{str(year):<8}{credits:>13,.2f}{debits:>13,.2f}{savings:>13,.2f}")
+    lines.append("")
+    average_title = f"{report.window}-mo avg"
+    lines.append(f"{'Month':<8}{'Credits':>13}{'Debits':>13}{'Savings':>13}{'Balance':>13}{average_title:>13}")
+    for (month, credits, debits, savings), balance, average in zip(zip(*report.months), report.balance, report.average):
+        average = '' if np.isnan(average) else f"{average:,.2f}"
+        lines.append(f"{str(month):<8}{credits:>13,.2f}{debits:>13,.2f}{savings:>13,.2f}{balance:>13,.2f}{average:>13}")
+    for title, top in (("Top debits", report.top_debits), ("Top credits", report.top_credits)):
+        if top:
+            lines += ["", title]
+            lines += [f"  {description[:30]:<30}{total:>13,.2f}  ({times}x)" for description, total, times in top]
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Report credits, debits and savings per year and month.")
+    parser.add_argument("--since", help="only expenses dated on or after this day (dd/mm/yyyy or yyyy-mm-dd)")
+    parser.add_argument("--until", help="only expenses dated on or before this day")
+    parser.add_argument("--window", type=int, default=3, help="months in the moving average (default 3)")
+    parser.add_argument("--top", type=int, default=10, help="descriptions listed by total (default 10)")
+    args = parser.parse_args()
+
+    initialize_databases()
+    try:
+        report = expense_report(args.since, args.until, args.window, args.top)
+    except (ValueError, RuntimeError, sqlite3.Error) as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(format_report(report))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import datetime
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future
+from database import (BUSY_TIMEOUT, flush_writes, forget_migrations, initialize_databases, query_cache,
+                      resolve_db_path, service_db_paths)
+from events import Change, publish
+
+# Where the snapshots are kept, and how many of them
+BACKUP_DIR = 'backups'
+BACKUP_KEEP = 10
+
+# Pages copied per step of the backup API
+BACKUP_PAGES = 256
+
+SNAPSHOT_NAME_FORMAT = '%Y%m%d-%H%M%S'
+PARTIAL_SUFFIX = '.partial'
+
+def database_files():
+    """Return the database files in use, keyed by file name."""
+    paths = {os.path.abspath(resolve_db_path(path)) for path in service_db_paths().values()}
+    return {os.path.basename(path): path for path in sorted(paths) if os.path.exists(path)}
+
+def copy_database(source_path, target_path, pages=BACKUP_PAGES):
+    """Copy the database at `source_path` to a new file with the SQLite backup API.
+
+    The pages are read `pages` at a time inside one read transaction, so the
+    copy is a consistent snapshot even while the apps keep writing, and in
+    WAL mode the writers are never blocked by it.
+    """
+    source = sqlite3.connect(source_path, timeout=BUSY_TIMEOUT)
+    target = sqlite3.connect(target_path)
+    try:
+        # Without the read transaction, every write to the source would
+        # restart the copy from the first page
+        source.execute('BEGIN')
+        source.execute('SELECT 1 FROM sqlite_master LIMIT 1')
+        source.backup(target, pages=pages)
+        # The copy stands on its own, without a -wal file next to it
+        target.execute('PRAGMA journal_mode = DELETE')
+        check = target.execute('PRAGMA quick_check').fetchone()[0]
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"The copy of {os.path.basename(source_path)} is damaged: {check}")
+    finally:
+        source.rollback()
+        source.close()
+        target.close()
+
+def list_snapshots(directory=BACKUP_DIR):
+    """Return the names of the complete snapshots in `directory`, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory)
+                  if not name.endswith(PARTIAL_SUFFIX) and os.path.isdir(os.path.join(directory, name)))
+
+def _new_snapshot_name(directory):
+    name = datetime.datetime.now().strftime(SNAPSHOT_NAME_FORMAT)
+    candidate, number = name, 1
+    while os.path.exists(os.path.join(directory, candidate)) or \
+            os.path.exists(os.path.join(directory, candidate + PARTIAL_SUFFIX)):
+        number += 1
+        candidate = f'{name}-{number}'
+    return candidate
+
+def create_snapshot(directory=BACKUP_DIR, keep=BACKUP_KEEP, pages=BACKUP_PAGES):
+    """Back up every database file into a new snapshot in `directory` and return its name.
+
+    Each file is copied as of one point in time; the files are copied one
+    after the other. The snapshot is written to a .partial directory and
+    renamed once complete, so a torn snapshot is never listed. The oldest
+    snapshots beyond `keep` are then deleted; None keeps them all.
+    """
+    flush_writes()  # Include the writes still buffered by group commit
+    os.makedirs(directory, exist_ok=True)
+    name = _new_snapshot_name(directory)
+    partial = os.path.join(directory, name + PARTIAL_SUFFIX)
+    os.makedirs(partial)
+    try:
+        for file_name, path in database_files().items():
+            copy_database(path, os.path.join(partial, file_name), pages)
+        os.rename(partial, os.path.join(directory, name))
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    if keep is not None:
+        prune_snapshots(directory, keep)
+    return name
+
+def prune_snapshots(directory=BACKUP_DIR, keep=BACKUP_KEEP):
+    """Delete the oldest snapshots, keeping the `keep` most recent ones; return the deleted names."""
+    snapshots = list_snapshots(directory)
+    deleted = snapshots[:max(len(snapshots) - keep, 0)]
+    for name in deleted:
+        shutil.rmtree(os.path.join(directory, name))
+    return deleted
+
+def start_snapshot(directory=BACKUP_DIR, keep=BACKUP_KEEP, pages=BACKUP_PAGES):
+    """Create a snapshot on a background thread and return a Future of its name."""
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(create_snapshot(directory, keep, pages))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='database-backup', daemon=True).start()
+    return future
+
+def restore_snapshot(name, directory=BACKUP_DIR):
+    """Replace the data of every database file with that of snapshot `name`.
+
+    The current data is first saved in a snapshot of its own, which is not
+    pruned and whose name is returned. The files are overwritten in place
+    with the backup API, so the connections already open see the restored
+    data, and the open windows of this process are told to reload. If a
+    file cannot be restored, every file is put back from the saved snapshot,
+    so they never end up a mix of both. A running database service is not
+    told; restart it afterwards.
+    """
+    snapshot = os.path.join(directory, name)
+    if name not in list_snapshots(directory):
+        raise ValueError(f"No snapshot named {name} in {directory}")
+    files = database_files()
+    snapshot_files = sorted(os.listdir(snapshot))
+    if set(snapshot_files) != set(files):
+        raise ValueError(f"Snapshot {name} holds {', '.join(snapshot_files)}, "
+                         f"but the databases in use are {', '.join(files)}")
+    saved = create_snapshot(directory, keep=None)
+    try:
+        _restore_files(snapshot, files)
+    except BaseException:
+        _restore_files(os.path.join(directory, saved), files)
+        raise
+    finally:
+        # The files were checked when first opened; snapshots of an older
+        # schema need their migrations
+        forget_migrations(files.values())
+        initialize_databases()
+        query_cache.clear()
+        for table in service_db_paths():
+            publish(Change(table, 'update', None))
+    return saved
+
+def _restore_files(snapshot, files):
+    for file_name, path in files.items():
+        source = sqlite3.connect(os.path.join(snapshot, file_name))
+        target = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up the Initiatives databases, or restore a backup.")
+    parser.add_argument("action", nargs="?", choices=("create", "list", "restore"), default="create")
+    parser.add_argument("snapshot", nargs="?", help="name of the snapshot to restore")
+    parser.add_argument("--dir", default=BACKUP_DIR, help=f"directory of the snapshots (default: {BACKUP_DIR})")
+    parser.add_argument("--keep", type=int, default=BACKUP_KEEP,
+                        help=f"snapshots kept when creating one (default {BACKUP_KEEP})")
+    args = parser.parse_args()
+    if args.action == "restore" and not args.snapshot:
+        parser.error("restore needs the name of a snapshot (see: backup.py list)")
+
+    initialize_databases()
+    try:
+        if args.action == "list":
+            for name in list_snapshots(args.dir):
+                print(name)
+        elif args.action == "restore":
+            saved = restore_snapshot(args.snapshot, args.dir)
+            print(f"Restored {args.snapshot}; the previous data is in snapshot {saved}")
+        else:
+            print(f"Created snapshot {create_snapshot(args.dir, args.keep)}")
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
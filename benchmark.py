@@ -0,0 +1,477 @@
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import database
+
+# Rows generated per table at --scale 1
+DEFAULT_SIZES = {
+    'tasks': 100_000,
+    'notes': 50_000,
+    'journal': 50_000,
+    'goals': 10_000,
+    'expenses': 1_000_000,
+}
+
+# Rows inserted per transaction while generating data
+INSERT_BATCH = 50_000
+
+# Rows shown by the list views, and the page size of VirtualListbox
+VISIBLE_ROWS = 15
+PAGE_SIZE = 200
+
+WORDS = ('read', 'write', 'review', 'plan', 'module', 'report', 'budget', 'meeting', 'exam', 'project',
+         'draft', 'call', 'gym', 'groceries', 'rent', 'salary', 'travel', 'book', 'course', 'notes',
+         'deadline', 'garden', 'music', 'family', 'weekend', 'doctor', 'coffee', 'lunch', 'train', 'idea')
+PRIORITIES = ('Supremacy', 'Antecedence', 'Preference')
+
+DATA_INFO_FILE = 'benchmark-data.json'
+
+def sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+def random_date(rng, start, days):
+    return (start + datetime.timedelta(days=rng.randrange(days))).isoformat()
+
+# Synthetic data generators; each yields rows in the format of the matching
+# bulk insert function of database.py
+
+def generate_tasks(rng, count):
+    start = datetime.date.today() - datetime.timedelta(days=365)
+    for i in range(count):
+        status = rng.choices((0, 1, 2), weights=(6, 3, 1))[0]
+        yield (f"{sentence(rng, 3)} {i}", rng.choice(PRIORITIES), random_date(rng, start, 730),
+               sentence(rng, rng.randint(3, 20)), status)
+
+def generate_notes(rng, count, task_count):
+    for i in range(count):
+        yield (f"{sentence(rng, 3)} {i}", sentence(rng, rng.randint(10, 120)), rng.randint(1, max(task_count, 1)))
+
+def generate_journal_entries(rng, count):
+    start = datetime.date.today() - datetime.timedelta(days=10 * 365)
+    for i in range(count):
+        yield (f"{sentence(rng, 4)} {i}", sentence(rng, rng.randint(50, 400)), random_date(rng, start, 10 * 365))
+
+def generate_goals(rng, count):
+    start = datetime.date.today()
+    for i in range(count):
+        deadline = random_date(rng, start, 3 * 365) if rng.random() < 0.7 else None
+        yield (f"{sentence(rng, 3)} {i}", sentence(rng, rng.randint(5, 60)), deadline)
+
+def generate_expenses(rng, count):
+    # Spread over five years ending this year, so the current year has data
+    start = datetime.date(datetime.date.today().year - 4, 1, 1)
+    for i in range(count):
+        expense_type = 'credit' if rng.random() < 0.2 else 'debit'
+        yield (sentence(rng, 2), round(rng.uniform(1, 500), 2), expense_type, random_date(rng, start, 5 * 365))
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def build_databases(sizes, seed):
+    """Create the service databases in the current directory and fill them."""
+    rng = random.Random(seed)
+    database.initialize_databases()
+    generators = [
+        ('tasks', database.add_tasks, generate_tasks(rng, sizes['tasks'])),
+        ('notes', database.add_notes, generate_notes(rng, sizes['notes'], sizes['tasks'])),
+        ('journal', database.add_journal_entries, generate_journal_entries(rng, sizes['journal'])),
+        ('goals', database.add_goals, generate_goals(rng, sizes['goals'])),
+        ('expenses', database.add_expenses, generate_expenses(rng, sizes['expenses'])),
+    ]
+    for name, add_rows, rows in generators:
+        start = time.perf_counter()
+        for batch in batched(rows, INSERT_BATCH):
+            add_rows(batch)
+        print(f"Generated {sizes[name]} {name} in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    # Give the goals a realistic share of completed ones
+    database.update_goals_status(range(1, sizes['goals'] + 1, 3), 1)
+    for path in set(database.service_db_paths().values()):
+        with database.create_connection(path) as conn:
+            conn.execute('ANALYZE')
+
+def database_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(('.db', '.db-wal', '.db-shm'))]
+
+def prepare_data(data_dir, sizes, seed, unified):
+    """Build the data set in `data_dir`, unless it was already built with the same settings."""
+    info = {'sizes': sizes, 'seed': seed, 'unified': unified, 'schema_version': database.schema_version()}
+    info_path = os.path.join(data_dir, DATA_INFO_FILE)
+    os.makedirs(data_dir, exist_ok=True)
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            if json.load(f) == info:
+                return
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        for name in database_files('.'):
+            os.remove(name)
+        database.use_separate_storage()
+        database.forget_migrations()  # The files are created anew
+        build_databases(sizes, seed)
+        if unified:
+            database.migrate_to_unified_storage()
+    finally:
+        database.close_connections()
+        os.chdir(cwd)
+    with open(info_path, 'w') as f:
+        json.dump(info, f)
+
+def use_copy_of(data_dir, work_dir, unified):
+    """Switch to a scratch copy of the data set, so the write cases leave the original intact."""
+    for name in database_files(data_dir):
+        shutil.copy2(os.path.join(data_dir, name), work_dir)
+    os.chdir(work_dir)
+    if unified:
+        database.use_unified_storage()
+    else:
+        database.use_separate_storage()
+
+def first_page(count, fetch_page, format_row):
+    """Do what VirtualListbox.reset_async does: count, read the first page and format the visible rows."""
+    total = count()
+    rows = fetch_page(0, PAGE_SIZE) if total else []
+    return [format_row(row) for row in rows[:VISIBLE_ROWS]]
+
+def consume(rows):
+    return sum(1 for _ in rows)
+
+class Cases:
+    """The benchmark cases: (name, function, options) in the order they run."""
+
+    def __init__(self, sizes, seed):
+        self.rng = random.Random(seed + 1)
+        self.sizes = sizes
+        self.cases = []
+        self.skipped = {}
+
+    def add(self, name, func, cached=False, once=False):
+        self.cases.append((name, func, {'cached': cached, 'once': once}))
+
+    def ids(self, table):
+        # Reads use the first half of each table, writes and deletes the second
+        return range(1, self.sizes[table] // 2 + 1)
+
+    def write_ids(self, table, count):
+        # Small data sets run out of distinct ids; writing a deleted row again is a no-op
+        ids = range(self.sizes[table] // 2 + 1, self.sizes[table] + 1)
+        return itertools.cycle(self.rng.sample(ids, min(count, len(ids))))
+
+    def pick(self, table):
+        ids = self.ids(table)
+        return lambda: self.rng.choice(ids)
+
+    def sample(self, table, count):
+        ids = self.ids(table)
+        return self.rng.sample(ids, min(count, len(ids)))
+
+def database_cases(cases, repeat):
+    """Register a case for every public function of database.py."""
+    rng = cases.rng
+    today = datetime.date.today()
+    month, year = today.month, today.year
+    month_start = today.replace(day=1).isoformat()
+    month_end = (today.replace(day=28) + datetime.timedelta(days=4)).replace(day=1).isoformat()
+    task_id, note_id, goal_id = cases.pick('tasks'), cases.pick('notes'), cases.pick('goals')
+    entry_id, expense_id = cases.pick('journal'), cases.pick('expenses')
+    writes = repeat + 1  # Every write case runs once to warm up
+
+    hot_task = task_id()
+    middle_task = database.get_tasks_page(0, limit=1 + cases.sizes['tasks'] // 4)[-1:]
+    middle_task_key = (middle_task[0].deadline, middle_task[0].id) if middle_task else None
+    middle_entry = database.get_journal_timeline(limit=1, offset=cases.sizes['journal'] // 2)
+    middle_entry_key = (middle_entry[0].entry_date, middle_entry[0].id) if middle_entry else None
+
+    # Tasks
+    cases.add('get_tasks', lambda: database.get_tasks(0))
+    cases.add('get_completed_tasks', database.get_completed_tasks)
+    cases.add('get_missed_tasks', database.get_missed_tasks)
+    cases.add('get_tasks_page', lambda: database.get_tasks_page(0, limit=PAGE_SIZE))
+    cases.add('get_tasks_page/late', lambda: database.get_tasks_page(0, middle_task_key, PAGE_SIZE))
+    cases.add('iter_tasks', lambda: consume(database.iter_tasks(0)))
+    cases.add('get_task_by_id', lambda: database.get_task_by_id(task_id()))
+    cases.add('get_task_by_id/cached', lambda: database.get_task_by_id(hot_task), cached=True)
+    cases.add('get_tasks_by_ids', lambda: database.get_tasks_by_ids(cases.sample('tasks', 100)))
+    cases.add('get_tasks_due_between', lambda: database.get_tasks_due_between(month_start, month_end))
+    cases.add('search_tasks', lambda: database.search_tasks(rng.choice(WORDS)))
+    cases.add('get_tasks_with_notes', lambda: database.get_tasks_with_notes(0))
+
+    # Notes
+    cases.add('fetch_notes', lambda: database.fetch_notes(task_id(), limit=PAGE_SIZE))
+    cases.add('fetch_notes/newest', lambda: database.fetch_notes(task_id(), 'newest', limit=PAGE_SIZE))
+    cases.add('fetch_notes/title', lambda: database.fetch_notes(task_id(), 'title', limit=PAGE_SIZE))
+    cases.add('get_notes_page', lambda: database.get_notes_page(task_id(), limit=PAGE_SIZE))
+    cases.add('iter_notes', lambda: consume(database.iter_notes(task_id())))
+    cases.add('count_notes', lambda: database.count_notes(task_id()))
+    cases.add('get_note_by_id', lambda: database.get_note_by_id(note_id()))
+    cases.add('get_notes_for_tasks', lambda: database.get_notes_for_tasks(cases.sample('tasks', 100)))
+    cases.add('search_notes', lambda: database.search_notes(rng.choice(WORDS)))
+
+    # Goals
+    cases.add('get_goals', lambda: database.get_goals(limit=PAGE_SIZE))
+    cases.add('get_goals/late', lambda: database.get_goals(limit=PAGE_SIZE, offset=cases.sizes['goals'] // 2))
+    cases.add('get_goals_page/late', lambda: database.get_goals_page(cases.sizes['goals'] // 2, PAGE_SIZE))
+    cases.add('iter_goals', lambda: consume(database.iter_goals()))
+    cases.add('count_goals', database.count_goals)
+    cases.add('count_goals/completed', lambda: database.count_goals(1))
+    cases.add('get_goal_by_id', lambda: database.get_goal_by_id(goal_id()))
+    cases.add('get_completed_goals', lambda: database.get_completed_goals(limit=PAGE_SIZE))
+
+    # Journal
+    cases.add('get_journal_entries', lambda: database.get_journal_entries(limit=PAGE_SIZE))
+    cases.add('get_journal_entries/late',
+              lambda: database.get_journal_entries(limit=PAGE_SIZE, offset=cases.sizes['journal'] // 2))
+    cases.add('get_journal_page/late', lambda: database.get_journal_page(cases.sizes['journal'] // 2, PAGE_SIZE))
+    cases.add('iter_journal_entries', lambda: consume(database.iter_journal_entries()))
+    cases.add('get_journal_timeline', lambda: database.get_journal_timeline(limit=PAGE_SIZE))
+    cases.add('get_journal_timeline/late',
+              lambda: database.get_journal_timeline(limit=PAGE_SIZE, offset=cases.sizes['journal'] // 2))
+    cases.add('get_journal_timeline_page/late', lambda: database.get_journal_timeline_page(middle_entry_key, PAGE_SIZE))
+    cases.add('get_journal_content', lambda: database.get_journal_content(entry_id()))
+    cases.add('count_journal_entries', database.count_journal_entries)
+    cases.add('get_journal_entry_by_id', lambda: database.get_journal_entry_by_id(entry_id()))
+    cases.add('search_journal', lambda: database.search_journal(rng.choice(WORDS)))
+
+    # Expenses
+    month_count = database.count_expenses(month, year)
+    cases.add('get_expenses', lambda: database.get_expenses(month, year, limit=PAGE_SIZE))
+    cases.add('get_expenses/late', lambda: database.get_expenses(month, year, limit=PAGE_SIZE, offset=month_count // 2))
+    cases.add('get_expenses_page', lambda: database.get_expenses_page(month, year, limit=PAGE_SIZE))
+    cases.add('iter_expenses', lambda: consume(database.iter_expenses(month, year)))
+    cases.add('count_expenses', lambda: database.count_expenses(month, year))
+    cases.add('get_expenses_total', lambda: database.get_expenses_total(month, year))
+    cases.add('get_monthly_summary', lambda: database.get_monthly_summary(month, year))
+    cases.add('get_yearly_summary', lambda: database.get_yearly_summary(year))
+    cases.add('get_expense_by_id', lambda: database.get_expense_by_id(expense_id()))
+    cases.add('get_expenses_between', lambda: database.get_expenses_between(month_start, month_end))
+
+    # Writes, on rows that no read case uses
+    deadline = today.strftime(database.DISPLAY_DATE_FORMAT)
+    bulk = 1000
+    update_tasks, delete_tasks = cases.write_ids('tasks', writes), cases.write_ids('tasks', writes)
+    bulk_tasks = cases.write_ids('tasks', writes * 200)
+    cases.add('add_task', lambda: database.add_task(sentence(rng, 3), 'Preference', deadline, sentence(rng, 8)))
+    cases.add('update_task', lambda: database.update_task(next(update_tasks), notes=sentence(rng, 8)))
+    cases.add('delete_task', lambda: database.delete_task(next(delete_tasks)))
+    cases.add('add_tasks', lambda: database.add_tasks(generate_tasks(rng, bulk)))
+    cases.add('update_tasks_status', lambda: database.update_tasks_status([next(bulk_tasks) for _ in range(100)], 1))
+    cases.add('delete_tasks', lambda: database.delete_tasks([next(bulk_tasks) for _ in range(100)]))
+
+    update_notes, delete_notes = cases.write_ids('notes', writes), cases.write_ids('notes', writes)
+    bulk_notes = cases.write_ids('notes', writes * 100)
+    cases.add('save_notes', lambda: database.save_notes(sentence(rng, 3), sentence(rng, 40), task_id()))
+    cases.add('update_note', lambda: database.update_note(next(update_notes), sentence(rng, 40)))
+    cases.add('delete_notes', lambda: database.delete_notes(next(delete_notes)))
+    cases.add('add_notes', lambda: database.add_notes(generate_notes(rng, bulk, cases.sizes['tasks'])))
+    cases.add('delete_notes_by_ids', lambda: database.delete_notes_by_ids([next(bulk_notes) for _ in range(100)]))
+
+    update_goals, delete_goals = cases.write_ids('goals', writes * 2), cases.write_ids('goals', writes)
+    bulk_goals = cases.write_ids('goals', writes * 200)
+    cases.add('add_goal', lambda: database.add_goal(sentence(rng, 3), sentence(rng, 20), deadline))
+    cases.add('update_goal', lambda: database.update_goal(next(update_goals), sentence(rng, 3), sentence(rng, 20), deadline))
+    cases.add('update_goal_status', lambda: database.update_goal_status(next(update_goals), 1))
+    cases.add('delete_goal', lambda: database.delete_goal(next(delete_goals)))
+    cases.add('add_goals', lambda: database.add_goals(generate_goals(rng, bulk)))
+    cases.add('update_goals_status', lambda: database.update_goals_status([next(bulk_goals) for _ in range(100)], 1))
+    cases.add('delete_goals', lambda: database.delete_goals([next(bulk_goals) for _ in range(100)]))
+
+    update_entries, delete_entries = cases.write_ids('journal', writes), cases.write_ids('journal', writes)
+    cases.add('add_journal_entry', lambda: database.add_journal_entry(sentence(rng, 4), sentence(rng, 200)))
+    cases.add('add_journal_entries', lambda: database.add_journal_entries(generate_journal_entries(rng, bulk)))
+    cases.add('update_journal_entry',
+              lambda: database.update_journal_entry(next(update_entries), sentence(rng, 4), sentence(rng, 200)))
+    cases.add('delete_journal_entry', lambda: database.delete_journal_entry(next(delete_entries)))
+
+    update_expenses, delete_expenses = cases.write_ids('expenses', writes), cases.write_ids('expenses', writes)
+    bulk_expenses = cases.write_ids('expenses', writes * 100)
+    cases.add('add_expense', lambda: database.add_expense(sentence(rng, 2), 12.5, 'debit', deadline))
+    cases.add('update_expense', lambda: database.update_expense(next(update_expenses), sentence(rng, 2), 20.0, 'credit', deadline))
+    cases.add('delete_expense', lambda: database.delete_expense(next(delete_expenses)))
+    cases.add('add_expenses', lambda: database.add_expenses(generate_expenses(rng, bulk)))
+    cases.add('delete_expenses', lambda: database.delete_expenses([next(bulk_expenses) for _ in range(100)]))
+
+    # Whole-table writes change the data for every later run, so they run once, last
+    cases.add('rebuild_expense_rollups', database.rebuild_expense_rollups, once=True)
+    cases.add('delete_notes_by_task', lambda: database.delete_notes_by_task(task_id()), once=True)
+    cases.add('delete_tasks_by_status', lambda: database.delete_tasks_by_status(2), once=True)
+
+def app_cases(cases):
+    """Register the data-loading paths of the apps, run without a window.
+
+    The apps are created with `__new__` so only their data methods are used;
+    an app whose module cannot be imported (e.g. tkcalendar is missing) is
+    reported as skipped.
+    """
+    try:
+        from todo_app import TODOApp
+    except ImportError as e:
+        cases.skipped['TODOApp.load_tasks'] = str(e)
+    else:
+        todo = TODOApp.__new__(TODOApp)
+        cases.add('TODOApp.load_tasks', lambda: todo.build_task_model(todo.fetch_tasks()))
+
+    try:
+        from expense_app import ExpenseApp
+    except ImportError as e:
+        cases.skipped['ExpenseApp.show_expenses_by_month'] = str(e)
+    else:
+        expenses = ExpenseApp.__new__(ExpenseApp)
+        expenses.selected_month = datetime.date.today().month
+        cases.add('ExpenseApp.show_expenses_by_month',
+                  lambda: first_page(expenses.count_expenses, expenses.fetch_expenses, expenses.format_expense))
+
+    try:
+        from goals_app import GoalTrackingApp
+    except ImportError as e:
+        cases.skipped['GoalTrackingApp.load_goals'] = str(e)
+    else:
+        goals = GoalTrackingApp.__new__(GoalTrackingApp)
+        goals.show_completed = False
+        cases.add('GoalTrackingApp.load_goals',
+                  lambda: first_page(goals.count_goals, goals.fetch_goals, goals.format_goal))
+
+def time_case(func, repeat, cached=False, once=False):
+    """Time `func` and return its statistics in milliseconds.
+
+    The query cache is cleared before every run so the database itself is
+    measured, unless `cached` is set.
+    """
+    runs = 1 if once else repeat
+    if not once:
+        func()  # Warm up connections and the page cache
+    samples = []
+    for _ in range(runs):
+        if not cached:
+            database.query_cache.clear()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': runs,
+        'min_ms': min(samples),
+        'median_ms': statistics.median(samples),
+        'mean_ms': statistics.fmean(samples),
+        'max_ms': max(samples),
+    }
+
+def run_benchmarks(sizes, seed, repeat, pattern=None):
+    database.query_stats.slow_ms = None
+    database.query_stats.capture_plans = True
+    cases = Cases(sizes, seed)
+    app_cases(cases)
+    database_cases(cases, repeat)
+    results = {}
+    for name, func, options in cases.cases:
+        if pattern and pattern not in name:
+            continue
+        try:
+            results[name] = time_case(func, repeat, **options)
+        except Exception as e:
+            results[name] = {'error': str(e)}
+        result = results[name]
+        summary = f"{result['median_ms']:10.3f} ms" if 'median_ms' in result else f"error: {result['error']}"
+        print(f"{name:40} {summary}", file=sys.stderr)
+    return results, cases.skipped
+
+def compare(results, baseline, threshold, min_ms):
+    """Print the change of every median against `baseline` and return the regressions.
+
+    Cases faster than `min_ms` are too noisy to count as regressions.
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old or 'median_ms' not in old or 'median_ms' not in result:
+            continue
+        ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else 1.0
+        marker = ''
+        if ratio > 1 + threshold and result['median_ms'] >= min_ms:
+            regressions.append(name)
+            marker = '  REGRESSION'
+        print(f"{name:40} {old['median_ms']:10.3f} -> {result['median_ms']:10.3f} ms  x{ratio:.2f}{marker}", file=sys.stderr)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark database.py and the data-loading paths of the apps.")
+    parser.add_argument("--scale", type=float, default=1.0, help="fraction of the default table sizes to generate")
+    for table, size in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{table}", type=int, help=f"number of {table} rows (default {size} x scale)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--unified", action="store_true", help="benchmark the single-file storage")
+    parser.add_argument("--data-dir", help="keep the generated databases here and reuse them on later runs")
+    parser.add_argument("--filter", help="only run the cases whose name contains this text")
+    parser.add_argument("--output", help="write the results as JSON to this file (default: stdout)")
+    parser.add_argument("--compare", help="compare with the results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown ratio over which a case counts as a regression (default 0.2)")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="cases faster than this never count as regressions (default 1.0)")
+    args = parser.parse_args()
+
+    sizes = {table: getattr(args, table) or max(1, int(size * args.scale)) for table, size in DEFAULT_SIZES.items()}
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    data_dir = os.path.abspath(args.data_dir) if args.data_dir else tempfile.mkdtemp(prefix="initiatives-benchmark-")
+    work_dir = tempfile.mkdtemp(prefix="initiatives-benchmark-run-")
+    cwd = os.getcwd()
+    try:
+        prepare_data(data_dir, sizes, args.seed, args.unified)
+        use_copy_of(data_dir, work_dir, args.unified)
+        results, skipped = run_benchmarks(sizes, args.seed, args.repeat, args.filter)
+    finally:
+        database.close_connections()
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'unified': args.unified,
+            'schema_version': database.schema_version(),
+        },
+        'results': results,
+        'skipped': skipped,
+        'query_stats': database.query_stats.snapshot()['statements'],
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,21 @@
+import atexit
+import datetime
+import functools
+import json
+import os
+import queue
+import random
+import re
 import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from contextlib import contextmanager
+from events import Change, publish
+from models import (Task, TaskSummary, TaskMatch, Note, NoteSummary, NoteMatch, TaskNote, TaskWithNote, Goal,
+                    GoalSummary, JournalEntry, JournalSummary, JournalMatch, Expense, MonthlySummary, MonthTotals)
 
 # Database file paths
 TASKS_DB_PATH = 'tasks.db'
@@ -8,42 +24,1234 @@ EXPENSES_DB_PATH = 'expenses.db'
 GOALS_DB_PATH = 'goals.db'
 JOURNAL_DB_PATH = 'journal.db'
 
+# Single-file storage shared by every service; used when it exists
+UNIFIED_DB_PATH = 'initiatives.db'
+
+# Pragmas applied once to every pooled connection
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -8000',
+    'PRAGMA temp_store = MEMORY',
+)
+
+# Seconds a connection waits for a lock held by another connection or
+# process before failing with "database is locked"
+BUSY_TIMEOUT = 5.0
+
+class ConnectionManager:
+    """Keep one long-lived, configured connection per database file and thread.
+
+    SQLite connections must not be shared between threads, so each thread
+    gets its own set of connections. They stay open until the thread ends or
+    `close_all` is called (at interpreter exit by default). Another thread
+    may be using its connections at that moment, so they are only marked
+    stale, and each thread closes and reopens its own on next use.
+    """
+
+    def __init__(self, pragmas=CONNECTION_PRAGMAS):
+        self.pragmas = pragmas
+        self.generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def get(self, db_path):
+        """Return this thread's connection to `db_path`, opening it on first use."""
+        connections = self._connections()
+        key = os.path.abspath(db_path)
+        conn = connections.get(key)
+        if conn is None:
+            conn = self._open_connection(db_path)
+            connections[key] = conn
+        return conn
+
+    def _connections(self):
+        local = self._local
+        if getattr(local, 'generation', None) != self.generation:
+            self._close(getattr(local, 'connections', {}))
+            local.connections = {}
+            local.generation = self.generation
+        return local.connections
+
+    def _open_connection(self, db_path):
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def _close(self, connections):
+        for conn in connections.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def close_thread(self):
+        """Close the calling thread's connections; they are reopened on next use."""
+        connections = getattr(self._local, 'connections', {})
+        self._local.connections = {}
+        self._close(connections)
+
+    def close_all(self):
+        """Close the calling thread's connections and have every other thread reopen its own."""
+        with self._lock:
+            self.generation += 1
+        self.close_thread()
+
+connection_manager = ConnectionManager()
+atexit.register(connection_manager.close_all)
+
+_unified_db_path = UNIFIED_DB_PATH if os.path.exists(UNIFIED_DB_PATH) else None
+
+def service_db_paths():
+    """Return the per-service database paths keyed by service name."""
+    return {
+        'tasks': TASKS_DB_PATH,
+        'notes': NOTES_DB_PATH,
+        'expenses': EXPENSES_DB_PATH,
+        'goals': GOALS_DB_PATH,
+        'journal': JOURNAL_DB_PATH,
+    }
+
+def use_unified_storage(path=UNIFIED_DB_PATH):
+    """Store every service in the single database file at `path`."""
+    global _unified_db_path
+    close_connections()
+    query_cache.clear()
+    _unified_db_path = path
+
+def use_separate_storage():
+    """Store each service in its own database file."""
+    global _unified_db_path
+    close_connections()
+    query_cache.clear()
+    _unified_db_path = None
+
+def resolve_db_path(db_path):
+    """Return the file that actually holds the tables of `db_path`."""
+    return _unified_db_path or db_path
+
+def _file_tables(path):
+    """Return the names of the services whose tables are in the database file `path`."""
+    path = os.path.abspath(path)
+    return [name for name, service_path in service_db_paths().items()
+            if os.path.abspath(resolve_db_path(service_path)) == path]
+
+def get_connection(db_path):
+    """Return the pooled connection for `db_path` in the current thread."""
+    return connection_manager.get(resolve_db_path(db_path))
+
+def close_connections():
+    """Close all pooled connections; they are reopened on next use."""
+    connection_manager.close_all()
+
+def get_cross_service_connection():
+    """Return a connection on which the tables of every service are visible.
+
+    In unified storage this is simply the shared connection. Otherwise the
+    other service files are ATTACHed to the tasks connection; SQLite resolves
+    unqualified table names across attached databases, so the same JOIN works
+    in both modes.
+    """
+    conn = get_connection(TASKS_DB_PATH)
+    if _unified_db_path:
+        return conn
+    attached = {row[1] for row in conn.execute('PRAGMA database_list')}
+    for name, path in service_db_paths().items():
+        if name == 'tasks' or f'{name}_db' in attached:
+            continue
+        conn.execute(f'ATTACH DATABASE ? AS {name}_db', (path,))
+    return conn
+
+def fetch_cross_service_query(query, params=(), row_type=None):
+    """Fetch data with a query that may join tables of several services; errors are raised."""
+    write_queue.sync()
+    conn = get_cross_service_connection()
+    with _timed(conn, query, params) as timed:
+        results = conn.execute(query, params).fetchall()
+        timed.rows = len(results)
+    return _make_rows(row_type, results)
+
+def migrate_to_unified_storage(path=UNIFIED_DB_PATH):
+    """Copy the per-service database files into one file and switch to it.
+
+    Tables, rows, indexes, triggers and AUTOINCREMENT counters are copied from
+    each existing service file. The new file is built next to `path` and moved
+    into place only once complete; the original files are left untouched.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    write_queue.flush()  # The writes still queued to the old files are copied too
+    close_connections()
+    building_path = path + '.partial'
+    if os.path.exists(building_path):
+        os.remove(building_path)
+    sources = {}
+    for service, source_path in service_db_paths().items():
+        sources.setdefault(source_path, []).append(service)
+    conn = sqlite3.connect(building_path, isolation_level=None)
+    try:
+        for source_path, services in sources.items():
+            if os.path.exists(source_path):
+                _migrate_file(source_path, services)
+                _copy_database_into(conn, source_path)
+        conn.execute(f'PRAGMA user_version = {schema_version()}')
+    finally:
+        conn.close()
+    close_connections()
+    os.replace(building_path, path)
+    use_unified_storage(path)
+
+def _copy_database_into(conn, source_path):
+    """Copy every table of `source_path` into the main database of `conn`."""
+    conn.execute('ATTACH DATABASE ? AS source', (source_path,))
+    try:
+        conn.execute('BEGIN')
+        schema = conn.execute(
+            "SELECT type, name, sql FROM source.sqlite_master "
+            "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY type = 'table' DESC").fetchall()
+        # Full-text indexes create their own shadow tables and are rebuilt
+        # from their content tables once everything is copied
+        virtual_tables = [name for _, name, sql in schema if sql.upper().startswith('CREATE VIRTUAL TABLE')]
+        shadow_tables = {f'{name}_{suffix}' for name in virtual_tables for suffix in FTS_SHADOW_SUFFIXES}
+        for object_type, name, sql in schema:
+            if name in shadow_tables:
+                continue
+            conn.execute(sql)
+            if object_type == 'table' and name not in virtual_tables:
+                conn.execute(f'INSERT INTO main."{name}" SELECT * FROM source."{name}"')
+        for name in virtual_tables:
+            conn.execute(f'INSERT INTO main."{name}" ("{name}") VALUES (\'rebuild\')')
+        has_sequence = conn.execute(
+            "SELECT 1 FROM source.sqlite_master WHERE name = 'sqlite_sequence'").fetchone()
+        if has_sequence:
+            conn.execute('DELETE FROM main.sqlite_sequence WHERE name IN (SELECT name FROM source.sqlite_sequence)')
+            conn.execute('INSERT INTO main.sqlite_sequence (name, seq) SELECT name, seq FROM source.sqlite_sequence')
+        conn.execute('COMMIT')
+    except sqlite3.Error:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.execute('DETACH DATABASE source')
+
+# Query instrumentation
+# Every statement run through the query helpers below is timed. QueryStats
+# keeps per-statement call and row counts and a latency histogram, and logs
+# statements slower than `slow_ms` together with their EXPLAIN QUERY PLAN.
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float('inf'))
+
+class StatementStats:
+    """Counters of one SQL statement."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.plan = None
+
+    def add(self, elapsed_ms, rows):
+        self.calls += 1
+        self.rows += max(rows, 0)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction of calls."""
+        threshold = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= threshold:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.calls if self.calls else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_ms,
+            'histogram': {str(bound): count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets) if count},
+            'plan': self.plan,
+        }
+
+class QueryStats:
+    """Collect statement timings, row counts and slow-query plans.
+
+    `slow_ms` is the threshold over which a statement is logged with its
+    query plan; None disables the log. With `capture_plans`, the plan of
+    every distinct statement is captured once, which shows the full table
+    scans of a screen without waiting for them to get slow.
+    """
+
+    def __init__(self, enabled=True, slow_ms=100.0, capture_plans=False, slow_log_size=100):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.capture_plans = capture_plans
+        self.statements = {}
+        self.slow_queries = []
+        self.slow_log_size = slow_log_size
+        self.lock = threading.Lock()
+
+    def record(self, conn, query, params, elapsed_ms, rows=0, error=False):
+        """Record one execution of `query` on `conn`."""
+        key = ' '.join(query.split())
+        with self.lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = StatementStats()
+            if error:
+                stats.errors += 1
+            else:
+                stats.add(elapsed_ms, rows)
+            need_plan = stats.plan is None and (self.capture_plans or self.is_slow(elapsed_ms))
+        if error:
+            return
+        plan = None
+        if need_plan:
+            plan = stats.plan = explain_plan(conn, query, params)
+        if self.is_slow(elapsed_ms):
+            plan = plan or stats.plan
+            entry = {'query': key, 'params': repr(params)[:200], 'elapsed_ms': elapsed_ms, 'plan': plan}
+            with self.lock:
+                self.slow_queries.append(entry)
+                del self.slow_queries[:-self.slow_log_size]
+            print(f"Slow query ({elapsed_ms:.1f} ms): {key}", file=sys.stderr)
+            for line in plan or ():
+                print(f"    {line}", file=sys.stderr)
+
+    def is_slow(self, elapsed_ms):
+        return self.slow_ms is not None and elapsed_ms >= self.slow_ms
+
+    def snapshot(self):
+        """Return the statistics of every statement and the slow-query log."""
+        with self.lock:
+            return {
+                'statements': {query: stats.as_dict() for query, stats in self.statements.items()},
+                'slow_queries': list(self.slow_queries),
+            }
+
+    def reset(self):
+        with self.lock:
+            self.statements.clear()
+            self.slow_queries.clear()
+
+    def report(self, file=None, limit=20):
+        """Print the statements that took the most total time."""
+        file = file or sys.stderr
+        statements = sorted(self.snapshot()['statements'].items(), key=lambda item: -item[1]['total_ms'])
+        print(f"{'calls':>8} {'errors':>6} {'rows':>10} {'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  statement",
+              file=file)
+        for query, stats in statements[:limit]:
+            print(f"{stats['calls']:8} {stats['errors']:6} {stats['rows']:10} {stats['total_ms']:10.1f} {stats['p50_ms']:8.2f} "
+                  f"{stats['p95_ms']:8.2f} {stats['max_ms']:8.2f}  {query[:120]}", file=file)
+            for line in stats['plan'] or ():
+                print(f"{'':65}{line}", file=file)
+
+query_stats = QueryStats(capture_plans=bool(os.environ.get('INITIATIVES_QUERY_PLANS')))
+
+def explain_plan(conn, query, params=()):
+    """Return the EXPLAIN QUERY PLAN of `query` as a list of lines, or None."""
+    try:
+        rows = conn.execute(f'EXPLAIN QUERY PLAN {query}', params).fetchall()
+    except sqlite3.Error:
+        return None
+    return [detail for _, _, _, detail in rows]
+
+def dump_query_stats(path=None):
+    """Print the query statistics, or write them as JSON to `path`."""
+    if path is None:
+        query_stats.report()
+        return
+    with open(path, 'w') as f:
+        json.dump(query_stats.snapshot(), f, indent=2)
+
+# Set INITIATIVES_QUERY_STATS to a file name to get the statistics at exit
+# as JSON, or to 1 to have them printed.
+if os.environ.get('INITIATIVES_QUERY_STATS'):
+    _stats_path = os.environ['INITIATIVES_QUERY_STATS']
+    atexit.register(dump_query_stats, None if _stats_path == '1' else os.path.abspath(_stats_path))
+
+@contextmanager
+def _timed(conn, query, params):
+    """Time the statement run in the block and record it in `query_stats`.
+
+    The block may set `result.rows` to the number of rows it read or wrote.
+    """
+    result = _TimedResult()
+    if not query_stats.enabled:
+        yield result
+        return
+    start = time.perf_counter()
+    try:
+        yield result
+    except sqlite3.Error:
+        query_stats.record(conn, query, params, 0.0, error=True)
+        raise
+    query_stats.record(conn, query, params, (time.perf_counter() - start) * 1000, result.rows)
+
+class _TimedResult:
+    rows = 0
+
+class _TimedConnection:
+    """Wrap a connection so the statements run by a transaction are timed."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, query, params=()):
+        with _timed(self._conn, query, params) as timed:
+            cursor = self._conn.execute(query, params)
+            timed.rows = cursor.rowcount
+        return cursor
+
+    def executemany(self, query, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        with _timed(self._conn, query, seq_of_params[0] if seq_of_params else ()) as timed:
+            cursor = self._conn.executemany(query, seq_of_params)
+            timed.rows = cursor.rowcount
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
 @contextmanager
 def create_connection(db_path):
-    """Create a database connection and ensure it is properly closed."""
-    conn = sqlite3.connect(db_path)
+    """Yield the pooled connection for `db_path`, discarding any uncommitted work."""
+    conn = get_connection(db_path)
     try:
         yield conn
     finally:
-        conn.close()
+        if conn.in_transaction:
+            conn.rollback()
 
-def execute_query(db_path, query, params=(), commit=False):
-    """Execute a single query with optional commit."""
-    try:
-        with create_connection(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
+# Attempts at a write that keeps finding the database locked, and the delay
+# before the first retry; it doubles after each attempt up to the maximum
+WRITE_ATTEMPTS = 5
+WRITE_RETRY_DELAY = 0.05
+WRITE_RETRY_MAX_DELAY = 1.0
+
+# Group commit (see use_group_commit): how long a group of writes stays open
+# for more writes, and the most writes committed together
+GROUP_COMMIT_MS = 5
+GROUP_COMMIT_WRITES = 100
+DURABILITY_LEVELS = ('applied', 'committed')
+
+def _is_locked(error):
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+class GroupCommit:
+    """The group commit settings of the writer threads."""
+
+    def __init__(self, delay_ms=GROUP_COMMIT_MS, max_writes=GROUP_COMMIT_WRITES, durability='applied'):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability: {durability}")
+        if max_writes < 1:
+            raise ValueError("A group must hold at least one write")
+        self.delay = max(delay_ms, 0) / 1000
+        self.max_writes = max_writes
+        self.durability = durability
+
+_group_commit = None
+
+class _Writer:
+    """The thread running the writes to one database file, in submission order."""
+
+    def __init__(self, path):
+        self.path = path
+        self.requests = queue.SimpleQueue()
+        self.uncommitted = False  # Writes were applied but their group is still open
+        self.failed_commit = None  # The error of a group whose writes were reported done
+        self.thread = threading.Thread(target=self.run, name=f'database-writer:{os.path.basename(path)}', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            settings = _group_commit
+            work, commit, future = request
+            if commit is None:
+                self.peek(work, future)
+                continue
+            if settings is not None and work is not None:
+                if not self.run_group(request, settings):
+                    break
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                # A flush (no work) has nothing to wait for outside of a group,
+                # but reports the failed commit of an earlier one
+                if work is None:
+                    self.raise_failed_commit()
+                    future.set_result(None)
+                else:
+                    future.set_result(self.execute(work, commit))
+            except BaseException as e:
+                future.set_exception(e)
+        connection_manager.close_thread()
+
+    def raise_failed_commit(self):
+        """Raise the error of the last group commit that failed after its writes were reported done."""
+        error, self.failed_commit = self.failed_commit, None
+        if error is not None:
+            raise error
+
+    def retry(self, attempt):
+        """Call `attempt()` until it stops finding the database locked, at most WRITE_ATTEMPTS times."""
+        delay = WRITE_RETRY_DELAY
+        for number in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                return attempt()
+            except sqlite3.Error as e:
+                if not _is_locked(e) or number == WRITE_ATTEMPTS:
+                    raise
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, WRITE_RETRY_MAX_DELAY)
+
+    def peek(self, work, future):
+        """Run `work(conn)` on the writer connection as a read of its state, outside of the writes."""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(work(connection_manager.get(self.path)))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def begin(self):
+        conn = connection_manager.get(self.path)
+        # Take the write lock up front so waiting for it is covered by the
+        # busy timeout instead of failing halfway through a write
+        conn.execute('BEGIN IMMEDIATE')
+        return conn
+
+    def execute(self, work, commit=True):
+        """Run `work` in a transaction of its own, or nested in the one in progress."""
+        conn = connection_manager.get(self.path)
+        if conn.in_transaction:
+            return self.apply(conn, work, commit)  # A write made by another write
+        return self.retry(lambda: self.transaction(work, commit))
+
+    def transaction(self, work, commit):
+        conn = self.begin()
+        try:
+            result = work(_TimedConnection(conn) if query_stats.enabled else conn)
             if commit:
                 conn.commit()
-    except sqlite3.Error as e:
-        print(f"An error occurred: {e}")
+            return result
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
 
-def fetch_query(db_path, query, params=()):
-    """Fetch data from the database."""
-    try:
-        with create_connection(db_path) as conn:
-            cursor = conn.cursor()
+    def apply(self, conn, work, commit=True):
+        """Run `work` in a savepoint of the open transaction; its failure undoes only its own changes."""
+        conn.execute('SAVEPOINT write')
+        try:
+            result = work(_TimedConnection(conn) if query_stats.enabled else conn)
+            if not commit:
+                conn.execute('ROLLBACK TO write')
+            return result
+        except BaseException:
+            conn.execute('ROLLBACK TO write')
+            raise
+        finally:
+            conn.execute('RELEASE write')
+
+    def run_group(self, request, settings):
+        """Apply `request` and the writes queued after it in one transaction, committed once.
+
+        The group ends after `settings.max_writes` writes, at a flush, or once
+        the queue is empty: right away with 'committed' durability, and when
+        no write arrived for `settings.delay` seconds with 'applied'. Returns
+        False if the queue was shut down meanwhile.
+        """
+        try:
+            conn = self.retry(self.begin)
+        except BaseException as e:
+            work, commit, future = request
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
+            return True
+        applied = settings.durability == 'applied'
+        waiting = []  # Writes whose callers wait for the commit
+        flush = None
+        writes = 0
+        running = True
+        while True:
+            work, commit, future = request
+            if work is None:
+                flush = future
+                break
+            if commit is None:
+                self.peek(work, future)
+            elif future.set_running_or_notify_cancel():
+                writes += 1
+                try:
+                    result = self.apply(conn, work, commit)
+                except BaseException as e:
+                    future.set_exception(e)  # The other writes of the group are kept
+                else:
+                    if applied:
+                        self.uncommitted = True
+                        future.set_result(result)
+                    else:
+                        waiting.append((future, result))
+            if writes >= settings.max_writes:
+                break
+            try:
+                request = self.requests.get(timeout=settings.delay) if applied else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                running = False
+                break
+        error = None
+        try:
+            conn.commit()
+        except sqlite3.Error as e:
+            error = e
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if error is not None and self.uncommitted:
+                # The callers were told these writes succeeded: the windows
+                # read the tables of the file again, and the next flush
+                # raises the error
+                self.failed_commit = error
+                for table in _file_tables(self.path):
+                    query_cache.invalidate(table)
+                    publish(Change(table, 'update', None))
+            self.uncommitted = False
+        for future, result in waiting:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        if flush is not None:
+            failed, self.failed_commit = self.failed_commit or error, None
+            if failed is None:
+                flush.set_result(None)
+            else:
+                flush.set_exception(failed)
+        return running
+
+class WriteQueue:
+    """Funnel the writes of the process through one writer thread per database file.
+
+    Windows, scripts and the overdue sweeper then never contend with each
+    other for a file's write lock. Each write runs in its own transaction,
+    or in a savepoint of a shared one with group commit; when another
+    process holds the lock beyond BUSY_TIMEOUT, it is retried with
+    exponential backoff, and its error is raised to the caller once
+    WRITE_ATTEMPTS are used up.
+    """
+
+    def __init__(self):
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def _writer(self, db_path):
+        path = os.path.abspath(resolve_db_path(db_path))
+        with self._lock:
+            writer = self._writers.get(path)
+            if writer is None:
+                writer = self._writers[path] = _Writer(path)
+        return writer
+
+    def submit(self, db_path, work, commit=True):
+        """Queue `work(conn)` as a write to `db_path` and return a Future of its result."""
+        future = Future()
+        self._writer(db_path).requests.put((work, commit, future))
+        return future
+
+    def run(self, db_path, work, commit=True):
+        """Run `work(conn)` as a write to `db_path` and return its result, raising its error."""
+        writer = self._writer(db_path)
+        if threading.current_thread() is writer.thread:
+            return writer.execute(work, commit)  # A write made by another write
+        future = Future()
+        writer.requests.put((work, commit, future))
+        return future.result()
+
+    def external_version(self, db_path):
+        """Return a value that changes whenever a connection other than the writer of `db_path` commits to it.
+
+        It is the PRAGMA data_version of the writer connection, which the
+        commits of the writer itself leave alone, paired with the identity of
+        that connection since the versions of two connections do not compare.
+        """
+        def read(conn):
+            return id(conn), conn.execute('PRAGMA data_version').fetchone()[0]
+
+        writer = self._writer(db_path)
+        if threading.current_thread() is writer.thread:
+            return read(connection_manager.get(writer.path))
+        future = Future()
+        writer.requests.put((read, None, future))
+        return future.result()
+
+    def shutdown(self):
+        """Finish the queued writes and stop the writer threads."""
+        with self._lock:
+            writers, self._writers = list(self._writers.values()), {}
+        for writer in writers:
+            writer.requests.put(None)
+        for writer in writers:
+            writer.thread.join()
+
+    def flush(self, db_path=None):
+        """Wait until the writes queued so far to `db_path` (or every file) are committed.
+
+        Raises the error of the commit if it failed, or that of an earlier
+        group whose writes had already been reported done.
+        """
+        for writer in self._writers_of(db_path):
+            if threading.current_thread() is writer.thread:
+                continue  # Its own reads see its uncommitted writes
+            future = Future()
+            writer.requests.put((None, True, future))
+            future.result()
+
+    def sync(self, db_path=None):
+        """Commit the writes applied but not yet committed by group commit, before a read.
+
+        Reads use other connections than the writers and would not see them.
+        """
+        for writer in self._writers_of(db_path):
+            if writer.uncommitted and threading.current_thread() is not writer.thread:
+                self.flush(writer.path)
+
+    def _writers_of(self, db_path):
+        with self._lock:
+            if db_path is None:
+                return list(self._writers.values())
+            writer = self._writers.get(os.path.abspath(resolve_db_path(db_path)))
+        return [writer] if writer is not None else []
+
+write_queue = WriteQueue()
+atexit.register(write_queue.shutdown)  # Runs before the connections are closed
+
+def use_group_commit(delay_ms=GROUP_COMMIT_MS, max_writes=GROUP_COMMIT_WRITES, durability='applied'):
+    """Commit the writes arriving close together in one transaction; None commits each write again.
+
+    Each write still runs in a savepoint of its own, so a failing write
+    undoes only its own changes. With 'applied' durability a write returns
+    as soon as it is applied and the group is committed once no write came
+    for `delay_ms`, or after `max_writes` writes: rapid edits share one
+    commit (and fsync), but a crash may lose the writes of the last few
+    milliseconds. With 'committed' durability a write returns once it is
+    committed, and only the writes queued while the previous group was
+    committing share a commit. Reads first commit the writes still open, so
+    they always see them. If the commit of an 'applied' group fails, a
+    Change of every table of the file has the windows read it again, and
+    the next flush raises the error.
+    """
+    global _group_commit
+    settings = None if delay_ms is None else GroupCommit(delay_ms, max_writes, durability)
+    write_queue.flush()
+    _group_commit = settings
+
+def flush_writes():
+    """Commit the writes buffered by group commit now, raising the error if the commit fails."""
+    write_queue.flush()
+
+def execute_query(db_path, query, params=(), commit=False):
+    """Execute a single statement on the writer queue, committing it if `commit`.
+
+    Errors are raised to the caller rather than dropped, so a failed write is
+    never mistaken for a saved one.
+    """
+    write_queue.run(db_path, lambda conn: conn.execute(query, params), commit)
+
+def _make_rows(row_type, rows):
+    """Turn plain tuples into `row_type` rows (see models.py), unless it is None."""
+    return rows if row_type is None else list(map(row_type._make, rows))
+
+def fetch_query(db_path, query, params=(), row_type=None):
+    """Fetch data from the database, as `row_type` rows if given.
+
+    Errors are raised: an empty result printed over would look like (and be
+    cached as) a table with no rows.
+    """
+    write_queue.sync(db_path)
+    with create_connection(db_path) as conn:
+        cursor = conn.cursor()
+        with _timed(conn, query, params) as timed:
             cursor.execute(query, params)
             results = cursor.fetchall()
-        return results
-    except sqlite3.Error as e:
-        print(f"An error occurred: {e}")
+            timed.rows = len(results)
+    return _make_rows(row_type, results)
+
+def iter_query(db_path, query, params=(), batch_size=1000, row_type=None):
+    """Yield the rows of a query, fetching them `batch_size` at a time.
+
+    The statement stays open while the rows are consumed, so memory use does
+    not depend on the size of the result. The rows come from one consistent
+    snapshot and, in WAL mode, writers are not blocked meanwhile. Errors
+    are raised, so a caller writing the rows out never mistakes a failure
+    for the end of the data.
+    """
+    write_queue.sync(db_path)
+    conn = get_connection(db_path)
+    # Only the time spent in SQLite is recorded, not the time of the consumer
+    start = time.perf_counter()
+    cursor = conn.execute(query, params)
+    elapsed = time.perf_counter() - start
+    row_count = 0
+    try:
+        while True:
+            start = time.perf_counter()
+            rows = cursor.fetchmany(batch_size)
+            elapsed += time.perf_counter() - start
+            if not rows:
+                break
+            row_count += len(rows)
+            yield from _make_rows(row_type, rows)
+    finally:
+        cursor.close()
+        if query_stats.enabled:
+            query_stats.record(conn, query, params, elapsed * 1000, row_count)
+
+def fetch_one(db_path, query, params=(), row_type=None):
+    """Fetch a single row from the database, or None."""
+    results = fetch_query(db_path, query, params, row_type)
+    return results[0] if results else None
+
+def run_transaction(db_path, work):
+    """Run `work(conn)` in a single transaction on the writer queue and return its result.
+
+    The transaction is committed once if `work` succeeds and rolled back if it
+    raises, so bulk operations pay for a single commit (and fsync). Errors
+    are raised to the caller.
+    """
+    return write_queue.run(db_path, work)
+
+def execute_many(db_path, query, seq_of_params):
+    """Execute a query once per parameter set in a single transaction.
+
+    Returns the number of affected rows.
+    """
+    return run_transaction(db_path, lambda conn: conn.executemany(query, seq_of_params).rowcount)
+
+def _page_clause(limit, offset):
+    """Return a LIMIT/OFFSET clause and its parameters; no limit if `limit` is None."""
+    if limit is None:
+        return '', ()
+    return ' LIMIT ? OFFSET ?', (limit, offset)
+
+def _keyset_clause(columns, after, descending=False):
+    """Return a condition selecting rows that sort after the key `after`, and its parameters.
+
+    `columns` are the ORDER BY columns and `after` the values of those columns
+    in the last row of the previous page, or None for the first page. Unlike
+    OFFSET, the index seeks straight to the key, so late pages cost the same
+    as the first one. With `descending`, the rows are those sorting before
+    the key, for pages ordered by the columns DESC.
+    """
+    if after is None:
+        return '1', ()
+    placeholders = ', '.join('?' * len(columns))
+    return f'({", ".join(columns)}) {"<" if descending else ">"} ({placeholders})', tuple(after)
+
+def _iter_pages(fetch_page, page_key, batch_size):
+    """Yield the rows of `fetch_page(after, limit)` one page at a time.
+
+    `page_key(row)` returns the keyset cursor of a row. No read transaction
+    is held between pages, so writers are never blocked by a slow consumer.
+    """
+    after = None
+    while True:
+        rows = fetch_page(after, batch_size)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = page_key(rows[-1])
+
+def _id_params(ids):
+    """Turn an iterable of ids into executemany parameters."""
+    return [(row_id,) for row_id in ids]
+
+class QueryCache:
+    """A bounded, thread-safe LRU cache of query results grouped by table.
+
+    Entries are keyed by `(table, kind, args)`; `kind` is 'row' for lookups of
+    a single row by id, keyed `(table, 'row', id, query name)`, and the query
+    name otherwise. Entries expire after
+    `ttl` seconds as a safety net, but are normally dropped by the write
+    functions through `invalidate`: writing some rows of a table drops those
+    rows and every list/count result of the table, while other cached rows
+    stay valid.
+
+    A per-table generation counter keeps a read that raced with a write (for
+    example on the database executor thread) from caching its stale result.
+    """
+
+    def __init__(self, maxsize=512, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key, load):
+        """Return the cached value of `key`, calling `load()` on a miss.
+
+        None results are not cached, so missing rows are read again.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.generations.get(key[0], 0)
+        value = load()
+        if value is None:
+            return value
+        with self.lock:
+            if self.generations.get(key[0], 0) == generation:
+                self.entries[key] = (now + self.ttl, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, table, row_ids=None):
+        """Drop the list results of `table` and the given rows, or every row if `row_ids` is None."""
+        row_ids = None if row_ids is None else set(row_ids)
+        with self.lock:
+            self.generations[table] = self.generations.get(table, 0) + 1
+            self.invalidations += 1
+            stale = [key for key in self.entries
+                     if key[0] == table and (key[1] != 'row' or row_ids is None or key[2] in row_ids)]
+            for key in stale:
+                del self.entries[key]
+
+    def clear(self):
+        """Drop every entry."""
+        with self.lock:
+            for table in self.generations:
+                self.generations[table] += 1
+            self.entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+            }
+
+query_cache = QueryCache()
+
+_seen_data_versions = threading.local()
+_external_versions = {}
+_external_versions_lock = threading.Lock()
+
+def _check_data_version(table):
+    """Drop the cached results stored with `table` if another process changed its file.
+
+    The write functions of this process invalidate what they change, but
+    writes of other processes (a script, the backup CLI, or the apps while a
+    database service runs) would otherwise be served stale until the
+    entries expire. PRAGMA data_version on the reading connection changes
+    whenever another connection commits to the file, this process's writer
+    threads included; only then is the writer's own version read, which
+    changes for the commits of other connections alone, so a local write
+    leaves the cached rows it did not touch in place.
+    """
+    path = resolve_db_path(service_db_paths()[table])
+    conn = get_connection(path)
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    seen = getattr(_seen_data_versions, 'versions', None)
+    if seen is None:
+        seen = _seen_data_versions.versions = {}
+    key = os.path.abspath(path)
+    if seen.get(key) == (conn, version):
+        return
+    seen[key] = (conn, version)
+    external = write_queue.external_version(path)
+    with _external_versions_lock:
+        if _external_versions.get(key) == external:
+            return
+        # Also on the first look: the file may have changed before the
+        # writer connection was opened
+        _external_versions[key] = external
+    for name, service_path in service_db_paths().items():
+        if resolve_db_path(service_path) == path:
+            query_cache.invalidate(name)
+
+def cached(table, by_id=False):
+    """Serve a read function of `table` from `query_cache`.
+
+    With `by_id`, the first argument is the row id and the entry is dropped
+    only when that row is written. List results are cached as tuples and
+    returned as fresh lists, so callers may modify them. Writes made by
+    other processes are caught with PRAGMA data_version.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _check_data_version(table)
+            if by_id:
+                key = (table, 'row', args[0], func.__name__)
+            else:
+                key = (table, func.__name__, (args, tuple(sorted(kwargs.items()))))
+            value = query_cache.get(key, lambda: _freeze(func(*args, **kwargs)))
+            return list(value) if isinstance(value, _FrozenList) else value
+        return wrapper
+    return decorator
+
+class _FrozenList(tuple):
+    """A cached list result, handed out again as a list."""
+
+def _freeze(value):
+    return _FrozenList(value) if isinstance(value, list) else value
+
+def invalidates(table, op, rows='all'):
+    """Drop the cached results of `table` made stale by a write function, and
+    publish the write as an events.Change once it succeeded.
+
+    `op` is 'insert', 'update' or 'delete'. `rows` says which rows the write
+    touches: 'id' for the row whose id is the first argument, 'ids' for an
+    iterable of ids as first argument, 'new' for an insert returning the id
+    of the new row, 'result' for a write returning the ids it changed,
+    'none' for inserts of rows whose ids are not returned and 'all' when the
+    rows are not known.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if rows == 'ids':
+                args = (list(args[0]), *args[1:])
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                query_cache.invalidate(table)  # What the write got to change is not known
+                raise
+            _written(table, op, rows, args, result)
+            return result
+        wrapper.writes = (table, op, rows)
+        return wrapper
+    return decorator
+
+def _written(table, op, rows, args, result):
+    """Drop the cached results a successful write made stale and publish its Change."""
+    if rows == 'id':
+        ids = (args[0],)
+    elif rows == 'ids':
+        ids = tuple(args[0])
+    elif rows == 'new':
+        ids = (result,)
+    elif rows == 'result':
+        ids = tuple(result)
+        if not ids:
+            return  # Nothing was written
+    else:
+        ids = None
+    query_cache.invalidate(table, () if rows in ('none', 'new') else ids)
+    publish(Change(table, op, ids))
+
+def cache_stats():
+    """Return the hit/miss statistics of the query cache."""
+    return query_cache.stats()
+
+# Dates are stored as ISO 'yyyy-mm-dd' text so they sort and range-scan
+# through indexes; the apps show and accept 'dd/mm/yyyy'.
+DISPLAY_DATE_FORMAT = '%d/%m/%Y'
+
+def to_iso_date(value):
+    """Normalize a date, 'dd/mm/yyyy' or 'yyyy-mm-dd' string to 'yyyy-mm-dd'.
+
+    Raises ValueError if the value is not a valid date.
+    """
+    if isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%d')
+    value = value.strip()
+    try:
+        return datetime.datetime.strptime(value, DISPLAY_DATE_FORMAT).strftime('%Y-%m-%d')
+    except ValueError:
+        return datetime.date.fromisoformat(value).isoformat()
+
+def to_display_date(value):
+    """Format a stored ISO date as 'dd/mm/yyyy', leaving other values as they are."""
+    try:
+        return datetime.date.fromisoformat(value).strftime(DISPLAY_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return value
+
+# SQL expression turning a 'dd/mm/yyyy' column into 'yyyy-mm-dd', and the
+# GLOB pattern selecting the rows it applies to
+_ISO_FROM_DISPLAY_SQL = "substr({0}, 7, 4) || '-' || substr({0}, 4, 2) || '-' || substr({0}, 1, 2)"
+_DISPLAY_DATE_GLOB = "'[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]'"
+
+def _convert_display_dates(conn, table, column):
+    """Rewrite 'dd/mm/yyyy' values of `table.column` as ISO dates."""
+    iso = _ISO_FROM_DISPLAY_SQL.format(column)
+    conn.execute(f'UPDATE {table} SET {column} = {iso} WHERE {column} GLOB {_DISPLAY_DATE_GLOB}')
+
+# Schema migrations
+# Every migration is registered with a schema version and the service whose
+# tables it changes. Each database file records the version it has reached in
+# PRAGMA user_version, so at startup a file that is already current costs one
+# pragma read and none of the CREATE TABLE / CREATE INDEX work.
+MIGRATIONS = []
+
+_migrated_files = set()
+_migration_lock = threading.Lock()
+
+def migration(version, service):
+    """Register the decorated function as schema migration `version` for `service`."""
+    def register(func):
+        MIGRATIONS.append((version, service, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return register
+
+def schema_version():
+    """Return the latest schema version known to this module."""
+    return max((version for version, _, _ in MIGRATIONS), default=0)
+
+def migrate_database(db_path):
+    """Bring the file holding `db_path` up to the latest schema version."""
+    path = resolve_db_path(db_path)
+    services = [name for name, service_path in service_db_paths().items()
+                if resolve_db_path(service_path) == path]
+    _migrate_file(path, services)
+
+def initialize_databases():
+    """Migrate every service database; cheap once they are current.
+
+    With use_service, the service migrates the files when it starts, and
+    nothing is done here.
+    """
+    if _service_client is not None:
+        return
+    for path in dict.fromkeys(resolve_db_path(p) for p in service_db_paths().values()):
+        migrate_database(path)
+
+def forget_migrations(paths=None):
+    """Have initialize_databases check the files at `paths` (every file by default) again.
+
+    Needed once their contents were replaced, e.g. by rebuilding them.
+    """
+    with _migration_lock:
+        if paths is None:
+            _migrated_files.clear()
+        else:
+            _migrated_files.difference_update(os.path.abspath(path) for path in paths)
+
+def _migrate_file(path, services):
+    """Apply pending migrations for `services` to the database file at `path`."""
+    key = os.path.abspath(path)
+    if key in _migrated_files:
+        return
+    with _migration_lock:
+        if key in _migrated_files:
+            return
+        latest = schema_version()
+        conn = connection_manager.get(path)
+        if conn.execute('PRAGMA user_version').fetchone()[0] < latest:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Re-read inside the write lock in case another process migrated
+                current = conn.execute('PRAGMA user_version').fetchone()[0]
+                for version, service, func in MIGRATIONS:
+                    if version > current and service in services:
+                        func(conn)
+                conn.execute(f'PRAGMA user_version = {max(current, latest)}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        _migrated_files.add(key)
+
+def _table_columns(conn, table):
+    """Return the column names of `table`, or an empty list if it does not exist."""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+# Tables SQLite creates behind each FTS5 index
+FTS_SHADOW_SUFFIXES = ('data', 'idx', 'content', 'docsize', 'config')
+
+def _create_fts_index(conn, table, columns):
+    """Create `<table>_fts`, an FTS5 index over `columns` kept in sync by triggers."""
+    index = f'{table}_fts'
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    delete_old = (f"INSERT INTO {index} ({index}, rowid, {column_list}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    insert_new = f'INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});'
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({column_list}, content='{table}', content_rowid='id')")
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN {insert_new} END')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN {delete_old} END')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {column_list} ON {table} '
+                 f'BEGIN {delete_old} {insert_new} END')
+    conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query matching every word, the last as a prefix."""
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def _search(db_path, query, text, limit, row_type):
+    """Run a full-text `query` for `text`; empty searches return no rows."""
+    match = _fts_query(text)
+    if match is None:
         return []
+    return fetch_query(db_path, query, (match, limit), row_type)
+
+def _rebuild_table(conn, table, create_sql, select_sql):
+    """Recreate `table` with `create_sql` and refill it from `select_sql`.
+
+    `select_sql` reads from `<table>_old`, the renamed original table. The
+    AUTOINCREMENT counter is carried over so deleted ids are not reused.
+    """
+    seq = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+    conn.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+    conn.execute(create_sql)
+    conn.execute(f'INSERT INTO {table} {select_sql}')
+    conn.execute(f'DROP TABLE {table}_old')
+    if seq:
+        max_id = conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0
+        conn.execute('DELETE FROM sqlite_sequence WHERE name = ?', (table,))
+        conn.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table, max(seq[0], max_id)))
 
 # Task Management
-def create_tasks_table():
+@migration(1, 'tasks')
+def create_tasks_table(conn):
     """Create the tasks table."""
-    query = """
+    conn.execute("""
     CREATE TABLE IF NOT EXISTS tasks (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL,
@@ -52,29 +1260,62 @@ def create_tasks_table():
         notes TEXT,
         status INTEGER NOT NULL DEFAULT 0
     )
+    """)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)')
+
+@migration(2, 'tasks')
+def migrate_task_deadlines(conn):
+    """Store deadlines as ISO dates, indexed together with the status."""
+    _convert_display_dates(conn, 'tasks', 'deadline')
+    conn.execute('DROP INDEX IF EXISTS idx_tasks_status')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status_deadline ON tasks (status, deadline)')
+
+@migration(4, 'tasks')
+def create_tasks_search(conn):
+    """Index task names and notes for full-text search."""
+    _create_fts_index(conn, 'tasks', ('name', 'notes'))
+
+def search_tasks(text, limit=50):
+    """Search task names and notes; return TaskMatch rows, best match first."""
+    query = """
+    SELECT t.id, t.name, t.status, snippet(tasks_fts, -1, '[', ']', '...', 12)
+    FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid
+    WHERE tasks_fts MATCH ?
+    ORDER BY bm25(tasks_fts, 5.0, 1.0)
+    LIMIT ?
     """
-    execute_query(TASKS_DB_PATH, query, commit=True)
-    
-    # Create indexes
-    index_queries = [
-        'CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority)',
-        'CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)'
-    ]
-    for index_query in index_queries:
-        execute_query(TASKS_DB_PATH, index_query, commit=True)
+    return _search(TASKS_DB_PATH, query, text, limit, TaskMatch)
 
+@invalidates('tasks', 'insert', rows='new')
 def add_task(name, priority, deadline, notes='', status=0):
-    """Add a new task."""
+    """Add a new task and return its ID."""
     query = 'INSERT INTO tasks (name, priority, deadline, notes, status) VALUES (?, ?, ?, ?, ?)'
-    execute_query(TASKS_DB_PATH, query, (name, priority, deadline, notes, status), commit=True)
+    params = (name, priority, to_iso_date(deadline), notes, status)
+    return run_transaction(TASKS_DB_PATH, lambda conn: conn.execute(query, params).lastrowid)
 
+@cached('tasks')
 def get_tasks(status=0):
-    """Retrieve all tasks with a given status."""
-    query = 'SELECT id, name, priority, deadline FROM tasks WHERE status = ?'
-    return fetch_query(TASKS_DB_PATH, query, (status,))
+    """Retrieve all tasks with a given status, ordered by deadline."""
+    query = 'SELECT id, name, priority, deadline FROM tasks WHERE status = ? ORDER BY deadline, id'
+    return fetch_query(TASKS_DB_PATH, query, (status,), TaskSummary)
+
+def get_tasks_page(status=0, after=None, limit=100):
+    """Retrieve up to `limit` TaskSummary rows sorting after the (deadline, id) key `after`."""
+    condition, key_params = _keyset_clause(('deadline', 'id'), after)
+    query = f'SELECT id, name, priority, deadline FROM tasks WHERE status = ? AND {condition} ORDER BY deadline, id LIMIT ?'
+    return fetch_query(TASKS_DB_PATH, query, (status, *key_params, limit), TaskSummary)
+
+def iter_tasks(status=0, batch_size=500):
+    """Yield a TaskSummary for every task with a given status, ordered by deadline."""
+    return _iter_pages(lambda after, limit: get_tasks_page(status, after, limit),
+                       lambda task: (task.deadline, task.id), batch_size)
 
+@invalidates('tasks', 'update', rows='id')
 def update_task(task_id, name=None, priority=None, deadline=None, notes=None, status=None):
     """Update an existing task."""
+    if deadline is not None:
+        deadline = to_iso_date(deadline)
     fields = {'name': name, 'priority': priority, 'deadline': deadline, 'notes': notes, 'status': status}
     updates = ', '.join(f"{key} = ?" for key, value in fields.items() if value is not None)
     params = [value for value in fields.values() if value is not None]
@@ -83,254 +1324,778 @@ def update_task(task_id, name=None, priority=None, deadline=None, notes=None, st
         query = f'UPDATE tasks SET {updates} WHERE id = ?'
         execute_query(TASKS_DB_PATH, query, params, commit=True)
 
+@invalidates('tasks', 'delete', rows='id')
 def delete_task(task_id):
-    """Delete a task by ID."""
+    """Delete a task and its notes by ID."""
     query = 'DELETE FROM tasks WHERE id = ?'
     execute_query(TASKS_DB_PATH, query, (task_id,), commit=True)
+    delete_notes_by_tasks([task_id])
 
+@cached('tasks', by_id=True)
 def get_task_by_id(task_id):
-    """Retrieve a task by its ID."""
-    query = 'SELECT * FROM tasks WHERE id = ?'
-    return fetch_query(TASKS_DB_PATH, query, (task_id,))
+    """Retrieve a Task by its ID, or None."""
+    query = 'SELECT id, name, priority, deadline, notes, status FROM tasks WHERE id = ?'
+    return fetch_one(TASKS_DB_PATH, query, (task_id,), Task)
+
+def get_tasks_by_ids(task_ids):
+    """Retrieve the Task of several IDs; missing tasks are left out."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+    placeholders = ', '.join('?' for _ in task_ids)
+    query = f'SELECT id, name, priority, deadline, notes, status FROM tasks WHERE id IN ({placeholders})'
+    return fetch_query(TASKS_DB_PATH, query, task_ids, Task)
 
 def get_completed_tasks():
-    """Retrieve all completed tasks."""
-    query = 'SELECT id, name, priority, deadline FROM tasks WHERE status = 1'
-    return fetch_query(TASKS_DB_PATH, query)
+    """Retrieve all completed tasks, ordered by deadline."""
+    return get_tasks(status=1)
 
 def get_missed_tasks():
-    """Retrieve all missed tasks."""
-    query = 'SELECT id, name, priority, deadline FROM tasks WHERE status = 2'
-    return fetch_query(TASKS_DB_PATH, query)
+    """Retrieve all missed tasks, ordered by deadline."""
+    return get_tasks(status=2)
+
+@invalidates('tasks', 'update', rows='result')
+def mark_overdue_tasks_missed(today=None):
+    """Mark every incomplete task whose deadline is before `today` as missed.
+
+    Runs as one UPDATE over the (status, deadline) index and returns the IDs
+    of the tasks it changed.
+    """
+    query = 'UPDATE tasks SET status = 2 WHERE status = 0 AND deadline < ? RETURNING id'
+    params = (to_iso_date(today or datetime.date.today()),)
+    return run_transaction(TASKS_DB_PATH, lambda conn: [row[0] for row in conn.execute(query, params)])
+
+def get_tasks_due_between(start, end, status=0):
+    """Retrieve tasks with a given status whose deadline is in [start, end]."""
+    query = """
+    SELECT id, name, priority, deadline FROM tasks
+    WHERE status = ? AND deadline BETWEEN ? AND ?
+    ORDER BY deadline
+    """
+    return fetch_query(TASKS_DB_PATH, query, (status, to_iso_date(start), to_iso_date(end)), TaskSummary)
+
+@invalidates('tasks', 'insert', rows='none')
+def add_tasks(tasks):
+    """Add many tasks at once.
+
+    Each item is a (name, priority, deadline, notes, status) tuple.
+    """
+    query = 'INSERT INTO tasks (name, priority, deadline, notes, status) VALUES (?, ?, ?, ?, ?)'
+    rows = [(name, priority, to_iso_date(deadline), notes, status)
+            for name, priority, deadline, notes, status in tasks]
+    return execute_many(TASKS_DB_PATH, query, rows)
+
+@invalidates('tasks', 'delete', rows='ids')
+def delete_tasks(task_ids):
+    """Delete many tasks and their notes by ID."""
+    query = 'DELETE FROM tasks WHERE id = ?'
+    count = execute_many(TASKS_DB_PATH, query, _id_params(task_ids))
+    delete_notes_by_tasks(task_ids)
+    return count
+
+@invalidates('tasks', 'update', rows='ids')
+def update_tasks_status(task_ids, status):
+    """Set the status of many tasks by ID."""
+    query = 'UPDATE tasks SET status = ? WHERE id = ?'
+    return execute_many(TASKS_DB_PATH, query, [(status, task_id) for task_id in task_ids])
+
+@invalidates('tasks', 'delete', rows='result')
+def delete_tasks_by_status(status):
+    """Delete every task with a given status, and their notes; return the IDs of the deleted tasks."""
+    query = 'DELETE FROM tasks WHERE status = ? RETURNING id'
+    task_ids = run_transaction(TASKS_DB_PATH, lambda conn: [row[0] for row in conn.execute(query, (status,))])
+    delete_notes_by_tasks(task_ids)
+    return task_ids
 
 # Notes Management
-import sqlite3
+NOTES_TABLE_SQL = """
+CREATE TABLE notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
 
-def create_notes_table():
+@migration(1, 'notes')
+def create_notes_table(conn):
     """Create the notes table if it doesn't already exist."""
-    connection = sqlite3.connect('notes.db')
-    cursor = connection.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS notes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        content TEXT NOT NULL,
-        task_id INTEGER NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-    connection.commit()
-    connection.close()
+    if not _table_columns(conn, 'notes'):
+        conn.execute(NOTES_TABLE_SQL)
+
+@migration(2, 'notes')
+def reconcile_notes_table(conn):
+    """Give notes created by older versions a title and creation time."""
+    columns = _table_columns(conn, 'notes')
+    if 'title' not in columns or 'created_at' not in columns:
+        title = 'title' if 'title' in columns else 'substr(content, 1, 40)'
+        created_at = 'created_at' if 'created_at' in columns else 'CURRENT_TIMESTAMP'
+        _rebuild_table(conn, 'notes', NOTES_TABLE_SQL,
+                       f'(id, title, content, task_id, created_at) '
+                       f'SELECT id, {title}, content, task_id, {created_at} FROM notes_old')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_task_id ON notes (task_id)')
+
+@migration(4, 'notes')
+def create_notes_search(conn):
+    """Index note titles and contents for full-text search."""
+    _create_fts_index(conn, 'notes', ('title', 'content'))
+
+@migration(6, 'notes')
+def create_notes_sort_indexes(conn):
+    """Index the notes of each task in every NOTE_SORT_ORDERS order, covering the listed columns."""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_task_created ON notes (task_id, created_at, id, title)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_task_title ON notes (task_id, title COLLATE NOCASE, id, created_at)')
+    conn.execute('DROP INDEX IF EXISTS idx_notes_task_id')  # A prefix of idx_notes_task_created
+
+# The orders the notes of a task can be listed in, by name. Each one is an
+# index range scan of idx_notes_task_created or idx_notes_task_title, so no
+# sort is needed however many notes there are; sort_by values are looked up
+# here and never interpolated into SQL.
+NOTE_SORT_ORDERS = {
+    'created_at': 'created_at, id',
+    'newest': 'created_at DESC, id DESC',
+    'title': 'title COLLATE NOCASE, id',
+}
 
+def search_notes(text, limit=50):
+    """Search note titles and contents; return NoteMatch rows, best match first."""
+    query = """
+    SELECT n.id, n.title, n.task_id, snippet(notes_fts, -1, '[', ']', '...', 12)
+    FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid
+    WHERE notes_fts MATCH ?
+    ORDER BY bm25(notes_fts, 5.0, 1.0)
+    LIMIT ?
+    """
+    return _search(NOTES_DB_PATH, query, text, limit, NoteMatch)
+
+@cached('notes', by_id=True)
+def get_note_by_id(note_id):
+    """Retrieve a Note by its ID, or None."""
+    query = 'SELECT id, task_id, title, content, created_at FROM notes WHERE id=?'
+    return fetch_one(NOTES_DB_PATH, query, (note_id,), Note)
+
+@invalidates('notes', 'insert', rows='new')
 def save_notes(title, content, task_id):
-    """Save a new note to the database."""
-    connection = sqlite3.connect('notes.db')
-    cursor = connection.cursor()
-    cursor.execute('INSERT INTO notes (title, content, task_id) VALUES (?, ?, ?)', (title, content, task_id))
-    connection.commit()
-    connection.close()
-
-def fetch_notes(task_id, sort_by='created_at'):
-    """Fetch notes for a specific task_id, sorted by the given column."""
-    connection = sqlite3.connect('notes.db')
-    cursor = connection.cursor()
-    query = f'SELECT id, title, content FROM notes WHERE task_id=? ORDER BY {sort_by}'
-    cursor.execute(query, (task_id,))
-    notes = cursor.fetchall()
-    connection.close()
-    return notes
-
-def update_note(note_id, new_content):
-    """Update the content of a note."""
-    connection = sqlite3.connect('notes.db')
-    cursor = connection.cursor()
-    cursor.execute('UPDATE notes SET content=? WHERE id=?', (new_content, note_id))
-    connection.commit()
-    connection.close()
+    """Save a new note to the database and return its ID."""
+    query = 'INSERT INTO notes (title, content, task_id) VALUES (?, ?, ?)'
+    return run_transaction(NOTES_DB_PATH, lambda conn: conn.execute(query, (title, content, task_id)).lastrowid)
+
+def fetch_notes(task_id, sort_by='created_at', limit=None, offset=0):
+    """Fetch a NoteSummary for the notes of a task in one of the NOTE_SORT_ORDERS.
 
+    Raises ValueError for any other `sort_by`.
+    """
+    order = NOTE_SORT_ORDERS.get(sort_by)
+    if order is None:
+        raise ValueError(f"Unknown sort order: {sort_by}")
+    page, page_params = _page_clause(limit, offset)
+    query = f'SELECT id, title, created_at FROM notes WHERE task_id=? ORDER BY {order}{page}'
+    return fetch_query(NOTES_DB_PATH, query, (task_id, *page_params), NoteSummary)
+
+def get_notes_page(task_id, after=None, limit=100):
+    """Retrieve up to `limit` NoteSummary rows of a task sorting after the (created_at, id) key `after`."""
+    condition, key_params = _keyset_clause(('created_at', 'id'), after)
+    query = f'SELECT id, title, created_at FROM notes WHERE task_id = ? AND {condition} ORDER BY created_at, id LIMIT ?'
+    return fetch_query(NOTES_DB_PATH, query, (task_id, *key_params, limit), NoteSummary)
+
+def iter_notes(task_id, batch_size=500):
+    """Yield a NoteSummary for every note of a task, oldest first."""
+    return _iter_pages(lambda after, limit: get_notes_page(task_id, after, limit),
+                       lambda note: (note.created_at, note.id), batch_size)
+
+@cached('notes')
+def count_notes(task_id):
+    """Count the notes of a task."""
+    return (fetch_one(NOTES_DB_PATH, 'SELECT COUNT(*) FROM notes WHERE task_id=?', (task_id,)) or (0,))[0]
+
+@invalidates('notes', 'update', rows='id')
+def update_note(note_id, new_content, new_title=None):
+    """Update the content of a note, and its title if given."""
+    if new_title is None:
+        query = 'UPDATE notes SET content=? WHERE id=?'
+        params = (new_content, note_id)
+    else:
+        query = 'UPDATE notes SET title=?, content=? WHERE id=?'
+        params = (new_title, new_content, note_id)
+    execute_query(NOTES_DB_PATH, query, params, commit=True)
+
+@invalidates('notes', 'delete', rows='id')
 def delete_notes(note_id):
     """Delete a note by its ID."""
-    connection = sqlite3.connect('notes.db')
-    cursor = connection.cursor()
-    cursor.execute('DELETE FROM notes WHERE id=?', (note_id,))
-    connection.commit()
-    connection.close()
-
-# Expense Tracking
-def create_expenses_table():
-    """Create the expenses table."""
-    query = """
-    CREATE TABLE IF NOT EXISTS expenses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        description TEXT NOT NULL,
-        amount REAL NOT NULL,
-        date TEXT NOT NULL
-    )
+    query = 'DELETE FROM notes WHERE id=?'
+    execute_query(NOTES_DB_PATH, query, (note_id,), commit=True)
+
+@invalidates('notes', 'insert', rows='none')
+def add_notes(notes):
+    """Save many notes at once.
+
+    Each item is a (title, content, task_id) tuple.
     """
-    execute_query(EXPENSES_DB_PATH, query, commit=True)
+    query = 'INSERT INTO notes (title, content, task_id) VALUES (?, ?, ?)'
+    return execute_many(NOTES_DB_PATH, query, notes)
 
-def add_expense(description, amount, date):
-    """Add a new expense."""
-    query = 'INSERT INTO expenses (description, amount, date) VALUES (?, ?, ?)'
-    execute_query(EXPENSES_DB_PATH, query, (description, amount, date), commit=True)
+@invalidates('notes', 'delete', rows='ids')
+def delete_notes_by_ids(note_ids):
+    """Delete many notes by ID."""
+    query = 'DELETE FROM notes WHERE id=?'
+    return execute_many(NOTES_DB_PATH, query, _id_params(note_ids))
 
-def get_expenses():
-    """Retrieve all expenses."""
-    query = 'SELECT * FROM expenses'
-    return fetch_query(EXPENSES_DB_PATH, query)
+@invalidates('notes', 'delete')
+def delete_notes_by_task(task_id):
+    """Delete every note attached to a task."""
+    query = 'DELETE FROM notes WHERE task_id=?'
+    return execute_many(NOTES_DB_PATH, query, [(task_id,)])
 
-def delete_expense(expense_id):
-    """Delete an expense by ID."""
-    query = 'DELETE FROM expenses WHERE id = ?'
-    execute_query(EXPENSES_DB_PATH, query, (expense_id,), commit=True)
+@invalidates('notes', 'delete')
+def delete_notes_by_tasks(task_ids):
+    """Delete every note attached to several tasks."""
+    query = 'DELETE FROM notes WHERE task_id=?'
+    return execute_many(NOTES_DB_PATH, query, _id_params(task_ids))
+
+def get_notes_for_tasks(task_ids):
+    """Retrieve a TaskNote for each note of several tasks."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+    placeholders = ', '.join('?' for _ in task_ids)
+    query = f'''
+    SELECT t.id, n.id, n.title
+    FROM tasks t JOIN notes n ON n.task_id = t.id
+    WHERE t.id IN ({placeholders})
+    ORDER BY t.id, n.id
+    '''
+    return fetch_cross_service_query(query, task_ids, TaskNote)
+
+def get_tasks_with_notes(status=0):
+    """Retrieve a TaskWithNote for each note of the tasks with a given status."""
+    query = '''
+    SELECT t.id, t.name, n.id, n.title
+    FROM tasks t JOIN notes n ON n.task_id = t.id
+    WHERE t.status = ?
+    ORDER BY t.id, n.id
+    '''
+    return fetch_cross_service_query(query, (status,), TaskWithNote)
 
 # Goals Setting
-def create_goals_table():
+@migration(1, 'goals')
+def create_goals_table(conn):
     """Create the goals table."""
-    query = """
+    conn.execute("""
     CREATE TABLE IF NOT EXISTS goals (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         goal TEXT NOT NULL,
         details TEXT NOT NULL,
         status INTEGER DEFAULT 0
     )
+    """)
+
+@migration(2, 'goals')
+def add_goal_deadlines(conn):
+    """Add the ISO deadline column the goals app reads and writes."""
+    if 'deadline' not in _table_columns(conn, 'goals'):
+        conn.execute('ALTER TABLE goals ADD COLUMN deadline TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_goals_status ON goals (status)')
+
+@invalidates('goals', 'insert', rows='new')
+def add_goal(goal, details, deadline=None):
+    """Add a new goal and return its ID."""
+    if deadline is not None:
+        deadline = to_iso_date(deadline)
+    query = 'INSERT INTO goals (goal, details, deadline) VALUES (?, ?, ?)'
+    return run_transaction(GOALS_DB_PATH, lambda conn: conn.execute(query, (goal, details, deadline)).lastrowid)
+
+def get_goals(limit=None, offset=0):
+    """Retrieve a GoalSummary for every goal."""
+    page, page_params = _page_clause(limit, offset)
+    query = f'SELECT id, goal, deadline, status FROM goals ORDER BY id{page}'
+    return fetch_query(GOALS_DB_PATH, query, page_params, GoalSummary)
+
+def get_goals_page(after=None, limit=100, status=None):
+    """Retrieve up to `limit` GoalSummary rows with an id above `after`.
+
+    Only goals with the given `status` are returned unless it is None.
     """
-    execute_query(GOALS_DB_PATH, query, commit=True)
+    condition, key_params = _keyset_clause(('id',), None if after is None else (after,))
+    params = (*key_params, limit)
+    if status is not None:
+        condition += ' AND status = ?'
+        params = (*key_params, status, limit)
+    query = f'SELECT id, goal, deadline, status FROM goals WHERE {condition} ORDER BY id LIMIT ?'
+    return fetch_query(GOALS_DB_PATH, query, params, GoalSummary)
 
-def add_goal(goal, details):
-    """Add a new goal."""
-    query = 'INSERT INTO goals (goal, details) VALUES (?, ?)'
-    execute_query(GOALS_DB_PATH, query, (goal, details), commit=True)
+def iter_goals(status=None, batch_size=500):
+    """Yield a GoalSummary for every goal, or every goal with a given status."""
+    return _iter_pages(lambda after, limit: get_goals_page(after, limit, status),
+                       lambda goal: goal.id, batch_size)
 
-def get_goals():
-    """Retrieve all goals."""
-    query = 'SELECT * FROM goals'
-    return fetch_query(GOALS_DB_PATH, query)
+@cached('goals')
+def count_goals(status=None):
+    """Count all goals, or the goals with a given status."""
+    if status is None:
+        return (fetch_one(GOALS_DB_PATH, 'SELECT COUNT(*) FROM goals') or (0,))[0]
+    return (fetch_one(GOALS_DB_PATH, 'SELECT COUNT(*) FROM goals WHERE status = ?', (status,)) or (0,))[0]
 
-def update_goal(goal_id, new_goal, new_details):
+@invalidates('goals', 'update', rows='id')
+def update_goal(goal_id, new_goal, new_details, new_deadline=None):
     """Update an existing goal."""
-    query = 'UPDATE goals SET goal = ?, details = ? WHERE id = ?'
-    execute_query(GOALS_DB_PATH, query, (new_goal, new_details, goal_id), commit=True)
+    if new_deadline is not None:
+        new_deadline = to_iso_date(new_deadline)
+    query = 'UPDATE goals SET goal = ?, details = ?, deadline = ? WHERE id = ?'
+    execute_query(GOALS_DB_PATH, query, (new_goal, new_details, new_deadline, goal_id), commit=True)
 
+@invalidates('goals', 'delete', rows='id')
 def delete_goal(goal_id):
     """Delete a goal by ID."""
     query = 'DELETE FROM goals WHERE id = ?'
     execute_query(GOALS_DB_PATH, query, (goal_id,), commit=True)
 
+@cached('goals', by_id=True)
 def get_goal_by_id(goal_id):
-    """Retrieve a goal by its ID."""
-    query = 'SELECT goal, details FROM goals WHERE id = ?'
-    return fetch_query(GOALS_DB_PATH, query, (goal_id,))
+    """Retrieve a Goal by its ID, or None."""
+    query = 'SELECT id, goal, details, deadline, status FROM goals WHERE id = ?'
+    return fetch_one(GOALS_DB_PATH, query, (goal_id,), Goal)
 
-def get_completed_goals():
-    """Retrieve all completed goals."""
-    query = 'SELECT * FROM goals WHERE status = 1'
-    return fetch_query(GOALS_DB_PATH, query)
+def get_completed_goals(limit=None, offset=0):
+    """Retrieve a GoalSummary for every completed goal."""
+    page, page_params = _page_clause(limit, offset)
+    query = f'SELECT id, goal, deadline, status FROM goals WHERE status = 1 ORDER BY id{page}'
+    return fetch_query(GOALS_DB_PATH, query, page_params, GoalSummary)
 
+@invalidates('goals', 'update', rows='id')
 def update_goal_status(goal_id, new_status):
     """Update the status of a goal."""
     query = 'UPDATE goals SET status = ? WHERE id = ?'
     execute_query(GOALS_DB_PATH, query, (new_status, goal_id), commit=True)
 
+@invalidates('goals', 'insert', rows='none')
+def add_goals(goals):
+    """Add many goals at once.
+
+    Each item is a (goal, details, deadline) tuple.
+    """
+    query = 'INSERT INTO goals (goal, details, deadline) VALUES (?, ?, ?)'
+    rows = [(goal, details, to_iso_date(deadline) if deadline is not None else None)
+            for goal, details, deadline in goals]
+    return execute_many(GOALS_DB_PATH, query, rows)
+
+@invalidates('goals', 'delete', rows='ids')
+def delete_goals(goal_ids):
+    """Delete many goals by ID."""
+    query = 'DELETE FROM goals WHERE id = ?'
+    return execute_many(GOALS_DB_PATH, query, _id_params(goal_ids))
+
+@invalidates('goals', 'update', rows='ids')
+def update_goals_status(goal_ids, new_status):
+    """Set the status of many goals by ID."""
+    query = 'UPDATE goals SET status = ? WHERE id = ?'
+    return execute_many(GOALS_DB_PATH, query, [(new_status, goal_id) for goal_id in goal_ids])
+
 # Daily Journaling
-def create_journal_table():
+JOURNAL_TABLE_SQL = """
+CREATE TABLE journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    entry_date TEXT NOT NULL
+)
+"""
+
+@migration(1, 'journal')
+def create_journal_table(conn):
     """Create the journal table."""
+    if not _table_columns(conn, 'journal'):
+        conn.execute(JOURNAL_TABLE_SQL)
+
+@migration(2, 'journal')
+def reconcile_journal_table(conn):
+    """Merge the (entry_date, entry) and (title, content) journal layouts.
+
+    Older files use one or the other; both become (title, content, entry_date)
+    with ISO dates. Entries without a date are dated on the day of migration.
+    """
+    columns = _table_columns(conn, 'journal')
+    if columns == ['id', 'title', 'content', 'entry_date']:
+        return
+    title = 'title' if 'title' in columns else 'substr(entry, 1, 40)'
+    content = 'content' if 'content' in columns else 'entry'
+    entry_date = 'entry_date' if 'entry_date' in columns else "date('now', 'localtime')"
+    _rebuild_table(conn, 'journal', JOURNAL_TABLE_SQL,
+                   f'(id, title, content, entry_date) '
+                   f'SELECT id, {title}, {content}, {entry_date} FROM journal_old')
+    _convert_display_dates(conn, 'journal', 'entry_date')
+
+@migration(4, 'journal')
+def create_journal_search(conn):
+    """Index journal titles and contents for full-text search."""
+    _create_fts_index(conn, 'journal', ('title', 'content'))
+
+def search_journal(text, limit=50):
+    """Search journal titles and contents; return JournalMatch rows, best match first."""
     query = """
-    CREATE TABLE IF NOT EXISTS journal (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        entry_date TEXT NOT NULL,
-        entry TEXT NOT NULL
-    )
+    SELECT j.id, j.title, j.entry_date, snippet(journal_fts, -1, '[', ']', '...', 12)
+    FROM journal_fts JOIN journal j ON j.id = journal_fts.rowid
+    WHERE journal_fts MATCH ?
+    ORDER BY bm25(journal_fts, 5.0, 1.0)
+    LIMIT ?
+    """
+    return _search(JOURNAL_DB_PATH, query, text, limit, JournalMatch)
+
+@invalidates('journal', 'insert', rows='new')
+def add_journal_entry(title, content, entry_date=None):
+    """Add a new journal entry, dated today unless `entry_date` is given, and return its ID."""
+    entry_date = to_iso_date(entry_date or datetime.date.today())
+    query = 'INSERT INTO journal (title, content, entry_date) VALUES (?, ?, ?)'
+    return run_transaction(JOURNAL_DB_PATH, lambda conn: conn.execute(query, (title, content, entry_date)).lastrowid)
+
+def get_journal_entries(limit=None, offset=0):
+    """Retrieve a JournalSummary for every journal entry."""
+    page, page_params = _page_clause(limit, offset)
+    query = f'SELECT id, title, entry_date FROM journal ORDER BY id{page}'
+    return fetch_query(JOURNAL_DB_PATH, query, page_params, JournalSummary)
+
+def get_journal_page(after=None, limit=100):
+    """Retrieve up to `limit` JournalSummary rows with an id above `after`."""
+    condition, key_params = _keyset_clause(('id',), None if after is None else (after,))
+    query = f'SELECT id, title, entry_date FROM journal WHERE {condition} ORDER BY id LIMIT ?'
+    return fetch_query(JOURNAL_DB_PATH, query, (*key_params, limit), JournalSummary)
+
+def iter_journal_entries(batch_size=500):
+    """Yield a JournalSummary for every journal entry."""
+    return _iter_pages(get_journal_page, lambda entry: entry.id, batch_size)
+
+@migration(5, 'journal')
+def create_journal_timeline_index(conn):
+    """Index the journal by date, covering the timeline's (id, title, entry_date) rows."""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_journal_timeline ON journal (entry_date, id, title)')
+
+# The timeline lists entries newest first without their contents, so its
+# pages are read from idx_journal_timeline alone
+_TIMELINE_ORDER = 'ORDER BY entry_date DESC, id DESC'
+
+def get_journal_timeline(limit=None, offset=0):
+    """Retrieve a JournalSummary for every journal entry, newest first."""
+    page, page_params = _page_clause(limit, offset)
+    query = f'SELECT id, title, entry_date FROM journal {_TIMELINE_ORDER}{page}'
+    return fetch_query(JOURNAL_DB_PATH, query, page_params, JournalSummary)
+
+def get_journal_timeline_page(before=None, limit=100):
+    """Retrieve up to `limit` JournalSummary rows older than the (entry_date, id) key `before`."""
+    condition, key_params = _keyset_clause(('entry_date', 'id'), before, descending=True)
+    query = f'SELECT id, title, entry_date FROM journal WHERE {condition} {_TIMELINE_ORDER} LIMIT ?'
+    return fetch_query(JOURNAL_DB_PATH, query, (*key_params, limit), JournalSummary)
+
+@cached('journal', by_id=True)
+def get_journal_content(entry_id):
+    """Retrieve the content of a journal entry, or None; read only when an entry is opened."""
+    row = fetch_one(JOURNAL_DB_PATH, 'SELECT content FROM journal WHERE id = ?', (entry_id,))
+    return row[0] if row else None
+
+@invalidates('journal', 'insert', rows='none')
+def add_journal_entries(entries):
+    """Add many journal entries at once.
+
+    Each item is a (title, content, entry_date) tuple.
     """
-    execute_query(JOURNAL_DB_PATH, query, commit=True)
+    query = 'INSERT INTO journal (title, content, entry_date) VALUES (?, ?, ?)'
+    rows = [(title, content, to_iso_date(entry_date)) for title, content, entry_date in entries]
+    return execute_many(JOURNAL_DB_PATH, query, rows)
 
-def add_journal_entry(entry_date, entry):
-    """Add a new journal entry."""
-    query = 'INSERT INTO journal (entry_date, entry) VALUES (?, ?)'
-    execute_query(JOURNAL_DB_PATH, query, (entry_date, entry), commit=True)
+@cached('journal')
+def count_journal_entries():
+    """Count all journal entries."""
+    return (fetch_one(JOURNAL_DB_PATH, 'SELECT COUNT(*) FROM journal') or (0,))[0]
 
-def get_journal_entries():
-    """Retrieve all journal entries."""
-    query = 'SELECT * FROM journal'
-    return fetch_query(JOURNAL_DB_PATH, query)
+@cached('journal', by_id=True)
+def get_journal_entry_by_id(entry_id):
+    """Retrieve a JournalEntry by its ID, or None."""
+    query = 'SELECT id, title, content, entry_date FROM journal WHERE id = ?'
+    return fetch_one(JOURNAL_DB_PATH, query, (entry_id,), JournalEntry)
 
-def update_journal_entry(entry_id, new_date, new_content):
+@invalidates('journal', 'update', rows='id')
+def update_journal_entry(entry_id, new_title, new_content, new_date=None):
     """Update an existing journal entry."""
-    query = 'UPDATE journal SET entry_date = ?, entry = ? WHERE id = ?'
-    execute_query(JOURNAL_DB_PATH, query, (new_date, new_content, entry_id), commit=True)
+    if new_date is None:
+        query = 'UPDATE journal SET title = ?, content = ? WHERE id = ?'
+        params = (new_title, new_content, entry_id)
+    else:
+        query = 'UPDATE journal SET title = ?, content = ?, entry_date = ? WHERE id = ?'
+        params = (new_title, new_content, to_iso_date(new_date), entry_id)
+    execute_query(JOURNAL_DB_PATH, query, params, commit=True)
 
+@invalidates('journal', 'delete', rows='id')
 def delete_journal_entry(entry_id):
     """Delete a journal entry by ID."""
     query = 'DELETE FROM journal WHERE id = ?'
     execute_query(JOURNAL_DB_PATH, query, (entry_id,), commit=True)
 
 #expense calculate
-import sqlite3
-
 # Function to create tables
-def create_tables():
-    conn = sqlite3.connect('expenses.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS expenses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    description TEXT,
-                    amount REAL,
-                    type TEXT,
-                    date TEXT,
-                    month INTEGER,
-                    year INTEGER
-                )''')
-    conn.commit()
-    conn.close()
-
-# Function to add an expense
-def add_expense(description, amount, type, date, month, year):
-    conn = sqlite3.connect('expenses.db')
-    c = conn.cursor()
-    c.execute('INSERT INTO expenses (description, amount, type, date, month, year) VALUES (?, ?, ?, ?, ?, ?)',
-              (description, amount, type, date, month, year))
-    conn.commit()
-    conn.close()
+@migration(1, 'expenses')
+def create_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS expenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        description TEXT,
+        amount REAL,
+        type TEXT,
+        date TEXT,
+        month INTEGER,
+        year INTEGER
+    )
+    """)
+
+# Function to reconcile older expense tables: files created by the former
+# create_expenses_table lack type/month/year, and dates become ISO with
+# month/year always derived from the date
+@migration(2, 'expenses')
+def migrate_expense_dates(conn):
+    columns = _table_columns(conn, 'expenses')
+    for column, column_type in (('type', 'TEXT'), ('month', 'INTEGER'), ('year', 'INTEGER')):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE expenses ADD COLUMN {column} {column_type}')
+    _convert_display_dates(conn, 'expenses', 'date')
+    conn.execute("""
+    UPDATE expenses
+    SET month = CAST(substr(date, 6, 2) AS INTEGER), year = CAST(substr(date, 1, 4) AS INTEGER)
+    WHERE date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+    """)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_expenses_year_month ON expenses (year, month)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date)')
+
+# Function to keep per year/month/type expense totals in expense_rollups,
+# maintained by triggers so totals never need a scan of expenses
+@migration(3, 'expenses')
+def create_expense_rollups(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS expense_rollups (
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        entries INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (year, month, type)
+    ) WITHOUT ROWID
+    """)
+    add_new = """
+        INSERT INTO expense_rollups (year, month, type, total, entries)
+        VALUES (COALESCE(NEW.year, 0), COALESCE(NEW.month, 0), COALESCE(NEW.type, ''), COALESCE(NEW.amount, 0), 1)
+        ON CONFLICT (year, month, type) DO UPDATE
+        SET total = total + excluded.total, entries = entries + 1;
+    """
+    remove_old = """
+        UPDATE expense_rollups
+        SET total = total - COALESCE(OLD.amount, 0), entries = entries - 1
+        WHERE year = COALESCE(OLD.year, 0) AND month = COALESCE(OLD.month, 0) AND type = COALESCE(OLD.type, '');
+        DELETE FROM expense_rollups
+        WHERE year = COALESCE(OLD.year, 0) AND month = COALESCE(OLD.month, 0) AND type = COALESCE(OLD.type, '')
+        AND entries <= 0;
+    """
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS expenses_rollup_insert AFTER INSERT ON expenses BEGIN {add_new} END')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS expenses_rollup_delete AFTER DELETE ON expenses BEGIN {remove_old} END')
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS expenses_rollup_update
+    AFTER UPDATE OF amount, type, month, year ON expenses
+    BEGIN {remove_old} {add_new} END
+    """)
+    _fill_expense_rollups(conn)
+
+# Function to recompute expense_rollups from the expenses table
+def _fill_expense_rollups(conn):
+    conn.execute('DELETE FROM expense_rollups')
+    conn.execute("""
+    INSERT INTO expense_rollups (year, month, type, total, entries)
+    SELECT COALESCE(year, 0), COALESCE(month, 0), COALESCE(type, ''), SUM(COALESCE(amount, 0)), COUNT(*)
+    FROM expenses
+    GROUP BY 1, 2, 3
+    """)
+
+# Function to rebuild the expense rollups, e.g. after editing expenses outside the app
+@invalidates('expenses', 'update', rows='none')
+def rebuild_expense_rollups():
+    return run_transaction(EXPENSES_DB_PATH, _fill_expense_rollups)
+
+# Function to turn a date into the stored (date, month, year) triple
+def _expense_date_fields(date):
+    iso = to_iso_date(date)
+    return iso, int(iso[5:7]), int(iso[:4])
+
+# Function to add an expense and return its ID; month and year are taken from the date
+@invalidates('expenses', 'insert', rows='new')
+def add_expense(description, amount, type, date):
+    query = 'INSERT INTO expenses (description, amount, type, date, month, year) VALUES (?, ?, ?, ?, ?, ?)'
+    params = (description, amount, type, *_expense_date_fields(date))
+    return run_transaction(EXPENSES_DB_PATH, lambda conn: conn.execute(query, params).lastrowid)
 
 # Function to get expenses by month and year
-def get_expenses(month, year):
-    conn = sqlite3.connect('expenses.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM expenses WHERE month = ? AND year = ?', (month, year))
-    expenses = c.fetchall()
-    conn.close()
-    return expenses
+def get_expenses(month, year, limit=None, offset=0):
+    page, page_params = _page_clause(limit, offset)
+    query = f'SELECT id, description, amount, type, date FROM expenses WHERE month = ? AND year = ? ORDER BY id{page}'
+    return fetch_query(EXPENSES_DB_PATH, query, (month, year, *page_params), Expense)
+
+# Function to get the expenses of a month with an id above `after`, a page at a time
+def get_expenses_page(month, year, after=None, limit=100):
+    condition, key_params = _keyset_clause(('id',), None if after is None else (after,))
+    query = f'SELECT id, description, amount, type, date FROM expenses WHERE month = ? AND year = ? AND {condition} ORDER BY id LIMIT ?'
+    return fetch_query(EXPENSES_DB_PATH, query, (month, year, *key_params, limit), Expense)
+
+# Function to stream every expense of a month without loading them all at once
+def iter_expenses(month, year, batch_size=500):
+    return _iter_pages(lambda after, limit: get_expenses_page(month, year, after, limit),
+                       lambda expense: expense.id, batch_size)
+
+# Function to count expenses by month and year, read from the rollups
+@cached('expenses')
+def count_expenses(month, year):
+    query = 'SELECT SUM(entries) FROM expense_rollups WHERE year = ? AND month = ?'
+    row = fetch_one(EXPENSES_DB_PATH, query, (year, month))
+    return row[0] if row and row[0] is not None else 0
 
 # Function to get total expenses by month and year
+@cached('expenses')
 def get_expenses_total(month, year):
-    conn = sqlite3.connect('expenses.db')
-    c = conn.cursor()
-    c.execute('SELECT SUM(amount) FROM expenses WHERE month = ? AND year = ?', (month, year))
-    total = c.fetchone()[0]
-    conn.close()
-    return total if total is not None else 0.0
+    query = 'SELECT SUM(total) FROM expense_rollups WHERE year = ? AND month = ?'
+    row = fetch_one(EXPENSES_DB_PATH, query, (year, month))
+    return row[0] if row and row[0] is not None else 0.0
+
+# SQL columns splitting rollup totals into credits, debits and savings
+_ROLLUP_SUMMARY_COLUMNS = """
+    COALESCE(SUM(CASE WHEN type = 'credit' THEN total END), 0.0),
+    COALESCE(SUM(CASE WHEN type = 'debit' THEN total END), 0.0),
+    COALESCE(SUM(CASE WHEN type = 'credit' THEN total WHEN type = 'debit' THEN -total END), 0.0)
+"""
+
+# Function to get (credits, debits, savings) for a month and year
+@cached('expenses')
+def get_monthly_summary(month, year):
+    query = f'SELECT {_ROLLUP_SUMMARY_COLUMNS} FROM expense_rollups WHERE year = ? AND month = ?'
+    return fetch_one(EXPENSES_DB_PATH, query, (year, month), MonthlySummary) or MonthlySummary(0.0, 0.0, 0.0)
+
+# Function to get (month, credits, debits, savings) for every month of a year with expenses
+@cached('expenses')
+def get_yearly_summary(year):
+    query = f'SELECT month, {_ROLLUP_SUMMARY_COLUMNS} FROM expense_rollups WHERE year = ? GROUP BY month ORDER BY month'
+    return fetch_query(EXPENSES_DB_PATH, query, (year,), MonthTotals)
 
 # Function to delete an expense by ID
+@invalidates('expenses', 'delete', rows='id')
 def delete_expense(expense_id):
-    conn = sqlite3.connect('expenses.db')
-    c = conn.cursor()
-    c.execute('DELETE FROM expenses WHERE id = ?', (expense_id,))
-    conn.commit()
-    conn.close()
+    query = 'DELETE FROM expenses WHERE id = ?'
+    execute_query(EXPENSES_DB_PATH, query, (expense_id,), commit=True)
 
 # Function to get an expense by ID
+@cached('expenses', by_id=True)
 def get_expense_by_id(expense_id):
-    conn = sqlite3.connect('expenses.db')
-    c = conn.cursor()
-    c.execute('SELECT description, amount, type, date FROM expenses WHERE id = ?', (expense_id,))
-    expense = c.fetchone()
-    conn.close()
-    return expense
+    query = 'SELECT id, description, amount, type, date FROM expenses WHERE id = ?'
+    return fetch_one(EXPENSES_DB_PATH, query, (expense_id,), Expense)
 
 # Function to update an expense
+@invalidates('expenses', 'update', rows='id')
 def update_expense(expense_id, description, amount, type, date):
-    conn = sqlite3.connect('expenses.db')
-    c = conn.cursor()
-    c.execute('UPDATE expenses SET description = ?, amount = ?, type = ?, date = ? WHERE id = ?',
-              (description, amount, type, date, expense_id))
-    conn.commit()
-    conn.close()
+    query = 'UPDATE expenses SET description = ?, amount = ?, type = ?, date = ?, month = ?, year = ? WHERE id = ?'
+    execute_query(EXPENSES_DB_PATH, query, (description, amount, type, *_expense_date_fields(date), expense_id), commit=True)
+
+# Function to get expenses dated within [start, end], oldest first
+def get_expenses_between(start, end):
+    query = 'SELECT id, description, amount, type, date FROM expenses WHERE date BETWEEN ? AND ? ORDER BY date'
+    return fetch_query(EXPENSES_DB_PATH, query, (to_iso_date(start), to_iso_date(end)), Expense)
+
+# Function to get the (dates, amounts, types, descriptions) columns of the
+# expenses dated within [start, end], oldest first, in a single read; either
+# bound may be None. Expenses without an ISO date are left out.
+def get_expense_columns(start=None, end=None):
+    conditions, params = ["date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"], []
+    if start is not None:
+        conditions.append('date >= ?')
+        params.append(to_iso_date(start))
+    if end is not None:
+        conditions.append('date <= ?')
+        params.append(to_iso_date(end))
+    query = f'SELECT date, amount, type, description FROM expenses WHERE {" AND ".join(conditions)} ORDER BY date, id'
+    rows = fetch_query(EXPENSES_DB_PATH, query, params)
+    return tuple(list(column) for column in zip(*rows)) if rows else ([], [], [], [])
+
+# Function to add many expenses at once, each a
+# (description, amount, type, date) tuple
+@invalidates('expenses', 'insert', rows='none')
+def add_expenses(expenses):
+    query = 'INSERT INTO expenses (description, amount, type, date, month, year) VALUES (?, ?, ?, ?, ?, ?)'
+    rows = [(description, amount, type, *_expense_date_fields(date))
+            for description, amount, type, date in expenses]
+    return execute_many(EXPENSES_DB_PATH, query, rows)
+
+# Function to delete many expenses by ID
+@invalidates('expenses', 'delete', rows='ids')
+def delete_expenses(expense_ids):
+    query = 'DELETE FROM expenses WHERE id = ?'
+    return execute_many(EXPENSES_DB_PATH, query, _id_params(expense_ids))
+
+# Local service
+# With use_service, the operations below are sent to a running service.py,
+# which owns the database connections and serializes writes, instead of
+# being run on this process's own connections. Apps and scripts then share
+# one writer and never wait on each other's locks.
+
+READ_OPERATIONS = (
+    'search_tasks', 'get_tasks', 'get_tasks_page', 'get_task_by_id', 'get_tasks_by_ids', 'get_completed_tasks',
+    'get_missed_tasks', 'get_tasks_due_between',
+    'search_notes', 'get_note_by_id', 'fetch_notes', 'get_notes_page', 'count_notes', 'get_notes_for_tasks',
+    'get_tasks_with_notes',
+    'get_goals', 'get_goals_page', 'count_goals', 'get_goal_by_id', 'get_completed_goals',
+    'search_journal', 'get_journal_entries', 'get_journal_page', 'count_journal_entries', 'get_journal_entry_by_id',
+    'get_journal_timeline', 'get_journal_timeline_page', 'get_journal_content',
+    'get_expenses', 'get_expenses_page', 'count_expenses', 'get_expenses_total', 'get_monthly_summary',
+    'get_yearly_summary', 'get_expense_by_id', 'get_expenses_between', 'get_expense_columns',
+    'cache_stats',
+)
+
+WRITE_OPERATIONS = (
+    'add_task', 'update_task', 'delete_task', 'add_tasks', 'delete_tasks', 'update_tasks_status',
+    'delete_tasks_by_status', 'mark_overdue_tasks_missed',
+    'save_notes', 'update_note', 'delete_notes', 'add_notes', 'delete_notes_by_ids', 'delete_notes_by_task',
+    'delete_notes_by_tasks',
+    'add_goal', 'update_goal', 'delete_goal', 'update_goal_status', 'add_goals', 'delete_goals', 'update_goals_status',
+    'add_journal_entry', 'add_journal_entries', 'update_journal_entry', 'delete_journal_entry',
+    'add_expense', 'update_expense', 'delete_expense', 'add_expenses', 'delete_expenses', 'rebuild_expense_rollups',
+)
+
+_service_client = None
+
+def use_service(address):
+    """Send the database operations to the service at `address`; None runs them locally again."""
+    global _service_client
+    if _service_client is not None:
+        _service_client.close()
+        _service_client = None
+    if address is not None:
+        from service import ServiceClient
+        _service_client = ServiceClient(address)
+
+def _forward_to_service(func):
+    writes = getattr(func, 'writes', None)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _service_client is None:
+            return func(*args, **kwargs)
+        if writes and writes[2] == 'ids':
+            args = (list(args[0]), *args[1:])
+        result = _service_client.call(func.__name__, args, kwargs)
+        if writes:
+            # The write ran in the service; the windows of this process still need to hear of it
+            _written(*writes, args, result)
+        return result
+    return wrapper
+
+for _name in READ_OPERATIONS + WRITE_OPERATIONS:
+    globals()[_name] = _forward_to_service(globals()[_name])
+
+# Set INITIATIVES_SERVICE to the address of a running service.py to use it
+# from every app and script
+if os.environ.get('INITIATIVES_SERVICE'):
+    use_service(os.environ['INITIATIVES_SERVICE'])
+
+# Set INITIATIVES_GROUP_COMMIT to a delay in milliseconds to commit the
+# writes of every app and script in groups (see use_group_commit)
+if os.environ.get('INITIATIVES_GROUP_COMMIT'):
+    use_group_commit(float(os.environ['INITIATIVES_GROUP_COMMIT']))
@@ -0,0 +1,254 @@
+import queue
+import sqlite3
+import threading
+from tkinter import messagebox
+from database import flush_writes
+from events import merge_changes, subscribe
+
+# Changes published within this many milliseconds of each other reach a
+# ChangeListener together
+COALESCE_MS = 16
+
+class Request:
+    """A unit of database work submitted to a DatabaseExecutor."""
+
+    def __init__(self, func, args, kwargs, callback, error_callback, key, owner):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.callback = callback
+        self.error_callback = error_callback
+        self.key = key
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        """Skip the work if it has not started and drop its result if it has."""
+        self.cancelled = True
+
+class DatabaseExecutor:
+    """Run database work on a worker thread and deliver results on the Tk thread.
+
+    Work submitted with `submit` runs in order on a single background thread,
+    which gets its own pooled connections from database.py. Results are put
+    on a queue that the Tk mainloop drains with `after` while requests are
+    pending, so callbacks always run on the Tk thread and may touch widgets.
+
+    Requests submitted with the same `key` supersede each other: submitting a
+    new one cancels the previous one, so rapid clicks only deliver the result
+    of the last click.
+    """
+
+    def __init__(self, root, poll_interval=15):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = {}
+        self.pending = 0
+        self.polling = False
+        self.lock = threading.Lock()
+        self.tk_thread = threading.get_ident()
+        self.worker = threading.Thread(target=self.run, name="database-executor", daemon=True)
+        self.worker.start()
+
+    def submit(self, func, *args, callback=None, error_callback=None, key=None, owner=None, **kwargs):
+        """Run `func(*args, **kwargs)` in the background.
+
+        `callback(result)` or `error_callback(exception)` is called on the Tk
+        thread afterwards, unless the request was cancelled or `owner` (a
+        widget) has been destroyed in the meantime.
+        """
+        request = Request(func, args, kwargs, callback, error_callback, key, owner)
+        if key is not None:
+            previous = self.latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self.latest[key] = request
+        self.pending += 1
+        self.requests.put(request)
+        self.schedule_poll()
+        return request
+
+    def run_with_row(self, fetch, row_id, callback, missing="Row not found", owner=None):
+        """Read a row with `fetch(row_id)` in the background, then call `callback(row)` on the Tk thread.
+
+        If the row is gone (deleted since it was listed), `missing` is shown
+        in an error dialog instead.
+        """
+        def found(row):
+            if row:
+                callback(row)
+            else:
+                messagebox.showerror("Error", missing)
+        return self.submit(fetch, row_id, callback=found, owner=owner)
+
+    def show_date_error(self, error):
+        """An error_callback for writes taking a date: a ValueError is an invalid date."""
+        if isinstance(error, ValueError):
+            messagebox.showerror("Input Error", "Invalid date. Use dd/mm/yyyy or yyyy-mm-dd.")
+        else:
+            self.report(error)
+
+    def schedule_poll(self):
+        with self.lock:
+            if self.polling:
+                return
+            self.polling = True
+        # Outside the lock: called from another thread, `after` waits for
+        # the Tk thread, which may be waiting for the lock in poll
+        self.root.after(self.poll_interval, self.poll)
+
+    def call_soon(self, func):
+        """Call `func()` on the Tk thread; may be called from any thread.
+
+        From the worker thread, it runs before the result of the request being
+        worked on is delivered. From other threads, a poll is scheduled if
+        none is (Tk hands `after` calls from other threads to its own, as
+        long as Tcl is built with threads, as in the standard Python builds).
+        """
+        if threading.get_ident() == self.tk_thread:
+            func()
+            return
+        self.results.put((None, func, None))
+        self.schedule_poll()
+
+    def cancel(self, key):
+        """Cancel the latest request submitted with `key`, if any."""
+        request = self.latest.pop(key, None)
+        if request is not None:
+            request.cancel()
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            result = error = None
+            if not request.cancelled:
+                try:
+                    result = request.func(*request.args, **request.kwargs)
+                except Exception as e:
+                    error = e
+            self.results.put((request, result, error))
+
+    def poll(self):
+        while True:
+            try:
+                request, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                result()  # Queued by call_soon
+                continue
+            self.pending -= 1
+            self.deliver(request, result, error)
+        with self.lock:
+            self.polling = False
+            more = self.pending or not self.results.empty()
+        if more:
+            self.schedule_poll()
+
+    def deliver(self, request, result, error):
+        if request.key is not None and self.latest.get(request.key) is request:
+            del self.latest[request.key]
+        if request.cancelled:
+            return
+        if request.owner is not None and not request.owner.winfo_exists():
+            return
+        if error is None:
+            if request.callback is not None:
+                request.callback(result)
+        elif request.error_callback is not None:
+            request.error_callback(error)
+        else:
+            self.report(error)
+
+    def report(self, error):
+        """Report an error the request had no error_callback for, or that it does not handle."""
+        if isinstance(error, sqlite3.Error):
+            self.root.report_callback_exception(type(error), error, error.__traceback__)
+        else:
+            print(f"An error occurred: {error}")
+
+    def shutdown(self):
+        """Stop the worker thread once the work already queued is done."""
+        self.requests.put(None)
+
+class ChangeListener:
+    """Deliver the database changes of some tables to `callback(changes)` on the Tk thread.
+
+    The write functions of database.py publish an events.Change on whichever
+    thread made the write. The changes arriving within `delay` ms of the
+    first one are delivered together, merged into one Change per table and
+    operation, so a burst of writes costs the window a single refresh. The
+    subscription ends when `widget` is destroyed.
+    """
+
+    def __init__(self, widget, callback, tables=None, delay=COALESCE_MS):
+        self.widget = widget
+        self.callback = callback
+        self.delay = delay
+        self.executor = get_executor(widget)
+        self.changes = []
+        self.unsubscribe = subscribe(self.on_change, tables)
+        widget.bind("<Destroy>", self.on_destroy, add=True)
+
+    def on_change(self, change):
+        self.executor.call_soon(lambda: self.add(change))
+
+    def add(self, change):
+        if not self.widget.winfo_exists():
+            return
+        if not self.changes:
+            self.widget.after(self.delay, self.flush)
+        self.changes.append(change)
+
+    def flush(self):
+        changes, self.changes = merge_changes(self.changes), []
+        if changes and self.widget.winfo_exists():
+            self.callback(changes)
+
+    def on_destroy(self, event):
+        # Destroying a window also reports the destruction of each child
+        if str(event.widget) == str(self.widget):
+            self.unsubscribe()
+
+def flush_writes_on_close(window):
+    """Commit the writes buffered by group commit when `window` is closed.
+
+    Errors of the commit are shown like those of any other write.
+    """
+    def on_destroy(event):
+        if str(event.widget) == str(window):
+            flush_writes()
+
+    window.bind("<Destroy>", on_destroy, add=True)
+
+def show_database_errors(root):
+    """Show database errors raised in the Tk callbacks of `root` in a dialog.
+
+    Writes raise their error once the retries are used up; printed to the
+    console only, the user would believe the change had been saved.
+    """
+    report_exception = root.report_callback_exception
+
+    def report(error_type, error, traceback):
+        if isinstance(error, sqlite3.Error):
+            messagebox.showerror("Database Error", f"The change could not be saved: {error}")
+        else:
+            report_exception(error_type, error, traceback)
+
+    root.report_callback_exception = report
+
+def get_executor(widget):
+    """Return the executor shared by every window of `widget`'s Tk application.
+
+    Creating it also has database errors of the application shown in a dialog.
+    """
+    root = widget._root()
+    executor = getattr(root, "database_executor", None)
+    if executor is None:
+        executor = root.database_executor = DatabaseExecutor(root)
+        show_database_errors(root)
+    return executor
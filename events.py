@@ -0,0 +1,79 @@
+import threading
+from typing import NamedTuple
+
+class Change(NamedTuple):
+    """A write to the rows of a table.
+
+    `op` is 'insert', 'update' or 'delete' and `ids` the ids of the rows
+    written, or None when they are not known (bulk inserts, whole-table
+    writes); subscribers then re-read everything they show of the table.
+    """
+    table: str
+    op: str
+    ids: tuple
+
+class ChangeBus:
+    """Deliver the changes published by database.py to the subscribers of their table.
+
+    Changes are published on the thread that made the write, right after it
+    is committed, and subscribers are called on that thread; see
+    db_executor.ChangeListener to receive them on the Tk thread instead.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, tables=None):
+        """Call `callback(change)` for every change of `tables` (all tables by default).
+
+        Returns a function that cancels the subscription.
+        """
+        subscriber = (callback, None if tables is None else frozenset(tables))
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not subscriber]
+        return unsubscribe
+
+    def publish(self, change):
+        # Subscribing replaces the list, so it can be read without the lock
+        for callback, tables in self._subscribers:
+            if tables is None or change.table in tables:
+                try:
+                    callback(change)
+                except Exception as e:
+                    print(f"An error occurred: {e}")
+
+change_bus = ChangeBus()
+subscribe = change_bus.subscribe
+publish = change_bus.publish
+
+def merge_changes(changes):
+    """Merge changes into one per (table, op), in order of first appearance.
+
+    The ids of the merged change are None if those of any of its changes are.
+    """
+    merged = {}
+    for table, op, ids in changes:
+        key = (table, op)
+        if key not in merged:
+            merged[key] = None if ids is None else dict.fromkeys(ids)
+        elif merged[key] is not None:
+            if ids is None:
+                merged[key] = None
+            else:
+                merged[key].update(dict.fromkeys(ids))
+    return [Change(table, op, None if ids is None else tuple(ids)) for (table, op), ids in merged.items()]
+
+def changed_ids(changes, table, ops=None):
+    """Return the ids of `table` written by `changes` (with one of `ops`), or None if not all are known."""
+    ids = set()
+    for change in changes:
+        if change.table == table and (ops is None or change.op in ops):
+            if change.ids is None:
+                return None
+            ids.update(change.ids)
+    return ids
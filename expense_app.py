@@ -1,16 +1,24 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 from datetime import datetime
-from database import add_expense, get_expenses, get_expenses_total, delete_expense, update_expense, get_expense_by_id, create_tables
+from analytics import expense_report, format_report
+from database import (add_expense, get_expenses, count_expenses, get_monthly_summary, delete_expense, update_expense,
+                      get_expense_by_id, initialize_databases, to_display_date)
+from db_executor import ChangeListener, flush_writes_on_close, get_executor
+from virtual_list import VirtualListbox
 
 class ExpenseApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Expense Tracker")
         self.root.geometry("600x400")
+        self.selected_month = None
+        self.executor = get_executor(self.root)
 
         self.create_widgets()
         self.load_expenses()
+        ChangeListener(self.root, self.on_expense_changes, ("expenses",))
+        flush_writes_on_close(self.root)
 
     def create_widgets(self):
         self.root.configure(bg="#f0f0f0")
@@ -54,9 +62,11 @@ class ExpenseApp:
         self.month_frame = tk.Frame(self.expense_list_frame, bg="#f0f0f0")
         self.month_frame.pack(padx=10, pady=5, fill=tk.X)
 
-        self.expense_listbox = tk.Listbox(self.month_frame, selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none", font=("Arial", 12), width=50, height=15)
+        self.expense_listbox = VirtualListbox(self.expense_list_frame, fetch_page=self.fetch_expenses, count=self.count_expenses,
+            format_row=self.format_expense, selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none",
+            font=("Arial", 12), width=50, height=15)
         self.expense_listbox.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
-        self.expense_listbox.bind("<Double-1>", self.show_expense_details)
+        self.expense_listbox.bind_rows("<Double-1>", self.show_expense_details)
 
         # Buttons
         self.button_frame = tk.Frame(self.expense_list_frame, bg="#f0f0f0", padx=10, pady=5)
@@ -64,6 +74,7 @@ class ExpenseApp:
 
         tk.Button(self.button_frame, text="Edit Expense", command=self.edit_expense, bg="#2196F3", fg="white").pack(side=tk.LEFT, padx=7)
         tk.Button(self.button_frame, text="Delete Expense", command=self.delete_expense, bg="#F44336", fg="white").pack(side=tk.LEFT, padx=7)
+        tk.Button(self.button_frame, text="Report", command=self.show_report, bg="#9C27B0", fg="white").pack(side=tk.LEFT, padx=7)
 
         # Total Expenses Label
         self.total_label = tk.Label(self.main_frame, text="Total Savings: $0.00", bg="#f0f0f0", font=("Arial", 12, "bold"))
@@ -82,11 +93,8 @@ class ExpenseApp:
         except ValueError:
             messagebox.showwarning("Input Error", "Amount must be a number")
             return
-        month = datetime.now().month
-        year = datetime.now().year
-        add_expense(description, amount, type, date, month, year)
-        self.load_expenses()
-        self.clear_expense_inputs()
+        self.executor.submit(add_expense, description, amount, type, date, callback=lambda expense_id: self.clear_expense_inputs(),
+                             error_callback=self.executor.show_date_error, owner=self.root)
 
     def clear_expense_inputs(self):
         self.description_entry.delete(0, tk.END)
@@ -94,7 +102,7 @@ class ExpenseApp:
         self.date_entry.delete(0, tk.END)
 
     def load_expenses(self):
-        self.expense_listbox.delete(0, tk.END)
+        self.expense_listbox.refresh_async(self.executor)
         self.month_frame.pack_forget()  # Hide the listbox while updating
         self.month_frame = tk.Frame(self.expense_list_frame, bg="#f0f0f0")
         self.month_frame.pack(padx=10, pady=5, fill=tk.X)
@@ -104,75 +112,101 @@ class ExpenseApp:
             btn.pack(pady=2)
         self.update_total_savings()
 
+    def on_expense_changes(self, changes):
+        self.expense_listbox.refresh_async(self.executor)
+        self.update_total_savings()
+
     def show_expenses_by_month(self, month):
-        self.expense_listbox.delete(0, tk.END)
-        year = datetime.now().year
-        expenses = get_expenses(month, year)
-        for expense in expenses:
-            expense_text = f"{expense[1]} - ${expense[2]:.2f} - {expense[3]} - {expense[4]} - ID:{expense[0]}"
-            self.expense_listbox.insert(tk.END, expense_text)
-        self.expense_listbox.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        self.selected_month = month
+        self.expense_listbox.reset_async(self.executor)
+
+    def fetch_expenses(self, offset, limit):
+        if self.selected_month is None:
+            return []
+        return get_expenses(self.selected_month, datetime.now().year, limit=limit, offset=offset)
+
+    def count_expenses(self):
+        if self.selected_month is None:
+            return 0
+        return count_expenses(self.selected_month, datetime.now().year)
+
+    def format_expense(self, expense):
+        return f"{expense.description} - ${expense.amount:.2f} - {expense.type} - {to_display_date(expense.date)} - ID:{expense.id}"
 
     def update_total_savings(self):
         month = datetime.now().month
         year = datetime.now().year
-        total_savings = get_expenses_total(month, year)
-        self.total_label.config(text=f"Total Savings: ${total_savings:.2f}")
+        # Credits minus debits from the rollups, as in the Report view
+        self.executor.submit(get_monthly_summary, month, year, callback=self.show_total_savings,
+                             key=(self, "total"), owner=self.total_label)
+
+    def show_total_savings(self, summary):
+        self.total_label.config(text=f"Total Savings: ${summary.savings:.2f}")
 
     def show_expense_details(self, event):
-        selected_index = self.expense_listbox.curselection()
-        if not selected_index:
-            return
-        expense_text = self.expense_listbox.get(selected_index)
-        expense_id = self.get_expense_id(expense_text)
+        expense_id = self.expense_listbox.selected_id()
         if expense_id:
-            expense_details = get_expense_by_id(expense_id)
-            if expense_details:
-                messagebox.showinfo("Expense Details", f"Description: {expense_details[0]}\nAmount: ${expense_details[1]:.2f}\nType: {expense_details[2]}\nDate: {expense_details[3]}")
+            self.with_expense(expense_id, lambda expense: messagebox.showinfo("Expense Details",
+                f"Description: {expense.description}\nAmount: ${expense.amount:.2f}\nType: {expense.type}\nDate: {to_display_date(expense.date)}"))
 
-    def get_expense_id(self, expense_text):
-        # Extracting the ID from the expense text
-        parts = expense_text.split(" - ID:")
-        if len(parts) > 1:
-            return int(parts[1])
-        return None
+    def with_expense(self, expense_id, func):
+        # Read the expense in the background, then call func(expense) on the Tk thread
+        self.executor.run_with_row(get_expense_by_id, expense_id, func, "Expense not found", owner=self.root)
 
     def edit_expense(self):
-        selected_index = self.expense_listbox.curselection()
-        if not selected_index:
+        expense_id = self.expense_listbox.selected_id()
+        if not expense_id:
             messagebox.showwarning("Selection Error", "Please select an expense to edit")
             return
-        expense_text = self.expense_listbox.get(selected_index)
-        expense_id = self.get_expense_id(expense_text)
-        if expense_id:
-            expense_details = get_expense_by_id(expense_id)
-            if expense_details:
-                new_description = simpledialog.askstring("Edit Description", "New Description:", initialvalue=expense_details[0])
-                new_amount = simpledialog.askfloat("Edit Amount", "New Amount:", initialvalue=expense_details[1])
-                new_type = simpledialog.askstring("Edit Type", "New Type (credit/debit):", initialvalue=expense_details[2])
-                new_date = simpledialog.askstring("Edit Date", "New Date (dd/mm/yyyy):", initialvalue=expense_details[3])
-                if new_description and new_amount is not None and new_type and new_date:
-                    update_expense(expense_id, new_description, new_amount, new_type, new_date)
-                    self.load_expenses()
-                    self.update_total_savings()
-                else:
-                    messagebox.showwarning("Input Error", "All fields must be filled in")
+        self.with_expense(expense_id, self.ask_expense_changes)
+
+    def ask_expense_changes(self, expense):
+        new_description = simpledialog.askstring("Edit Description", "New Description:", initialvalue=expense.description)
+        new_amount = simpledialog.askfloat("Edit Amount", "New Amount:", initialvalue=expense.amount)
+        new_type = simpledialog.askstring("Edit Type", "New Type (credit/debit):", initialvalue=expense.type)
+        new_date = simpledialog.askstring("Edit Date", "New Date (dd/mm/yyyy):", initialvalue=to_display_date(expense.date))
+        if new_description and new_amount is not None and new_type and new_date:
+            self.executor.submit(update_expense, expense.id, new_description, new_amount, new_type, new_date,
+                                 error_callback=self.executor.show_date_error, owner=self.root)
+        else:
+            messagebox.showwarning("Input Error", "All fields must be filled in")
+
+    def show_report(self):
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Expense Report")
+        report_window.geometry("720x500")
+
+        text_widget = tk.Text(report_window, wrap=tk.NONE, font=("Courier", 11))
+        scrollbar = tk.Scrollbar(report_window, orient=tk.VERTICAL, command=text_widget.yview)
+        text_widget.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        text_widget.insert(tk.END, "Loading...")
+        text_widget.config(state=tk.DISABLED)
+
+        def show(report_text):
+            text_widget.config(state=tk.NORMAL)
+            text_widget.delete("1.0", tk.END)
+            text_widget.insert(tk.END, report_text)
+            text_widget.config(state=tk.DISABLED)
+
+        def show_error(error):
+            report_window.destroy()
+            messagebox.showerror("Report Error", str(error))
+
+        self.executor.submit(lambda: format_report(expense_report()), callback=show, error_callback=show_error,
+                             owner=report_window)
 
     def delete_expense(self):
-        selected_index = self.expense_listbox.curselection()
-        if not selected_index:
+        expense_id = self.expense_listbox.selected_id()
+        if not expense_id:
             messagebox.showwarning("Selection Error", "Please select an expense to delete")
             return
-        expense_text = self.expense_listbox.get(selected_index)
-        expense_id = self.get_expense_id(expense_text)
-        if expense_id:
-            delete_expense(expense_id)
-            self.load_expenses()
-            self.update_total_savings()
+        self.executor.submit(delete_expense, expense_id, owner=self.root)
 
 def main():
+    initialize_databases()
     root = tk.Tk()
-    create_tables()
     app = ExpenseApp(root)
     root.mainloop()
 
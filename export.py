@@ -0,0 +1,155 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from database import (TASKS_DB_PATH, NOTES_DB_PATH, EXPENSES_DB_PATH, GOALS_DB_PATH, JOURNAL_DB_PATH,
+                      initialize_databases, iter_query, to_iso_date)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+# What is exported of each table: its database, its columns with their types,
+# the date column the --since/--until filter applies to, and whether it has
+# a status column
+TABLES = {
+    'tasks': (TASKS_DB_PATH, (('id', 'integer'), ('name', 'text'), ('priority', 'text'), ('deadline', 'text'),
+                              ('notes', 'text'), ('status', 'integer')), 'deadline', True),
+    'notes': (NOTES_DB_PATH, (('id', 'integer'), ('task_id', 'integer'), ('title', 'text'), ('content', 'text'),
+                              ('created_at', 'text')), 'created_at', False),
+    'expenses': (EXPENSES_DB_PATH, (('id', 'integer'), ('description', 'text'), ('amount', 'real'), ('type', 'text'),
+                                    ('date', 'text'), ('month', 'integer'), ('year', 'integer')), 'date', False),
+    'goals': (GOALS_DB_PATH, (('id', 'integer'), ('goal', 'text'), ('details', 'text'), ('deadline', 'text'),
+                              ('status', 'integer')), 'deadline', True),
+    'journal': (JOURNAL_DB_PATH, (('id', 'integer'), ('title', 'text'), ('content', 'text'),
+                                  ('entry_date', 'text')), 'entry_date', False),
+}
+
+FORMATS = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet'}
+
+# Rows fetched from SQLite, and written to each Parquet row group, at a time
+BATCH_SIZE = 5000
+
+def table_rows(table, since=None, until=None, status=None, batch_size=BATCH_SIZE):
+    """Yield the rows of `table` in id order, optionally filtered by date range and status."""
+    db_path, columns, date_column, has_status = TABLES[table]
+    conditions, params = [], []
+    if since is not None:
+        conditions.append(f'{date_column} >= ?')
+        params.append(to_iso_date(since))
+    if until is not None:
+        # Compare with the day after, so datetimes on the last day are included
+        conditions.append(f"{date_column} < date(?, '+1 day')")
+        params.append(to_iso_date(until))
+    if status is not None:
+        if not has_status:
+            raise ValueError(f"{table} has no status to filter on")
+        conditions.append('status = ?')
+        params.append(status)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f"SELECT {', '.join(name for name, _ in columns)} FROM {table}{where} ORDER BY id"
+    return iter_query(db_path, query, params, batch_size)
+
+def write_csv(path, columns, rows):
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in columns])
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def write_jsonl(path, columns, rows):
+    names = [name for name, _ in columns]
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(names, row)), ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+def write_parquet(path, columns, rows, batch_size=BATCH_SIZE):
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    types = {'integer': pyarrow.int64(), 'real': pyarrow.float64(), 'text': pyarrow.string()}
+    schema = pyarrow.schema([(name, types[column_type]) for name, column_type in columns])
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema, compression='zstd') as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                count += write_row_group(writer, schema, batch)
+                batch = []
+        if batch:
+            count += write_row_group(writer, schema, batch)
+    return count
+
+def write_row_group(writer, schema, batch):
+    # Transpose the rows into one array per column
+    arrays = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+    writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+    return len(batch)
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'parquet': write_parquet}
+
+def export_table(table, path, fmt='csv', since=None, until=None, status=None):
+    """Stream `table` into the file at `path` and return the number of rows written.
+
+    The rows are read and written a batch at a time, so memory use is the
+    same for ten rows or ten million. The file is written next to `path`
+    and moved into place once complete.
+    """
+    columns = TABLES[table][1]
+    rows = table_rows(table, since, until, status)
+    partial_path = path + '.partial'
+    try:
+        count = WRITERS[fmt](partial_path, columns, rows)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    os.replace(partial_path, path)
+    return count
+
+def export_all(directory, fmt='csv', tables=None, since=None, until=None, status=None):
+    """Export every table (or the given ones) into `directory`; return the row count of each."""
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for table in tables or TABLES:
+        path = os.path.join(directory, table + FORMATS[fmt])
+        table_status = status if TABLES[table][3] else None
+        counts[table] = export_table(table, path, fmt, since, until, table_status)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Initiatives data to CSV, JSON Lines or Parquet files.")
+    parser.add_argument("tables", nargs="*", metavar="table",
+                        help=f"tables to export (default: all of {', '.join(TABLES)})")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", default="exports", help="directory to write the files to (default: exports)")
+    parser.add_argument("--since", help="only rows dated on or after this day (dd/mm/yyyy or yyyy-mm-dd)")
+    parser.add_argument("--until", help="only rows dated on or before this day")
+    parser.add_argument("--status", type=int, help="only tasks and goals with this status")
+    args = parser.parse_args()
+    unknown = [table for table in args.tables if table not in TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    initialize_databases()
+    try:
+        counts = export_all(args.output, args.format, args.tables, args.since, args.until, args.status)
+    except (ValueError, RuntimeError, OSError, sqlite3.Error) as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        sys.exit(1)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows -> {os.path.join(args.output, table + FORMATS[args.format])}")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,22 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
-from database import add_goal, get_completed_tasks, get_goals, update_goal, delete_goal, get_goal_by_id, update_goal_status
+from database import (add_goal, get_completed_goals, get_goals, count_goals, update_goal, delete_goal, get_goal_by_id,
+                      update_goal_status, initialize_databases)
+from db_executor import ChangeListener, flush_writes_on_close, get_executor
+from virtual_list import VirtualListbox
 
 class GoalTrackingApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Goal Tracking App")
         self.root.geometry("700x500")
+        self.show_completed = False
+        self.executor = get_executor(self.root)
 
         self.create_widgets()
         self.load_goals()
+        ChangeListener(self.root, self.on_goal_changes, ("goals",))
+        flush_writes_on_close(self.root)
 
     def create_widgets(self):
         self.root.configure(bg="#f0f0f0")
@@ -41,9 +48,10 @@ class GoalTrackingApp:
         self.goal_list_frame.pack(fill=tk.BOTH, expand=True)
 
         tk.Label(self.goal_list_frame, text="Goals", bg="#f0f0f0", font=("Arial", 14, "bold")).pack(anchor="w", padx=10)
-        self.goal_listbox = tk.Listbox(self.goal_list_frame, selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none", font=("Arial", 12), width=50, height=15)
+        self.goal_listbox = VirtualListbox(self.goal_list_frame, fetch_page=self.fetch_goals, count=self.count_goals, format_row=self.format_goal,
+            selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none", font=("Arial", 12), width=50, height=15)
         self.goal_listbox.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
-        self.goal_listbox.bind("<Double-1>", self.show_goal_details)
+        self.goal_listbox.bind_rows("<Double-1>", self.show_goal_details)
 
         # Buttons
         self.button_frame = tk.Frame(self.main_frame, bg="#f0f0f0", padx=10, pady=5)
@@ -61,12 +69,8 @@ class GoalTrackingApp:
         if not goal or not details or not deadline:
             messagebox.showwarning("Input Error", "Please fill in all fields")
             return
-        try:
-            add_goal(goal, details, deadline)
-            self.load_goals()
-            self.clear_goal_inputs()
-        except ValueError:
-            messagebox.showerror("Input Error", "Invalid date format. Use YYYY-MM-DD.")
+        self.executor.submit(add_goal, goal, details, deadline, callback=lambda goal_id: self.clear_goal_inputs(),
+                             error_callback=self.executor.show_date_error, owner=self.root)
 
     def clear_goal_inputs(self):
         self.goal_entry.delete(0, tk.END)
@@ -74,103 +78,76 @@ class GoalTrackingApp:
         self.deadline_entry.delete(0, tk.END)
 
     def load_goals(self):
-        self.goal_listbox.delete(0, tk.END)
-        goals = get_goals()
-        for goal in goals:
-            self.goal_listbox.insert(tk.END, f"{goal[0]} | {goal[1]} | Deadline: {goal[3]}")
+        self.show_completed = False
+        self.goal_listbox.reset_async(self.executor)
+
+    def on_goal_changes(self, changes):
+        # Re-read the visible page only, wherever the list is scrolled
+        self.goal_listbox.refresh_async(self.executor)
 
     def load_completed_goals(self):
-        self.goal_listbox.delete(0, tk.END)
-        goals = get_completed_tasks()
-        for goal in goals:
-            self.goal_listbox.insert(tk.END, f"{goal[0]} | {goal[1]} | Deadline: {goal[3]}")
+        self.show_completed = True
+        self.goal_listbox.reset_async(self.executor)
 
-    def show_goal_details(self, event):
-        selected_index = self.goal_listbox.curselection()
-        if not selected_index:
-            return
+    def fetch_goals(self, offset, limit):
+        if self.show_completed:
+            return get_completed_goals(limit=limit, offset=offset)
+        return get_goals(limit=limit, offset=offset)
 
-        index = selected_index[0]
-        goal_string = self.goal_listbox.get(index)
-        goal_id = self.get_goal_id_from_string(goal_string)
+    def count_goals(self):
+        return count_goals(status=1 if self.show_completed else None)
 
+    def format_goal(self, goal):
+        return f"{goal.id} | {goal.goal} | Deadline: {goal.deadline}"
+
+    def show_goal_details(self, event):
+        goal_id = self.goal_listbox.selected_id()
         if not goal_id:
-            messagebox.showerror("Error", "Goal details not found")
             return
 
-        goal = get_goal_by_id(goal_id)
-        if goal:
-            goal_details = f"Goal: {goal[0]}\nDetails: {goal[1]}\nDeadline: {goal[2]}\nStatus: {'Completed' if goal[3] else 'Incomplete'}"
-            messagebox.showinfo("Goal Details", goal_details)
-        else:
-            messagebox.showerror("Error", "Goal details not found")
+        self.with_goal(goal_id, lambda goal: messagebox.showinfo("Goal Details",
+            f"Goal: {goal.goal}\nDetails: {goal.details}\nDeadline: {goal.deadline}\nStatus: {'Completed' if goal.status else 'Incomplete'}"))
 
-    def get_goal_id_from_string(self, goal_string):
-        parts = goal_string.split(" | ")
-        if len(parts) > 0:
-            return int(parts[0])
-        return None
+    def with_goal(self, goal_id, func):
+        # Read the goal in the background, then call func(goal) on the Tk thread
+        self.executor.run_with_row(get_goal_by_id, goal_id, func, "Goal details not found", owner=self.root)
 
     def edit_goal(self):
-        selected_index = self.goal_listbox.curselection()
-        if not selected_index:
+        goal_id = self.goal_listbox.selected_id()
+        if not goal_id:
             messagebox.showwarning("Select Goal", "Please select a goal to edit")
             return
 
-        goal_string = self.goal_listbox.get(selected_index)
-        goal_id = self.get_goal_id_from_string(goal_string)
-
-        if not goal_id:
-            messagebox.showerror("Error", "Goal details not found")
-            return
+        self.with_goal(goal_id, self.ask_goal_changes)
 
-        goal = get_goal_by_id(goal_id)
-        if goal:
-            new_goal = simpledialog.askstring("Edit Goal", "Enter new goal:", initialvalue=goal[0])
-            new_details = simpledialog.askstring("Edit Goal", "Enter new details:", initialvalue=goal[1])
-            new_deadline = simpledialog.askstring("Edit Goal", "Enter new deadline (YYYY-MM-DD):", initialvalue=goal[2])
-            if new_goal and new_details and new_deadline:
-                try:
-                    update_goal(goal_id, new_goal, new_details, new_deadline)
-                    self.load_goals()
-                except ValueError:
-                    messagebox.showerror("Input Error", "Invalid date format. Use YYYY-MM-DD.")
-            else:
-                messagebox.showwarning("Input Error", "Please fill in all fields")
+    def ask_goal_changes(self, goal):
+        new_goal = simpledialog.askstring("Edit Goal", "Enter new goal:", initialvalue=goal.goal)
+        new_details = simpledialog.askstring("Edit Goal", "Enter new details:", initialvalue=goal.details)
+        new_deadline = simpledialog.askstring("Edit Goal", "Enter new deadline (YYYY-MM-DD):", initialvalue=goal.deadline)
+        if new_goal and new_details and new_deadline:
+            self.executor.submit(update_goal, goal.id, new_goal, new_details, new_deadline,
+                                 error_callback=self.executor.show_date_error, owner=self.root)
+        else:
+            messagebox.showwarning("Input Error", "Please fill in all fields")
 
     def delete_goal(self):
-        selected_index = self.goal_listbox.curselection()
-        if not selected_index:
-            messagebox.showwarning("Select Goal", "Please select a goal to delete")
-            return
-
-        goal_string = self.goal_listbox.get(selected_index)
-        goal_id = self.get_goal_id_from_string(goal_string)
-
+        goal_id = self.goal_listbox.selected_id()
         if not goal_id:
-            messagebox.showerror("Error", "Goal details not found")
+            messagebox.showwarning("Select Goal", "Please select a goal to delete")
             return
 
-        delete_goal(goal_id)
-        self.load_goals()
+        self.executor.submit(delete_goal, goal_id, owner=self.root)
 
     def mark_as_completed(self):
-        selected_index = self.goal_listbox.curselection()
-        if not selected_index:
-            messagebox.showwarning("Select Goal", "Please select a goal to mark as completed")
-            return
-
-        goal_string = self.goal_listbox.get(selected_index)
-        goal_id = self.get_goal_id_from_string(goal_string)
-
+        goal_id = self.goal_listbox.selected_id()
         if not goal_id:
-            messagebox.showerror("Error", "Goal details not found")
+            messagebox.showwarning("Select Goal", "Please select a goal to mark as completed")
             return
 
-        update_goal_status(goal_id, 1)  # 1 indicates completed status
-        self.load_goals()
+        self.executor.submit(update_goal_status, goal_id, 1, owner=self.root)  # 1 indicates completed status
 
 def main():
+    initialize_databases()
     root = tk.Tk()
     app = GoalTrackingApp(root)
     root.mainloop()
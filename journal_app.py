@@ -1,11 +1,73 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-import sqlite3
+from database import (add_journal_entry, get_journal_timeline, get_journal_content, count_journal_entries,
+                      get_journal_entry_by_id, delete_journal_entry, search_journal, initialize_databases,
+                      to_display_date)
+from db_executor import ChangeListener, flush_writes_on_close, get_executor
+from events import changed_ids
+from search_box import SearchBox
+from virtual_list import VirtualListbox
+
+class JournalTimeline:
+    """The journal entries newest first, next to the content of the selected one.
+
+    The list reads its (id, title, date) rows a page at a time from the
+    timeline index; an entry's content is only read once it is selected.
+    """
+
+    def __init__(self, root, on_open):
+        self.root = root
+        self.root.title("Journal Entries")
+        self.executor = get_executor(self.root)
+
+        self.listbox = VirtualListbox(self.root,
+            fetch_page=lambda offset, limit: get_journal_timeline(limit=limit, offset=offset),
+            count=count_journal_entries,
+            format_row=lambda entry: f"{to_display_date(entry.entry_date)} - {entry.title}",
+            width=40, height=20)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.listbox.bind_rows("<<ListboxSelect>>", self.show_selected, add=True)
+        self.listbox.bind_rows("<Double-1>", lambda e: on_open(self.listbox.selected_id(), self.root))
+
+        self.entry_frame = tk.Frame(self.root)
+        self.entry_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.title_label = tk.Label(self.entry_frame, text="Select an entry", anchor="w", font=("Arial", 12, "bold"))
+        self.title_label.pack(fill=tk.X, pady=5)
+        self.content_text = tk.Text(self.entry_frame, width=50, height=20, wrap=tk.WORD, state=tk.DISABLED)
+        self.content_text.pack(fill=tk.BOTH, expand=True)
+
+        self.listbox.refresh_async(self.executor)
+        ChangeListener(self.root, self.on_journal_changes, ("journal",))
+
+    def on_journal_changes(self, changes):
+        self.listbox.refresh_async(self.executor)
+        entry_ids = changed_ids(changes, "journal")
+        selected_id = self.listbox.selected_id()
+        if selected_id is not None and (entry_ids is None or selected_id in entry_ids):
+            self.executor.submit(get_journal_content, selected_id, callback=self.show_content,
+                                 key=(self, "content"), owner=self.content_text)
+
+    def show_selected(self, event):
+        entry = self.listbox.selected_row()
+        if entry is None:
+            return
+        self.title_label.config(text=f"{to_display_date(entry.entry_date)} - {entry.title}")
+        # A newer selection supersedes a content read still in flight
+        self.executor.submit(get_journal_content, entry.id, callback=self.show_content,
+                             key=(self, "content"), owner=self.content_text)
+
+    def show_content(self, content):
+        self.content_text.config(state=tk.NORMAL)
+        self.content_text.delete("1.0", tk.END)
+        self.content_text.insert(tk.END, content or "")
+        self.content_text.config(state=tk.DISABLED)
 
 class JournalApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Journal App")
+        self.timeline = None
+        self.executor = get_executor(self.root)
         
         # Create UI elements
         self.title_label = tk.Label(root, text="Title:")
@@ -29,16 +91,13 @@ class JournalApp:
         self.delete_button = tk.Button(root, text="Delete Entry", command=self.delete_entry)
         self.delete_button.pack(pady=5)
         
-        self.conn = sqlite3.connect('journal.db')
-        self.create_table()
-        
-    def create_table(self):
-        with self.conn:
-            self.conn.execute('''CREATE TABLE IF NOT EXISTS journal (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL
-            )''')
+        self.search_box = SearchBox(root, search_journal,
+            format_row=lambda entry: f"{to_display_date(entry.entry_date)} - {entry.title}: {entry.snippet}",
+            on_open=lambda entry_id: self.show_entry_details(entry_id, root),
+            bg=root.cget("bg"), width=50, height=8)
+        self.search_box.pack(pady=5, fill=tk.X)
+        ChangeListener(self.root, lambda changes: self.search_box.refresh(), ("journal",))
+        flush_writes_on_close(self.root)
     
     def save_entry(self):
         title = self.title_entry.get()
@@ -47,51 +106,52 @@ class JournalApp:
             messagebox.showwarning("Input Error", "Please enter both title and content.")
             return
         
-        with self.conn:
-            self.conn.execute('INSERT INTO journal (title, content) VALUES (?, ?)', (title, content))
+        self.executor.submit(add_journal_entry, title, content, callback=self.entry_saved, owner=self.root)
+    
+    def entry_saved(self, entry_id):
         messagebox.showinfo("Success", "Entry saved successfully!")
         self.title_entry.delete(0, tk.END)
         self.content_text.delete("1.0", tk.END)
     
+    def timeline_open(self):
+        return self.timeline is not None and self.timeline.root.winfo_exists()
+    
     def view_entries(self):
-        entries_window = tk.Toplevel(self.root)
-        entries_window.title("Journal Entries")
-        
-        with self.conn:
-            cursor = self.conn.execute('SELECT id, title FROM journal')
-            entries = cursor.fetchall()
-        
-        listbox = tk.Listbox(entries_window, width=50, height=15)
-        listbox.pack(pady=5)
-        
-        for entry in entries:
-            listbox.insert(tk.END, f"ID: {entry[0]} - {entry[1]}")
-        
-        listbox.bind('<Double-1>', lambda e: self.show_entry_details(listbox.get(listbox.curselection()[0]), entries_window))
+        # One timeline window, brought to the front when already open
+        if self.timeline_open():
+            self.timeline.root.deiconify()
+            self.timeline.root.lift()
+            return
+        self.timeline = JournalTimeline(tk.Toplevel(self.root), on_open=self.show_entry_details)
     
-    def show_entry_details(self, entry_text, window):
-        entry_id = int(entry_text.split(' - ')[0].split(': ')[1])
-        with self.conn:
-            cursor = self.conn.execute('SELECT title, content FROM journal WHERE id = ?', (entry_id,))
-            entry = cursor.fetchone()
+    def show_entry_details(self, entry_id, window):
+        if entry_id is None:
+            return
+        self.executor.submit(get_journal_entry_by_id, entry_id,
+                             callback=lambda entry: self.show_entry(entry_id, entry, window), owner=window)
+    
+    def show_entry(self, entry_id, entry, window):
+        if entry is None:
+            messagebox.showerror("Error", "Entry not found")  # Deleted since it was listed
+            return
         
         details_window = tk.Toplevel(window)
         details_window.title(f"Entry {entry_id}")
         
-        tk.Label(details_window, text=f"Title: {entry[0]}").pack(pady=5)
+        tk.Label(details_window, text=f"Title: {entry.title}").pack(pady=5)
         text_widget = tk.Text(details_window, width=50, height=10, wrap=tk.WORD)
-        text_widget.insert(tk.END, entry[1])
+        text_widget.insert(tk.END, entry.content)
         text_widget.pack(pady=5)
         text_widget.config(state=tk.DISABLED)  # Make the text widget read-only
     
     def delete_entry(self):
         entry_id = simpledialog.askinteger("Delete Entry", "Enter the ID of the entry to delete:")
         if entry_id:
-            with self.conn:
-                self.conn.execute('DELETE FROM journal WHERE id = ?', (entry_id,))
-            messagebox.showinfo("Success", "Entry deleted successfully!")
+            self.executor.submit(delete_journal_entry, entry_id, owner=self.root,
+                                 callback=lambda result: messagebox.showinfo("Success", "Entry deleted successfully!"))
 
 def main():
+    initialize_databases()
     root = tk.Tk()
     app = JournalApp(root)
     root.mainloop()
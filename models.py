@@ -0,0 +1,112 @@
+from typing import NamedTuple
+
+# Rows returned by database.py. They are named tuples: as compact as plain
+# tuples (no per-row __dict__), still indexable and comparable, but read by
+# field name instead of by position.
+
+class Task(NamedTuple):
+    id: int
+    name: str
+    priority: str
+    deadline: str
+    notes: str
+    status: int
+
+    def summary(self):
+        """Return the part of the task shown in the task lists."""
+        return TaskSummary(self.id, self.name, self.priority, self.deadline)
+
+class TaskSummary(NamedTuple):
+    id: int
+    name: str
+    priority: str
+    deadline: str
+
+class TaskMatch(NamedTuple):
+    id: int
+    name: str
+    status: int
+    snippet: str
+
+class Note(NamedTuple):
+    id: int
+    task_id: int
+    title: str
+    content: str
+    created_at: str
+
+class NoteSummary(NamedTuple):
+    id: int
+    title: str
+    created_at: str
+
+class NoteMatch(NamedTuple):
+    id: int
+    title: str
+    task_id: int
+    snippet: str
+
+class TaskNote(NamedTuple):
+    task_id: int
+    note_id: int
+    title: str
+
+class TaskWithNote(NamedTuple):
+    task_id: int
+    name: str
+    note_id: int
+    title: str
+
+class Goal(NamedTuple):
+    id: int
+    goal: str
+    details: str
+    deadline: str
+    status: int
+
+class GoalSummary(NamedTuple):
+    id: int
+    goal: str
+    deadline: str
+    status: int
+
+class JournalEntry(NamedTuple):
+    id: int
+    title: str
+    content: str
+    entry_date: str
+
+class JournalSummary(NamedTuple):
+    id: int
+    title: str
+    entry_date: str
+
+class JournalMatch(NamedTuple):
+    id: int
+    title: str
+    entry_date: str
+    snippet: str
+
+class Expense(NamedTuple):
+    id: int
+    description: str
+    amount: float
+    type: str
+    date: str
+
+class MonthlySummary(NamedTuple):
+    credits: float
+    debits: float
+    savings: float
+
+class MonthTotals(NamedTuple):
+    month: int
+    credits: float
+    debits: float
+    savings: float
+
+# Every row class by name, e.g. to rebuild rows received from service.py
+MODELS = {model.__name__: model for model in (
+    Task, TaskSummary, TaskMatch, Note, NoteSummary, NoteMatch, TaskNote, TaskWithNote,
+    Goal, GoalSummary, JournalEntry, JournalSummary, JournalMatch, Expense, MonthlySummary, MonthTotals,
+)}
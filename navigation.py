@@ -1,55 +1,156 @@
+import argparse
+import importlib
+import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import messagebox
-from todo_app import TODOApp
-from notes_app import NotesApp
-from journal_app import JournalApp
-from goals_app import GoalTrackingApp
-from expense_app import ExpenseApp
+from database import GROUP_COMMIT_MS, initialize_databases, use_group_commit, use_service
+
+STARTED = time.perf_counter()
+
+# Service apps as (button text, module, class); each module is imported on
+# first use so the launcher does not pay for apps (and tkcalendar) it never opens
+APPS = [
+    ("To-Do List", "todo_app", "TODOApp"),
+    ("Notes", "notes_app", "NotesApp"),
+    ("Journal", "journal_app", "JournalApp"),
+    ("Goals", "goals_app", "GoalTrackingApp"),
+    ("Expenses", "expense_app", "ExpenseApp"),
+]
+
+class AppLoader:
+    """Import service modules on demand and remember how long each import took."""
+
+    def __init__(self):
+        self.classes = {}
+        self.timings = {}
+        self.importing = set()
+        self.lock = threading.Lock()
+
+    def import_module(self, module_name):
+        # A module is in sys.modules from the start of its import, so it is
+        # always looked up through importlib, which waits for an import in
+        # progress on the prewarm thread to finish
+        with self.lock:
+            first = module_name not in sys.modules and module_name not in self.importing
+            if first:
+                self.importing.add(module_name)
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+        finally:
+            if first:
+                with self.lock:
+                    self.importing.discard(module_name)
+        if first:
+            with self.lock:
+                self.timings[module_name] = time.perf_counter() - start
+        return module
+
+    def load(self, module_name, class_name):
+        """Return the app class, importing its module on first use."""
+        key = (module_name, class_name)
+        app_class = self.classes.get(key)
+        if app_class is None:
+            app_class = self.classes[key] = getattr(self.import_module(module_name), class_name)
+        return app_class
+
+    def prewarm(self, module_names):
+        """Import `module_names` on a background thread."""
+        def run():
+            for module_name in module_names:
+                try:
+                    self.import_module(module_name)
+                except Exception as e:
+                    print(f"An error occurred: {e}")
+        threading.Thread(target=run, name="app-prewarm", daemon=True).start()
 
 class NavigationApp:
-    def __init__(self, root):
+    def __init__(self, root, prewarm=True, report_timings=False):
         self.root = root
         self.root.title("Initiatives")
         self.root.geometry("400x300")
+        self.loader = AppLoader()
+        self.report_timings = report_timings
         self.create_widgets()
+        # Once the window is up, import the apps while the user picks one
+        self.root.after_idle(self.on_shown, prewarm)
 
     def create_widgets(self):
         self.frame = tk.Frame(self.root, padx=10, pady=10)
         self.frame.pack(fill=tk.BOTH, expand=True)
         tk.Label(self.frame, text="Select Application:", font=("Arial", 14)).pack(pady=10)
-        self.add_button("To-Do List", self.launch_todo_app)
-        self.add_button("Notes", self.launch_notes_app)
-        self.add_button("Journal", self.launch_journal_app)
-        self.add_button("Goals", self.launch_goals_app)
-        self.add_button("Expenses", self.launch_expense_app)
+        for app_name, module_name, class_name in APPS:
+            self.add_button(app_name, lambda app=(app_name, module_name, class_name): self.launch_app(*app))
+        self.backup_button = tk.Button(self.frame, text="Back Up Data", command=self.back_up)
+        self.backup_button.pack(pady=5, fill=tk.X)
 
     def add_button(self, text, command):
         button = tk.Button(self.frame, text=text, command=command, bg="#4CAF50", fg="white")
         button.pack(pady=5, fill=tk.X)
 
-    def launch_todo_app(self):
-        self.launch_app(TODOApp, "To-Do List")
-
-    def launch_notes_app(self):
-        self.launch_app(NotesApp, "Notes")
-
-    def launch_journal_app(self):
-        self.launch_app(JournalApp, "Journal")
-
-    def launch_goals_app(self):
-        self.launch_app(GoalTrackingApp, "Goals")
+    def on_shown(self, prewarm):
+        if self.report_timings:
+            print(f"Launcher shown in {(time.perf_counter() - STARTED) * 1000:.1f} ms")
+        if prewarm:
+            self.loader.prewarm([module_name for _, module_name, _ in APPS])
 
-    def launch_expense_app(self):
-        self.launch_app(ExpenseApp, "Expenses")
-
-    def launch_app(self, app_class, app_name):
+    def launch_app(self, app_name, module_name, class_name):
         try:
+            start = time.perf_counter()
+            app_class = self.loader.load(module_name, class_name)
             app_window = tk.Toplevel(self.root)
             app_class(app_window)
+            if self.report_timings:
+                print(f"{app_name} opened in {(time.perf_counter() - start) * 1000:.1f} ms")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while launching the {app_name} application: {e}")
 
-if __name__ == "__main__":
+    def back_up(self):
+        from backup import start_snapshot
+        self.backup_button.config(state=tk.DISABLED, text="Backing Up...")
+        self.check_backup(start_snapshot())
+
+    def check_backup(self, future):
+        # The backup runs on its own thread; its result is picked up here, on the Tk thread
+        if not future.done():
+            self.root.after(100, self.check_backup, future)
+            return
+        self.backup_button.config(state=tk.NORMAL, text="Back Up Data")
+        try:
+            messagebox.showinfo("Backup", f"Saved snapshot {future.result()}")
+        except Exception as e:
+            messagebox.showerror("Error", f"The backup failed: {e}")
+
+    def print_timings(self):
+        for module_name, seconds in sorted(self.loader.timings.items()):
+            print(f"import {module_name}: {seconds * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Launch the Initiatives apps.")
+    parser.add_argument("--no-prewarm", action="store_true", help="import each app only when it is opened")
+    parser.add_argument("--timings", action="store_true", help="print startup and import timings")
+    parser.add_argument("--service", nargs="?", const="", metavar="ADDRESS",
+                        help="use the database service running at ADDRESS (default: its default address)")
+    parser.add_argument("--group-commit", nargs="?", type=float, const=GROUP_COMMIT_MS, metavar="MS",
+                        help=f"commit the writes made within MS milliseconds together (default {GROUP_COMMIT_MS})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.service is not None:
+        from service import DEFAULT_ADDRESS
+        use_service(args.service or DEFAULT_ADDRESS)
+    if args.group_commit is not None:
+        use_group_commit(args.group_commit)
+    initialize_databases()
+    if args.timings:
+        print(f"Databases ready in {(time.perf_counter() - start) * 1000:.1f} ms")
     root = tk.Tk()
-    app = NavigationApp(root)
+    app = NavigationApp(root, prewarm=not args.no_prewarm, report_timings=args.timings)
     root.mainloop()
+    if args.timings:
+        app.print_timings()
+
+if __name__ == "__main__":
+    main()
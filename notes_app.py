@@ -1,17 +1,27 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-from database import save_notes, fetch_notes, update_note, delete_notes, create_notes_table
+from database import (save_notes, fetch_notes, count_notes, update_note, delete_notes, get_note_by_id, search_notes,
+                      get_task_by_id, search_tasks, initialize_databases)
+from db_executor import ChangeListener, flush_writes_on_close, get_executor
+from events import changed_ids
+from search_box import SearchBox
+from virtual_list import VirtualListbox
+
+# Sort orders offered in the list, by label; see database.NOTE_SORT_ORDERS
+SORT_ORDERS = {"Oldest first": "created_at", "Newest first": "newest", "Title": "title"}
 
 class NotesApp:
-    def __init__(self, root):
+    def __init__(self, root, task_id=None):
         self.root = root
         self.root.title("Notes")
-        self.root.geometry("600x400")
-
-        create_notes_table()  # Ensure the notes table is created
+        self.root.geometry("600x650")
+        self.task_id = task_id
+        self.executor = get_executor(self.root)
 
         self.create_widgets()
-        self.load_notes()
+        self.set_task(task_id)
+        ChangeListener(self.root, self.on_changes, ("notes", "tasks"))
+        flush_writes_on_close(self.root)
 
     def create_widgets(self):
         self.root.configure(bg="#f0f0f0")
@@ -20,6 +30,17 @@ class NotesApp:
         self.main_frame = tk.Frame(self.root, bg="#f0f0f0")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
+        # Task Frame: the task whose notes are shown, and a search to pick another
+        self.task_frame = tk.Frame(self.main_frame, bg="#f0f0f0", padx=10)
+        self.task_frame.pack(padx=10, pady=(10, 0), fill=tk.X)
+
+        self.task_label = tk.Label(self.task_frame, text="", bg="#f0f0f0", font=("Arial", 12, "bold"), anchor="w")
+        self.task_label.pack(fill=tk.X)
+        self.task_search_box = SearchBox(self.task_frame, search_tasks,
+            format_row=lambda task: f"{task.name} - {task.snippet}",
+            on_open=self.set_task, bg="#f0f0f0", font=("Arial", 11), height=3)
+        self.task_search_box.pack(pady=5, fill=tk.X)
+
         # Note Input Frame
         self.note_input_frame = tk.Frame(self.main_frame, bg="#ffffff", padx=10, pady=10)
         self.note_input_frame.pack(padx=10, pady=10, fill=tk.X)
@@ -38,10 +59,25 @@ class NotesApp:
         self.note_list_frame = tk.Frame(self.main_frame, bg="#f0f0f0", padx=10, pady=10)
         self.note_list_frame.pack(fill=tk.BOTH, expand=True)
 
-        tk.Label(self.note_list_frame, text="Notes", bg="#f0f0f0", font=("Arial", 14, "bold")).pack(anchor="w", padx=10)
-        self.note_listbox = tk.Listbox(self.note_list_frame, selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none", font=("Arial", 12), width=50, height=15)
+        self.note_list_header = tk.Frame(self.note_list_frame, bg="#f0f0f0")
+        self.note_list_header.pack(fill=tk.X, padx=10)
+        tk.Label(self.note_list_header, text="Notes", bg="#f0f0f0", font=("Arial", 14, "bold")).pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value=next(iter(SORT_ORDERS)))
+        self.sort_by = SORT_ORDERS[self.sort_var.get()]  # Read by fetch_notes on the executor thread
+        tk.OptionMenu(self.note_list_header, self.sort_var, *SORT_ORDERS, command=self.set_sort_order).pack(side=tk.RIGHT)
+
+        self.note_listbox = VirtualListbox(self.note_list_frame,
+            fetch_page=self.fetch_notes,
+            count=self.count_notes,
+            format_row=lambda note: f"{note.id} | {note.title}",  # Displaying id and title
+            selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none", font=("Arial", 12), width=50, height=15)
         self.note_listbox.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
-        self.note_listbox.bind("<Double-1>", self.show_note_details)
+        self.note_listbox.bind_rows("<Double-1>", self.show_note_details)
+
+        self.search_box = SearchBox(self.note_list_frame, search_notes,
+            format_row=lambda note: f"{note.id} | {note.title} - {note.snippet}",
+            on_open=self.show_note, bg="#f0f0f0", font=("Arial", 11), height=5)
+        self.search_box.pack(padx=10, pady=5, fill=tk.X)
 
         # Buttons
         self.button_frame = tk.Frame(self.main_frame, bg="#f0f0f0", padx=10, pady=5)
@@ -50,94 +86,114 @@ class NotesApp:
         tk.Button(self.button_frame, text="Edit Note", command=self.edit_note, bg="#2196F3", fg="white").pack(side=tk.LEFT, padx=7)
         tk.Button(self.button_frame, text="Delete Note", command=self.delete_note, bg="#F44336", fg="white").pack(side=tk.LEFT, padx=7)
 
+    def set_task(self, task_id):
+        if task_id is None:
+            self.show_task(None)
+            return
+        self.executor.submit(get_task_by_id, task_id, callback=self.show_task, key=(self, "task"), owner=self.root)
+
+    def show_task(self, task):
+        if task:
+            self.task_id = task.id
+            self.task_label.config(text=f"Task: {task.name}")
+        else:
+            self.task_id = None
+            self.task_label.config(text="Search for a task to see its notes")
+        self.reset_notes()
+
+    def on_changes(self, changes):
+        task_ids = changed_ids(changes, "tasks")
+        if task_ids is None or task_ids:
+            self.task_search_box.refresh()
+        if self.task_id is not None and (task_ids is None or self.task_id in task_ids):
+            self.executor.submit(get_task_by_id, self.task_id, callback=self.update_task_label,
+                                 key=(self, "task"), owner=self.root)
+        if any(change.table == "notes" for change in changes):
+            self.load_notes()
+
+    def update_task_label(self, task):
+        if task is None:
+            self.show_task(None)  # Deleted, and its notes with it
+        else:
+            self.task_label.config(text=f"Task: {task.name}")
+
+    def set_sort_order(self, label):
+        self.sort_by = SORT_ORDERS[label]
+        self.reset_notes()
+
+    def fetch_notes(self, offset, limit):
+        if self.task_id is None:
+            return []
+        return fetch_notes(self.task_id, self.sort_by, limit=limit, offset=offset)
+
+    def count_notes(self):
+        if self.task_id is None:
+            return 0
+        return count_notes(self.task_id)
+
     def add_note(self):
+        if self.task_id is None:
+            messagebox.showwarning("Select Task", "Please search for a task to add the note to")
+            return
         title = self.note_title_entry.get()
         content = self.note_content_entry.get("1.0", tk.END).strip()
         if not title or not content:
             messagebox.showwarning("Input Error", "Please fill in all fields")
             return
-        task_id = 1  # Example task_id, replace with actual task_id
-        save_notes(title, content, task_id)
-        self.load_notes()
-        self.clear_note_inputs()
+        self.executor.submit(save_notes, title, content, self.task_id,
+                             callback=lambda note_id: self.clear_note_inputs(), owner=self.root)
 
     def clear_note_inputs(self):
         self.note_title_entry.delete(0, tk.END)
         self.note_content_entry.delete("1.0", tk.END)
 
     def load_notes(self):
-        self.note_listbox.delete(0, tk.END)
-        task_id = 1  # Example task_id, replace with actual task_id
-        notes = fetch_notes(task_id)
-        for note in notes:
-            self.note_listbox.insert(tk.END, f"{note[0]} | {note[1]}")  # Displaying id and title
-
-    def show_note_details(self, event):
-        selected_index = self.note_listbox.curselection()
-        if not selected_index:
-            return
+        self.note_listbox.refresh_async(self.executor)
+        self.search_box.refresh()
 
-        index = selected_index[0]
-        note_string = self.note_listbox.get(index)
-        note_id = self.get_note_id_from_string(note_string)
+    def reset_notes(self):
+        self.note_listbox.reset_async(self.executor)
 
+    def show_note_details(self, event):
+        note_id = self.note_listbox.selected_id()
         if not note_id:
-            messagebox.showerror("Error", "Note details not found")
             return
+        self.show_note(note_id)
 
-        note = fetch_notes(note_id)  # This should be modified if `fetch_notes` does not return the note directly
-        if note:
-            note_details = f"Note Title: {note[0]}\nContent: {note[2]}"
-            messagebox.showinfo("Note Details", note_details)
-        else:
-            messagebox.showerror("Error", "Note details not found")
+    def with_note(self, note_id, func):
+        # Read the note in the background, then call func(note) on the Tk thread
+        self.executor.run_with_row(get_note_by_id, note_id, func, "Note details not found", owner=self.root)
 
-    def get_note_id_from_string(self, note_string):
-        parts = note_string.split(" | ")
-        if len(parts) > 0:
-            return int(parts[0])
-        return None
+    def show_note(self, note_id):
+        self.with_note(note_id, lambda note: messagebox.showinfo("Note Details",
+            f"Note Title: {note.title}\nContent: {note.content}"))
 
     def edit_note(self):
-        selected_index = self.note_listbox.curselection()
-        if not selected_index:
+        note_id = self.note_listbox.selected_id()
+        if not note_id:
             messagebox.showwarning("Select Note", "Please select a note to edit")
             return
 
-        note_string = self.note_listbox.get(selected_index)
-        note_id = self.get_note_id_from_string(note_string)
-
-        if not note_id:
-            messagebox.showerror("Error", "Note details not found")
-            return
+        self.with_note(note_id, self.ask_note_changes)
 
-        note = fetch_notes(note_id)  # This should be modified if `fetch_notes` does not return the note directly
-        if note:
-            new_title = simpledialog.askstring("Edit Note", "Enter new note title:", initialvalue=note[1])
-            new_content = simpledialog.askstring("Edit Note", "Enter new note content:", initialvalue=note[2])
-            if new_title and new_content:
-                update_note(note_id, new_content)
-                self.load_notes()
-            else:
-                messagebox.showwarning("Input Error", "Please fill in all fields")
+    def ask_note_changes(self, note):
+        new_title = simpledialog.askstring("Edit Note", "Enter new note title:", initialvalue=note.title)
+        new_content = simpledialog.askstring("Edit Note", "Enter new note content:", initialvalue=note.content)
+        if new_title and new_content:
+            self.executor.submit(update_note, note.id, new_content, new_title, owner=self.root)
+        else:
+            messagebox.showwarning("Input Error", "Please fill in all fields")
 
     def delete_note(self):
-        selected_index = self.note_listbox.curselection()
-        if not selected_index:
-            messagebox.showwarning("Select Note", "Please select a note to delete")
-            return
-
-        note_string = self.note_listbox.get(selected_index)
-        note_id = self.get_note_id_from_string(note_string)
-
+        note_id = self.note_listbox.selected_id()
         if not note_id:
-            messagebox.showerror("Error", "Note details not found")
+            messagebox.showwarning("Select Note", "Please select a note to delete")
             return
 
-        delete_notes(note_id)
-        self.load_notes()
+        self.executor.submit(delete_notes, note_id, owner=self.root)
 
 def main():
+    initialize_databases()
     root = tk.Tk()
     app = NotesApp(root)
     root.mainloop()
@@ -0,0 +1,61 @@
+import tkinter as tk
+from db_executor import get_executor
+from virtual_list import VirtualListbox
+
+class SearchBox(tk.Frame):
+    """A search entry with a list of full-text search results under it.
+
+    `search(text)` is one of the `search_*` functions of database.py; it runs
+    on the database executor a short while after the user stops typing, so
+    typing never waits on the database and only the last query is delivered.
+    Double-clicking a result calls `on_open(row_id)`.
+    """
+
+    def __init__(self, master, search, format_row, on_open, delay=200, bg="#f0f0f0", **listbox_options):
+        super().__init__(master, bg=bg)
+        self.search = search
+        self.on_open = on_open
+        self.delay = delay
+        self.pending = None
+        self.results = []
+        self.executor = get_executor(self)
+
+        tk.Label(self, text="Search:", bg=bg).pack(side=tk.TOP, anchor="w")
+        self.query = tk.StringVar()
+        self.entry = tk.Entry(self, textvariable=self.query)
+        self.entry.pack(side=tk.TOP, fill=tk.X)
+        self.result_list = VirtualListbox(self,
+            fetch_page=lambda offset, limit: self.results[offset:offset + limit],
+            count=lambda: len(self.results),
+            format_row=format_row,
+            **listbox_options)
+        self.result_list.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.result_list.bind_rows("<Double-1>", self.open_selected)
+        self.query.trace_add("write", self.schedule_search)
+
+    def schedule_search(self, *args):
+        if self.pending is not None:
+            self.after_cancel(self.pending)
+        self.pending = self.after(self.delay, self.run_search)
+
+    def run_search(self):
+        self.pending = None
+        text = self.query.get().strip()
+        if not text:
+            self.executor.cancel(self)
+            self.show_results([])
+            return
+        self.executor.submit(self.search, text, callback=self.show_results, key=self, owner=self)
+
+    def refresh(self):
+        """Run the current search again, e.g. after the searched rows changed."""
+        self.schedule_search()
+
+    def show_results(self, results):
+        self.results = results
+        self.result_list.reset()
+
+    def open_selected(self, event):
+        row_id = self.result_list.selected_id()
+        if row_id is not None:
+            self.on_open(row_id)
@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import builtins
+import datetime
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import database
+from models import MODELS
+
+# A Unix socket next to the database files where available, localhost TCP otherwise
+DEFAULT_ADDRESS = 'initiatives.sock' if hasattr(socket, 'AF_UNIX') else '127.0.0.1:8765'
+
+# Largest request line the service accepts, e.g. a bulk insert
+MAX_MESSAGE = 64 * 1024 * 1024
+
+# Requests and responses are JSON objects, one per line:
+#   {"id": 1, "op": "get_tasks", "args": [0], "kwargs": {}}
+#   {"id": 1, "result": [[1, "Task", "High", "2024-08-07"]], "shape": "rows"}
+#   {"id": 2, "error": "Invalid date", "type": "ValueError"}
+# "shape" tells the client how to rebuild tuples: "rows" is a list of rows,
+# "row" a single row and "value" anything else. "model" names the row class
+# of models.py the rows are rebuilt as.
+
+def parse_address(address):
+    """Return ('host', port) for 'host:port' addresses and the path otherwise."""
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+def encode_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    try:
+        return list(value)  # Generators, ranges and sets of arguments
+    except TypeError:
+        raise TypeError(f"{type(value).__name__} cannot be sent to the service") from None
+
+def encode_result(result):
+    if isinstance(result, list):
+        response = {'result': result, 'shape': 'rows'}
+        row = result[0] if result else None
+    elif isinstance(result, tuple):
+        response = {'result': list(result), 'shape': 'row'}
+        row = result
+    else:
+        return {'result': result, 'shape': 'value'}
+    if type(row).__name__ in MODELS:
+        response['model'] = type(row).__name__
+    return response
+
+def decode_result(response):
+    result = response.get('result')
+    model = MODELS.get(response.get('model'))
+    make_row = model._make if model else tuple
+    if response.get('shape') == 'rows':
+        return [make_row(row) if isinstance(row, list) else row for row in result]
+    if response.get('shape') == 'row':
+        return make_row(result)
+    return result
+
+def error_type(error):
+    error_class = type(error)
+    if error_class.__module__ == 'builtins':
+        return error_class.__name__
+    return f'{error_class.__module__}.{error_class.__name__}'
+
+def decode_error(response):
+    """Rebuild the exception raised by the service, so callers can catch ValueError etc."""
+    module, _, name = response.get('type', '').rpartition('.')
+    namespace = {'': builtins, 'sqlite3': sqlite3}.get(module)
+    error_class = getattr(namespace, name, None) if namespace else None
+    if not (isinstance(error_class, type) and issubclass(error_class, Exception)):
+        error_class = ServiceError
+    return error_class(response.get('error'))
+
+class ServiceError(RuntimeError):
+    """An error raised by the service that has no matching local exception type."""
+
+class DatabaseService:
+    """Run database.py operations for the clients of one local socket.
+
+    Writes run one at a time on a single writer thread, in the order they
+    arrive, so clients never contend for the write lock. Reads run on a
+    small thread pool, and identical reads that arrive while one is still
+    running share its result. A read only joins one that started after the
+    last completed write, so clients always see their own writes.
+    """
+
+    def __init__(self, read_workers=4):
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='service-writer')
+        self.readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix='service-reader')
+        self.inflight = {}
+        self.write_generation = 0
+        self.stats = {'requests': 0, 'reads': 0, 'shared_reads': 0, 'writes': 0, 'errors': 0}
+
+    async def call(self, op, args, kwargs):
+        loop = asyncio.get_running_loop()
+        if op == 'ping':
+            return 'pong'
+        if op == 'service_stats':
+            return dict(self.stats)
+        if op in database.WRITE_OPERATIONS:
+            self.stats['writes'] += 1
+            func = getattr(database, op)
+            try:
+                return await loop.run_in_executor(self.writer, lambda: func(*args, **kwargs))
+            finally:
+                self.write_generation += 1
+        if op not in database.READ_OPERATIONS:
+            raise ValueError(f"Unknown operation: {op}")
+        self.stats['reads'] += 1
+        key = json.dumps([self.write_generation, op, args, kwargs], sort_keys=True)
+        future = self.inflight.get(key)
+        if future is None:
+            func = getattr(database, op)
+            future = loop.run_in_executor(self.readers, lambda: func(*args, **kwargs))
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.stats['shared_reads'] += 1
+        return await asyncio.shield(future)
+
+    async def handle(self, reader, writer):
+        # Requests of one client may be pipelined; each is answered when done
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self.respond(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            print(f"An error occurred: {e}")
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+    async def respond(self, line, writer):
+        self.stats['requests'] += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            result = await self.call(request['op'], request.get('args', []), request.get('kwargs', {}))
+            response = {'id': request_id, **encode_result(result)}
+        except Exception as e:
+            self.stats['errors'] += 1
+            response = {'id': request_id, 'error': str(e), 'type': error_type(e)}
+        writer.write(json.dumps(response, default=str).encode() + b'\n')
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    def shutdown(self):
+        self.readers.shutdown()
+        self.writer.shutdown()
+
+async def serve(address=DEFAULT_ADDRESS, read_workers=4):
+    """Serve the database operations at `address` until cancelled."""
+    service = DatabaseService(read_workers)
+    target = parse_address(address)
+    if isinstance(target, tuple):
+        server = await asyncio.start_server(service.handle, *target, limit=MAX_MESSAGE)
+    else:
+        if os.path.exists(target):
+            if service_running(address):
+                raise RuntimeError(f"A service is already running at {address}")
+            os.remove(target)  # Left behind by a service that did not shut down cleanly
+        server = await asyncio.start_unix_server(service.handle, target, limit=MAX_MESSAGE)
+    print(f"Serving the Initiatives databases at {address}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+        if not isinstance(target, tuple) and os.path.exists(target):
+            os.remove(target)
+
+class ServiceClient:
+    """A blocking client of DatabaseService; each thread gets its own connection."""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=30):
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = []
+
+    def connect(self):
+        if isinstance(self.address, tuple):
+            sock = socket.create_connection(self.address, self.timeout)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+        connection = (sock, sock.makefile('rb'))
+        with self._lock:
+            self._open.append(connection)
+        return connection
+
+    def call(self, op, args=(), kwargs=None):
+        """Run `op` on the service and return its result, raising its error."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self.connect()
+        sock, responses = connection
+        request = {'id': next(self.ids), 'op': op, 'args': args, 'kwargs': kwargs or {}}
+        try:
+            sock.sendall(json.dumps(request, default=encode_value).encode() + b'\n')
+            line = responses.readline()
+        except OSError:
+            self._local.connection = None
+            raise
+        if not line:
+            self._local.connection = None
+            raise ConnectionError("The database service closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise decode_error(response)
+        return decode_result(response)
+
+    def close(self):
+        with self._lock:
+            connections, self._open = self._open, []
+        for sock, responses in connections:
+            responses.close()
+            sock.close()
+        self._local = threading.local()
+
+def service_running(address=DEFAULT_ADDRESS):
+    """Return True if a service answers at `address`."""
+    client = ServiceClient(address, timeout=2)
+    try:
+        return client.call('ping') == 'pong'
+    except (OSError, ValueError):
+        return False
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Initiatives databases to local clients.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help=f"Unix socket path or host:port to listen on (default: {DEFAULT_ADDRESS})")
+    parser.add_argument("--read-workers", type=int, default=4, help="threads running reads (default 4)")
+    args = parser.parse_args()
+
+    database.use_service(None)  # The service itself always works on the files
+    database.initialize_databases()
+    try:
+        asyncio.run(serve(args.address, args.read_workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import os
+import shutil
+import sys
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import database
+
+# The database files of the repository, in the layout of the first versions
+# (schema version 0), used to test the migrations
+OLD_DATABASE_FILES = ('tasks.db', 'notes.db', 'expenses.db', 'goals.db', 'journal.db')
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in an empty directory, so the database files are its own."""
+    monkeypatch.chdir(tmp_path)
+    database.use_separate_storage()
+    database.forget_migrations()
+    yield tmp_path
+    database.use_group_commit(None)
+    database.write_queue.shutdown()
+    database.close_connections()
+    database.forget_migrations()
+    database.query_cache.clear()
+
+@pytest.fixture
+def databases(workdir):
+    """Create the service databases at the latest schema version."""
+    database.initialize_databases()
+    return workdir
+
+@pytest.fixture
+def old_databases(workdir):
+    """Copy the schema version 0 database files of the repository into the test directory."""
+    for name in OLD_DATABASE_FILES:
+        shutil.copy(os.path.join(REPO_DIR, name), workdir)
+    return workdir
+
+@pytest.fixture
+def tk_root():
+    """A hidden Tk root window; tests using it are skipped without a display."""
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"No display: {e}")
+    root.withdraw()
+    yield root
+    root.destroy()
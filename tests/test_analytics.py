@@ -0,0 +1,87 @@
+import math
+import pytest
+import analytics
+import database
+
+@pytest.fixture
+def np():
+    return pytest.importorskip("numpy")
+
+@pytest.fixture
+def expenses(databases):
+    database.add_expenses([
+        ('Salary', 2000.0, 'credit', '2023-11-01'),
+        ('Rent', 800.0, 'debit', '2023-11-02'),
+        ('Salary', 2000.0, 'credit', '2024-01-01'),
+        (' Rent', 800.0, 'debit', '2024-01-02'),
+        ('Coffee', 3.5, 'debit', '2024-01-03'),
+        ('Transfer', 100.0, 'other', '2024-01-04'),
+        ('Bonus', 500.0, 'credit', '2024-02-15'),
+    ])
+
+def test_expense_columns_are_read_in_date_order(expenses):
+    dates, amounts, types, descriptions = database.get_expense_columns('01/01/2024', '2024-01-31')
+    assert dates == ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04']
+    assert amounts == [2000.0, 800.0, 3.5, 100.0]
+    assert types == ['credit', 'debit', 'debit', 'other']
+    assert descriptions[1] == ' Rent'
+    assert database.get_expense_columns(start='2025-01-01') == ([], [], [], [])
+
+def test_monthly_pivot_fills_the_months_without_expenses(expenses, np):
+    months = analytics.monthly_pivot(analytics.load_expenses())
+    assert [str(month) for month in months.periods] == ['2023-11', '2023-12', '2024-01', '2024-02']
+    assert months.credits.tolist() == [2000.0, 0.0, 2000.0, 500.0]
+    assert months.debits.tolist() == [800.0, 0.0, 803.5, 0.0]
+    assert months.savings.tolist() == [1200.0, 0.0, 1196.5, 500.0]
+
+def test_pivots_match_the_rollups(expenses, np):
+    data = analytics.load_expenses()
+    months = analytics.monthly_pivot(data)
+    for month, credits, debits, savings in zip(*months):
+        year, number = int(str(month)[:4]), int(str(month)[5:])
+        assert database.get_monthly_summary(number, year) == pytest.approx((credits, debits, savings))
+    years = analytics.yearly_pivot(data)
+    assert [str(year) for year in years.periods] == ['2023', '2024']
+    assert years.savings.tolist() == [1200.0, 1696.5]
+
+def test_running_balance_and_moving_average(expenses, np):
+    dates, balance = analytics.running_balance(analytics.load_expenses('2024-01-01'))
+    assert balance.tolist() == [2000.0, 1200.0, 1196.5, 1196.5, 1696.5]
+    averages = analytics.moving_average([1.0, 2.0, 3.0, 4.0], window=2)
+    assert math.isnan(averages[0])
+    assert averages[1:].tolist() == [1.5, 2.5, 3.5]
+    assert all(math.isnan(value) for value in analytics.moving_average([1.0], window=3))
+    with pytest.raises(ValueError):
+        analytics.moving_average([1.0], window=0)
+
+def test_top_descriptions(expenses, np):
+    data = analytics.load_expenses()
+    assert analytics.top_descriptions(data, 2) == [('Rent', 1600.0, 2), ('Coffee', 3.5, 1)]
+    assert analytics.top_descriptions(data, 5, 'credit') == [('Salary', 4000.0, 2), ('Bonus', 500.0, 1)]
+
+def test_report(expenses, np):
+    report = analytics.expense_report(window=2, top=3)
+    assert report.count == 7
+    assert report.balance.tolist() == [1200.0, 1200.0, 2396.5, 2896.5]
+    text = analytics.format_report(report)
+    assert '7 expenses from 2023-11 to 2024-02' in text
+    assert 'Top debits' in text
+
+def test_empty_report(databases, np):
+    report = analytics.expense_report()
+    assert report.count == 0
+    assert analytics.format_report(report) == "No expenses in this period."
+
+def test_numpy_is_required(databases, monkeypatch):
+    monkeypatch.setattr(analytics, 'np', None)
+    with pytest.raises(RuntimeError):
+        analytics.load_expenses()
+
+def test_expenses_without_an_iso_date_are_left_out(expenses, np):
+    rows = [('Undated', 5.0, 'debit', None), ('Old format', 7.0, 'debit', '07/08/2024')]
+    database.run_transaction(database.EXPENSES_DB_PATH, lambda conn: conn.executemany(
+        'INSERT INTO expenses (description, amount, type, date) VALUES (?, ?, ?, ?)', rows))
+    assert len(database.get_expense_columns()[0]) == 7
+    report = analytics.expense_report()
+    assert report.count == 7
+    assert report.balance.tolist() == [1200.0, 1200.0, 2396.5, 2896.5]
@@ -0,0 +1,123 @@
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import pytest
+import backup
+import database
+import events
+from events import Change
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def goals():
+    return [goal.goal for goal in database.get_goals()]
+
+def test_snapshot_holds_every_file(databases, workdir):
+    database.add_goal('Run', 'far')
+    name = backup.create_snapshot()
+    assert backup.list_snapshots() == [name]
+    files = sorted(os.listdir(workdir / 'backups' / name))
+    assert files == ['expenses.db', 'goals.db', 'journal.db', 'notes.db', 'tasks.db']
+    conn = sqlite3.connect(workdir / 'backups' / name / 'goals.db')
+    try:
+        assert conn.execute('SELECT goal FROM goals').fetchall() == [('Run',)]
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    finally:
+        conn.close()
+
+def test_snapshot_includes_the_open_group(databases):
+    database.use_group_commit(delay_ms=10000)
+    database.add_goal('Run', 'far')
+    name = backup.create_snapshot()
+    database.delete_goal(1)
+    backup.restore_snapshot(name)
+    assert goals() == ['Run']
+
+def test_oldest_snapshots_are_pruned(databases, workdir):
+    names = [backup.create_snapshot(keep=2) for _ in range(3)]
+    assert backup.list_snapshots() == names[1:]
+    os.makedirs(workdir / 'backups' / 'torn.partial')
+    assert backup.list_snapshots() == names[1:]
+    assert backup.prune_snapshots(keep=1) == [names[1]]
+    assert backup.list_snapshots() == names[2:]
+
+def test_snapshot_on_a_thread(databases):
+    name = backup.start_snapshot().result(timeout=10)
+    assert backup.list_snapshots() == [name]
+
+def test_restore_brings_the_data_back(databases):
+    database.add_goal('Run', 'far')
+    name = backup.create_snapshot()
+    database.add_goal('Swim', 'far')
+    database.add_task('Read', 'Preference', '2024-08-01')
+    changes = []
+    unsubscribe = events.subscribe(changes.append)
+    try:
+        saved = backup.restore_snapshot(name)
+    finally:
+        unsubscribe()
+    assert goals() == ['Run']
+    assert database.get_tasks(0) == []
+    assert Change('goals', 'update', None) in changes and Change('tasks', 'update', None) in changes
+    assert backup.list_snapshots() == sorted([name, saved])
+    backup.restore_snapshot(saved)
+    assert goals() == ['Run', 'Swim']
+
+def test_old_schema_snapshot_is_migrated(databases, workdir):
+    snapshot = workdir / 'backups' / '20240801-000000'
+    os.makedirs(snapshot)
+    for file_name in backup.database_files():
+        shutil.copy(os.path.join(REPO_DIR, file_name), snapshot)
+    backup.restore_snapshot(snapshot.name)
+    for path in backup.database_files().values():
+        conn = sqlite3.connect(path)
+        try:
+            assert conn.execute('PRAGMA user_version').fetchone()[0] == database.schema_version()
+        finally:
+            conn.close()
+    tasks = database.fetch_query(database.TASKS_DB_PATH, 'SELECT deadline FROM tasks')
+    assert len(tasks) == 6
+    assert all(re.fullmatch(r'\d{4}-\d{2}-\d{2}', deadline) for deadline, in tasks)
+    assert [task.id for task in database.search_tasks('modules')] == [1, 3]
+
+def test_mismatched_snapshot_is_refused(databases, workdir):
+    name = backup.create_snapshot()
+    os.remove(workdir / 'backups' / name / 'journal.db')
+    with pytest.raises(ValueError):
+        backup.restore_snapshot(name)
+    with pytest.raises(ValueError):
+        backup.restore_snapshot('19990101-000000')
+    assert backup.list_snapshots() == [name]
+
+def test_failed_restore_puts_the_data_back(databases, monkeypatch):
+    database.add_goal('Run', 'far')
+    name = backup.create_snapshot()
+    database.add_goal('Swim', 'far')
+    restore_files = backup._restore_files
+
+    def fail_halfway(snapshot, files):
+        if os.path.basename(snapshot) == name:
+            restore_files(snapshot, {'goals.db': files['goals.db']})
+            raise OSError('disk full')
+        restore_files(snapshot, files)
+
+    monkeypatch.setattr(backup, '_restore_files', fail_halfway)
+    with pytest.raises(OSError):
+        backup.restore_snapshot(name)
+    assert goals() == ['Run', 'Swim']
+
+def test_cli(databases, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['backup.py', 'create', '--keep', '1'])
+    backup.main()
+    name = backup.list_snapshots()[0]
+    assert name in capsys.readouterr().out
+    monkeypatch.setattr(sys, 'argv', ['backup.py', 'list'])
+    backup.main()
+    assert capsys.readouterr().out.split() == [name]
+    monkeypatch.setattr(sys, 'argv', ['backup.py', 'restore', 'missing'])
+    with pytest.raises(SystemExit) as exit_info:
+        backup.main()
+    assert exit_info.value.code == 1
+    assert 'An error occurred' in capsys.readouterr().err
@@ -0,0 +1,54 @@
+import os
+import random
+import benchmark
+import database
+
+SIZES = {'tasks': 20, 'notes': 10, 'journal': 10, 'goals': 6, 'expenses': 50}
+
+def test_generators_are_reproducible():
+    def generate(seed):
+        rng = random.Random(seed)
+        return (list(benchmark.generate_tasks(rng, 5)), list(benchmark.generate_notes(rng, 5, 5)),
+                list(benchmark.generate_journal_entries(rng, 5)), list(benchmark.generate_goals(rng, 5)),
+                list(benchmark.generate_expenses(rng, 5)))
+
+    assert generate(1) == generate(1)
+    assert generate(1) != generate(2)
+
+def test_batched():
+    assert list(benchmark.batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(benchmark.batched([], 2)) == []
+
+def test_build_databases_fills_every_table(workdir):
+    benchmark.build_databases(SIZES, seed=1)
+    assert len(database.get_tasks(0)) + len(database.get_completed_tasks()) + len(database.get_missed_tasks()) == 20
+    assert database.fetch_one(database.NOTES_DB_PATH, 'SELECT COUNT(*) FROM notes')[0] == 10
+    assert database.count_journal_entries() == 10
+    assert database.count_goals() == 6
+    assert database.count_goals(1) == 2  # Every third goal is completed
+    assert database.fetch_one(database.EXPENSES_DB_PATH, 'SELECT SUM(entries) FROM expense_rollups')[0] == 50
+
+def test_prepared_data_is_reused(workdir):
+    data_dir = str(workdir / 'data')
+    benchmark.prepare_data(data_dir, SIZES, 1, unified=False)
+    modified = os.path.getmtime(os.path.join(data_dir, 'tasks.db'))
+    benchmark.prepare_data(data_dir, SIZES, 1, unified=False)
+    assert os.path.getmtime(os.path.join(data_dir, 'tasks.db')) == modified
+    benchmark.prepare_data(data_dir, SIZES, 1, unified=True)
+    assert os.path.exists(os.path.join(data_dir, 'initiatives.db'))
+
+def test_every_case_runs_on_a_small_data_set(workdir):
+    data_dir, work_dir = str(workdir / 'data'), str(workdir / 'work')
+    os.mkdir(work_dir)
+    benchmark.prepare_data(data_dir, SIZES, 1, unified=False)
+    benchmark.use_copy_of(data_dir, work_dir, unified=False)
+    results, skipped = benchmark.run_benchmarks(SIZES, 1, repeat=1)
+    assert [name for name, result in results.items() if 'error' in result] == []
+    assert set(results) >= {'get_tasks', 'get_task_by_id', 'search_notes', 'add_expenses'}
+    assert all(result['runs'] >= 1 for result in results.values())
+
+def test_compare_reports_regressions(capsys):
+    baseline = {'results': {'fast': {'median_ms': 0.1}, 'slow': {'median_ms': 10.0}, 'same': {'median_ms': 5.0}}}
+    results = {'fast': {'median_ms': 0.5}, 'slow': {'median_ms': 20.0}, 'same': {'median_ms': 5.5},
+               'new': {'median_ms': 1.0}}
+    assert benchmark.compare(results, baseline, threshold=0.2, min_ms=1.0) == ['slow']
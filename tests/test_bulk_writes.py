@@ -0,0 +1,62 @@
+import sqlite3
+import pytest
+import database
+
+def test_add_tasks_inserts_every_row_in_one_call(databases):
+    count = database.add_tasks([
+        ('Write report', 'Supremacy', '07/08/2024', 'draft first', 0),
+        ('Read book', 'Preference', '2024-08-01', '', 1),
+        ('Call bank', 'Antecedence', '05/08/2024', '', 0),
+    ])
+    assert count == 3
+    assert sorted(task.name for task in database.get_tasks(0)) == ['Call bank', 'Write report']
+    assert [task.name for task in database.get_completed_tasks()] == ['Read book']
+
+def test_update_and_delete_tasks_by_ids(databases):
+    database.add_tasks([(f'Task {i}', 'Preference', '2024-08-01', '', 0) for i in range(5)])
+    assert database.update_tasks_status([1, 2], 1) == 2
+    assert [task.id for task in database.get_completed_tasks()] == [1, 2]
+    assert database.delete_tasks([2, 3]) == 2
+    assert [task.id for task in database.get_tasks(0)] == [4, 5]
+    assert [task.id for task in database.get_completed_tasks()] == [1]
+
+def test_add_and_delete_notes(databases):
+    database.add_notes([('A', 'note of one', 1), ('B', 'note of two', 2), ('C', 'another of two', 2)])
+    assert [note.title for note in database.fetch_notes(2)] == ['B', 'C']
+    assert database.delete_notes_by_task(2) == 2
+    assert database.fetch_notes(2) == []
+    assert database.delete_notes_by_ids([1]) == 1
+    assert database.fetch_notes(1) == []
+
+def test_delete_tasks_deletes_their_notes(databases):
+    database.add_tasks([('One', 'Preference', '2024-08-01', '', 0), ('Two', 'Preference', '2024-08-02', '', 0)])
+    database.add_notes([('A', 'note of one', 1), ('B', 'note of two', 2), ('C', 'another of two', 2)])
+    database.delete_tasks([2])
+    assert database.count_notes(1) == 1
+    assert database.count_notes(2) == 0
+
+def test_generators_are_accepted(databases):
+    database.add_goals((f'Goal {i}', 'details', None) for i in range(3))
+    database.update_goals_status((goal_id for goal_id in (1, 3)), 1)
+    assert [goal.id for goal in database.get_completed_goals()] == [1, 3]
+    database.delete_goals(iter([1, 2]))
+    assert [goal.id for goal in database.get_goals()] == [3]
+
+def test_add_and_delete_expenses(databases):
+    database.add_expenses([
+        ('Salary', 2000.0, 'credit', '01/03/2024'),
+        ('Rent', 800.0, 'debit', '2024-03-02'),
+        ('Coffee', 3.5, 'debit', '2024-04-10'),
+    ])
+    march = database.get_expenses(3, 2024)
+    assert [expense.description for expense in march] == ['Salary', 'Rent']
+    assert march[0].date == '2024-03-01'
+    database.delete_expenses([expense.id for expense in march])
+    assert database.get_expenses(3, 2024) == []
+    assert database.get_expenses_total(4, 2024) == 3.5
+
+def test_failed_bulk_insert_writes_nothing(databases):
+    database.add_tasks([('Kept', 'Preference', '2024-08-01', '', 0)])
+    with pytest.raises(sqlite3.IntegrityError):
+        database.add_tasks([('Good', 'Preference', '2024-08-01', '', 0), (None, 'Preference', '2024-08-02', '', 0)])
+    assert [task.name for task in database.get_tasks(0)] == ['Kept']
@@ -0,0 +1,57 @@
+import sqlite3
+import threading
+import pytest
+from database import ConnectionManager
+
+@pytest.fixture
+def manager():
+    manager = ConnectionManager()
+    yield manager
+    manager.close_all()
+
+def test_connections_are_reused_per_thread_and_file(manager, tmp_path):
+    path, other_path = str(tmp_path / 'one.db'), str(tmp_path / 'two.db')
+    conn = manager.get(path)
+    assert manager.get(path) is conn
+    assert manager.get(other_path) is not conn
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(manager.get(path)))
+    thread.start()
+    thread.join()
+    assert connections[0] is not conn
+
+def test_pragmas_are_applied(manager, tmp_path):
+    conn = manager.get(str(tmp_path / 'one.db'))
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    assert conn.execute('PRAGMA cache_size').fetchone()[0] == -8000
+    assert conn.execute('PRAGMA temp_store').fetchone()[0] == 2  # MEMORY
+
+def test_close_all_leaves_other_threads_connections_to_them(manager, tmp_path):
+    path = str(tmp_path / 'one.db')
+    opened, closed_all = threading.Event(), threading.Event()
+    results = []
+
+    def use_connection():
+        conn = manager.get(path)
+        opened.set()
+        closed_all.wait(5)
+        results.append(conn.execute('SELECT 1').fetchone()[0])  # Still open: this thread may be using it
+        new_conn = manager.get(path)
+        results.append(new_conn is not conn)
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+        results.append(new_conn.execute('SELECT 1').fetchone()[0])
+        manager.close_thread()
+
+    thread = threading.Thread(target=use_connection)
+    thread.start()
+    opened.wait(5)
+    conn = manager.get(path)
+    manager.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+    closed_all.set()
+    thread.join()
+    assert results == [1, True, 1]
+    assert manager.get(path) is not conn
@@ -0,0 +1,143 @@
+import queue
+import sqlite3
+import threading
+import pytest
+import database
+import db_executor
+from db_executor import DatabaseExecutor
+
+class RootStub:
+    """Stands in for the Tk root: `after` calls are run when the test says so."""
+
+    def __init__(self):
+        self.scheduled = queue.SimpleQueue()
+        self.reported = []
+
+    def after(self, ms, func, *args):
+        self.scheduled.put((func, args))
+
+    def run_next(self, timeout=5):
+        func, args = self.scheduled.get(timeout=timeout)
+        func(*args)
+
+    def report_callback_exception(self, error_type, error, traceback):
+        self.reported.append(error)
+
+class OwnerStub:
+    def __init__(self):
+        self.exists = True
+
+    def winfo_exists(self):
+        return self.exists
+
+@pytest.fixture
+def root():
+    return RootStub()
+
+@pytest.fixture
+def executor(root):
+    executor = DatabaseExecutor(root)
+    yield executor
+    executor.shutdown()
+    executor.worker.join()
+
+def drain(root, executor):
+    """Run the polls until every request was delivered, as the Tk mainloop would."""
+    while executor.pending:
+        root.run_next()
+
+def test_work_runs_on_the_worker_and_results_arrive_on_poll(root, executor, databases):
+    results = []
+    task_id = database.add_task('Read', 'Preference', '2024-08-01')
+    executor.submit(lambda: (threading.current_thread().name, database.get_task_by_id(task_id)),
+                    callback=results.append)
+    assert results == []
+    drain(root, executor)
+    thread_name, task = results[0]
+    assert thread_name == 'database-executor'
+    assert task.name == 'Read'
+
+def test_results_are_delivered_in_submission_order(root, executor):
+    results = []
+    for number in range(20):
+        executor.submit(lambda number=number: number, callback=results.append)
+    drain(root, executor)
+    assert results == list(range(20))
+
+def test_newer_request_with_the_same_key_supersedes_the_older(root, executor):
+    started, release = threading.Event(), threading.Event()
+    ran, results = [], []
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    executor.submit(block)
+    started.wait(5)
+    executor.submit(lambda: ran.append('old') or 'old', callback=results.append, key='load')
+    executor.submit(lambda: ran.append('new') or 'new', callback=results.append, key='load')
+    release.set()
+    drain(root, executor)
+    assert ran == ['new']
+    assert results == ['new']
+    assert executor.latest == {}
+
+def test_cancel_drops_the_result(root, executor):
+    results = []
+    executor.submit(lambda: 1, callback=results.append, key='count')
+    executor.cancel('count')
+    drain(root, executor)
+    assert results == []
+
+def test_results_for_destroyed_owners_are_dropped(root, executor):
+    owner, results = OwnerStub(), []
+    executor.submit(lambda: 1, callback=results.append, owner=owner)
+    owner.exists = False
+    drain(root, executor)
+    assert results == []
+
+def test_errors_go_to_the_error_callback(root, executor):
+    errors = []
+    executor.submit(database.to_iso_date, 'not a date', callback=errors.append, error_callback=errors.append)
+    drain(root, executor)
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+
+def test_database_errors_without_error_callback_are_reported(root, executor, databases):
+    executor.submit(database.fetch_query, database.TASKS_DB_PATH, 'SELECT * FROM missing_table')
+    drain(root, executor)
+    assert len(root.reported) == 1 and isinstance(root.reported[0], sqlite3.OperationalError)
+
+def test_call_soon_from_another_thread_wakes_the_poll(root, executor):
+    calls = []
+    thread = threading.Thread(target=executor.call_soon, args=(lambda: calls.append(threading.get_ident()),))
+    thread.start()
+    thread.join()
+    assert calls == []
+    root.run_next()
+    assert calls == [threading.get_ident()]
+    assert not executor.polling
+
+def test_call_soon_on_the_tk_thread_runs_right_away(root, executor):
+    calls = []
+    executor.call_soon(lambda: calls.append(1))
+    assert calls == [1]
+
+def test_run_with_row_calls_back_with_the_row_or_shows_an_error(root, executor, databases, monkeypatch):
+    shown, results = [], []
+    monkeypatch.setattr(db_executor.messagebox, 'showerror', lambda title, message: shown.append(message))
+    task_id = database.add_task('Read', 'Preference', '2024-08-01')
+    executor.run_with_row(database.get_task_by_id, task_id, results.append, "Task not found")
+    executor.run_with_row(database.get_task_by_id, task_id + 1, results.append, "Task not found")
+    drain(root, executor)
+    assert [task.name for task in results] == ['Read']
+    assert shown == ["Task not found"]
+
+def test_date_errors_are_shown_and_other_errors_reported(root, executor, databases, monkeypatch):
+    shown = []
+    monkeypatch.setattr(db_executor.messagebox, 'showerror', lambda title, message: shown.append(title))
+    executor.submit(database.add_task, 'Read', 'Preference', '31/02/2024', error_callback=executor.show_date_error)
+    executor.submit(database.fetch_query, database.TASKS_DB_PATH, 'SELECT * FROM missing_table',
+                    error_callback=executor.show_date_error)
+    drain(root, executor)
+    assert shown == ["Input Error"]
+    assert len(root.reported) == 1 and isinstance(root.reported[0], sqlite3.OperationalError)
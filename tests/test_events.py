@@ -0,0 +1,125 @@
+import queue
+import threading
+import pytest
+import database
+import events
+from db_executor import ChangeListener, DatabaseExecutor
+from events import Change
+
+def test_merge_changes_keeps_one_change_per_table_and_op():
+    merged = events.merge_changes([Change('tasks', 'update', (1, 2)), Change('tasks', 'insert', (3,)),
+                                   Change('tasks', 'update', (2, 4)), Change('goals', 'delete', None),
+                                   Change('goals', 'delete', (5,))])
+    assert merged == [Change('tasks', 'update', (1, 2, 4)), Change('tasks', 'insert', (3,)),
+                      Change('goals', 'delete', None)]
+
+def test_changed_ids():
+    changes = [Change('tasks', 'update', (1,)), Change('tasks', 'delete', (2,)), Change('goals', 'insert', None)]
+    assert events.changed_ids(changes, 'tasks') == {1, 2}
+    assert events.changed_ids(changes, 'tasks', ('delete',)) == {2}
+    assert events.changed_ids(changes, 'goals') is None
+    assert events.changed_ids(changes, 'notes') == set()
+
+def test_subscribers_get_the_changes_of_their_tables(capsys):
+    bus, every, tasks = events.ChangeBus(), [], []
+
+    def fail(change):
+        raise RuntimeError('broken subscriber')
+
+    bus.subscribe(every.append)
+    bus.subscribe(fail)
+    unsubscribe = bus.subscribe(tasks.append, ('tasks',))
+    bus.publish(Change('goals', 'insert', (1,)))
+    bus.publish(Change('tasks', 'delete', (2,)))
+    unsubscribe()
+    bus.publish(Change('tasks', 'delete', (3,)))
+    assert every == [Change('goals', 'insert', (1,)), Change('tasks', 'delete', (2,)), Change('tasks', 'delete', (3,))]
+    assert tasks == [Change('tasks', 'delete', (2,))]
+    assert 'broken subscriber' in capsys.readouterr().out
+
+def test_writes_publish_their_changes(databases):
+    changes = []
+    unsubscribe = events.subscribe(changes.append)
+    try:
+        task_id = database.add_task('Read', 'Preference', '2024-08-01')
+        database.update_tasks_status(iter([task_id]), 1)
+        database.add_goals([('Run', '', None)])
+        database.delete_task(task_id)
+        with pytest.raises(ValueError):
+            database.add_task('Bad', 'Preference', '2024-02-31')
+    finally:
+        unsubscribe()
+    assert changes == [Change('tasks', 'insert', (task_id,)), Change('tasks', 'update', (task_id,)),
+                       Change('goals', 'insert', None), Change('notes', 'delete', None),
+                       Change('tasks', 'delete', (task_id,))]
+
+class RootStub:
+    """Stands in for the Tk root: `after` calls are run when the test says so."""
+
+    def __init__(self):
+        self.scheduled = queue.SimpleQueue()
+
+    def after(self, ms, func, *args):
+        self.scheduled.put((func, args))
+
+    def run_next(self, timeout=5):
+        func, args = self.scheduled.get(timeout=timeout)
+        func(*args)
+
+class WidgetStub:
+    """Stands in for a window of the root; only `bind` and `after` are used."""
+
+    def __init__(self, root):
+        self.root = root
+        self.bindings = {}
+        self.exists = True
+
+    def _root(self):
+        return self.root
+
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+
+    def after(self, ms, func, *args):
+        self.root.after(ms, func, *args)
+
+    def winfo_exists(self):
+        return self.exists
+
+    def destroy(self):
+        self.exists = False
+        self.bindings['<Destroy>'](type('Event', (), {'widget': self})())
+
+    def __str__(self):
+        return '.window'
+
+@pytest.fixture
+def root():
+    root = RootStub()
+    root.database_executor = DatabaseExecutor(root)
+    yield root
+    root.database_executor.shutdown()
+    root.database_executor.worker.join()
+
+def test_listener_delivers_a_burst_of_writes_at_once(root, databases):
+    widget, deliveries = WidgetStub(root), []
+    ChangeListener(widget, deliveries.append, ('goals',))
+    thread = threading.Thread(target=database.add_goal, args=('Swim', ''))
+    thread.start()
+    thread.join()
+    database.add_goal('Run', '')
+    database.add_task('Read', 'Preference', '2024-08-01')
+    database.update_goal_status(1, 1)
+    root.run_next()  # The poll bringing the change made on the other thread
+    assert deliveries == []
+    root.run_next()  # The flush
+    assert deliveries == [[Change('goals', 'insert', (2, 1)), Change('goals', 'update', (1,))]]
+    assert root.scheduled.empty()
+
+def test_listener_stops_when_its_widget_is_destroyed(root, databases):
+    widget, deliveries = WidgetStub(root), []
+    listener = ChangeListener(widget, deliveries.append, ('goals',))
+    widget.destroy()
+    database.add_goal('Run', '')
+    assert listener.changes == []
+    assert root.scheduled.empty()
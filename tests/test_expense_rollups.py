@@ -0,0 +1,62 @@
+import sqlite3
+import database
+
+def rollups():
+    return database.fetch_query(database.EXPENSES_DB_PATH,
+                                'SELECT year, month, type, total, entries FROM expense_rollups ORDER BY 1, 2, 3')
+
+def recomputed():
+    return database.fetch_query(database.EXPENSES_DB_PATH, """
+    SELECT year, month, type, SUM(amount), COUNT(*) FROM expenses GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+    """)
+
+def add_sample_expenses():
+    database.add_expenses([
+        ('Salary', 2000.0, 'credit', '2024-03-01'),
+        ('Rent', 800.0, 'debit', '2024-03-02'),
+        ('Coffee', 3.5, 'debit', '2024-03-10'),
+        ('Bonus', 500.0, 'credit', '2024-04-15'),
+        ('Rent', 800.0, 'debit', '2024-04-02'),
+    ])
+
+def test_triggers_keep_rollups_in_step_with_expenses(databases):
+    add_sample_expenses()
+    assert rollups() == recomputed()
+    assert rollups()[:2] == [(2024, 3, 'credit', 2000.0, 1), (2024, 3, 'debit', 803.5, 2)]
+
+    database.update_expense(3, 'Coffee', 4.5, 'debit', '2024-05-01')  # Moves to another month
+    database.delete_expense(4)
+    database.add_expense('Refund', 20.0, 'credit', '02/05/2024')
+    assert rollups() == recomputed()
+    assert (2024, 4, 'credit', 500.0, 1) not in rollups()  # Rows with no entries left are dropped
+
+def test_summaries_are_read_from_the_rollups(databases):
+    add_sample_expenses()
+    assert database.get_monthly_summary(3, 2024) == (2000.0, 803.5, 1196.5)
+    assert database.get_monthly_summary(1, 2024) == (0.0, 0.0, 0.0)
+    assert database.get_yearly_summary(2024) == [(3, 2000.0, 803.5, 1196.5), (4, 500.0, 800.0, -300.0)]
+    assert database.get_expenses_total(3, 2024) == 2803.5
+
+def test_summary_follows_writes(databases):
+    add_sample_expenses()
+    assert database.get_monthly_summary(4, 2024).savings == -300.0
+    database.add_expense('Sold bike', 400.0, 'credit', '2024-04-20')
+    assert database.get_monthly_summary(4, 2024).savings == 100.0
+
+def test_rebuild_repairs_rollups_after_outside_edits(databases):
+    add_sample_expenses()
+    conn = sqlite3.connect(database.EXPENSES_DB_PATH)
+    conn.execute('DROP TRIGGER expenses_rollup_insert')
+    conn.execute("INSERT INTO expenses (description, amount, type, date, month, year) "
+                 "VALUES ('Cash', 50.0, 'debit', '2024-03-20', 3, 2024)")
+    conn.commit()
+    conn.close()
+    assert rollups() != recomputed()
+    database.rebuild_expense_rollups()
+    assert rollups() == recomputed()
+    assert database.get_monthly_summary(3, 2024).debits == 853.5
+
+def test_migration_fills_rollups_from_existing_expenses(old_databases):
+    database.initialize_databases()
+    assert rollups() == [(2024, 8, 'credit', 50.0, 1)]
+    assert database.get_monthly_summary(8, 2024) == (50.0, 0.0, 50.0)
@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+import sys
+import pytest
+import database
+import export
+
+@pytest.fixture
+def data(databases):
+    database.add_tasks([
+        ('Write report', 'Supremacy', '2024-03-01', 'with, commas', 0),
+        ('Read book', 'Preference', '2024-03-15', '', 1),
+        ('Call bank', 'Antecedence', '2024-04-01', '', 0),
+    ])
+    database.add_journal_entries([('Día', 'Ünïcode "quoted"\nand a newline', '2024-03-31')])
+    return databases
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_csv_export(data, workdir):
+    counts = export.export_all(str(workdir / 'out'), 'csv', ['tasks'])
+    assert counts == {'tasks': 3}
+    with open(workdir / 'out' / 'tasks.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['id', 'name', 'priority', 'deadline', 'notes', 'status']
+    assert rows[1] == ['1', 'Write report', 'Supremacy', '2024-03-01', 'with, commas', '0']
+    assert len(rows) == 4
+
+def test_jsonl_export_of_every_table(data, workdir):
+    counts = export.export_all(str(workdir / 'out'), 'jsonl')
+    assert counts == {'tasks': 3, 'notes': 0, 'expenses': 0, 'goals': 0, 'journal': 1}
+    assert read_jsonl(workdir / 'out' / 'journal.jsonl') == [
+        {'id': 1, 'title': 'Día', 'content': 'Ünïcode "quoted"\nand a newline', 'entry_date': '2024-03-31'}]
+    assert sorted(os.listdir(workdir / 'out')) == ['expenses.jsonl', 'goals.jsonl', 'journal.jsonl', 'notes.jsonl',
+                                                   'tasks.jsonl']
+
+def test_date_range_includes_both_days(data, workdir):
+    path = str(workdir / 'tasks.jsonl')
+    assert export.export_table('tasks', path, 'jsonl', since='01/03/2024', until='2024-03-15') == 2
+    assert [row['name'] for row in read_jsonl(path)] == ['Write report', 'Read book']
+
+def test_status_filter(data, workdir):
+    counts = export.export_all(str(workdir / 'out'), 'jsonl', ['tasks', 'journal'], status=0)
+    assert counts == {'tasks': 2, 'journal': 1}
+    with pytest.raises(ValueError):
+        list(export.table_rows('journal', status=0))
+
+def test_rows_are_streamed_in_batches(databases):
+    database.add_goals([(f'Goal {i}', '', None) for i in range(25)])
+    assert [row[0] for row in export.table_rows('goals', batch_size=10)] == list(range(1, 26))
+
+def test_failed_export_leaves_no_file(data, workdir, monkeypatch):
+    def fail(path, columns, rows):
+        with open(path, 'w') as f:
+            f.write('half')
+        raise OSError('disk full')
+
+    monkeypatch.setitem(export.WRITERS, 'csv', fail)
+    with pytest.raises(OSError):
+        export.export_table('tasks', str(workdir / 'tasks.csv'))
+    assert not any(name.startswith('tasks.csv') for name in os.listdir(workdir))
+
+@pytest.mark.skipif(export.pyarrow is not None, reason="pyarrow is installed")
+def test_parquet_needs_pyarrow(data, workdir):
+    with pytest.raises(RuntimeError):
+        export.export_table('tasks', str(workdir / 'tasks.parquet'), 'parquet')
+    assert not os.path.exists(workdir / 'tasks.parquet.partial')
+
+def test_parquet_export(data, workdir):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    assert export.export_table('tasks', str(workdir / 'tasks.parquet'), 'parquet') == 3
+    table = pyarrow.parquet.read_table(workdir / 'tasks.parquet')
+    assert table.column('name').to_pylist() == ['Write report', 'Read book', 'Call bank']
+
+def test_cli_reports_errors(data, workdir, monkeypatch, capsys):
+    (workdir / 'blocked').write_text('')
+    monkeypatch.setattr(sys, 'argv', ['export.py', '--output', str(workdir / 'blocked' / 'out')])
+    with pytest.raises(SystemExit) as exit_info:
+        export.main()
+    assert exit_info.value.code == 1
+    assert 'An error occurred' in capsys.readouterr().err
+
+def test_cli_exports(data, workdir, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['export.py', 'tasks', '--format', 'jsonl', '--output', str(workdir / 'out')])
+    export.main()
+    assert 'tasks: 3 rows' in capsys.readouterr().out
+    assert len(read_jsonl(workdir / 'out' / 'tasks.jsonl')) == 3
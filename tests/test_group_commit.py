@@ -0,0 +1,89 @@
+import sqlite3
+import pytest
+import database
+import events
+from events import Change
+
+def committed_goals():
+    """Read the goal names from a connection of its own, which sees only committed writes."""
+    conn = sqlite3.connect(database.GOALS_DB_PATH)
+    try:
+        return [goal for goal, in conn.execute('SELECT goal FROM goals ORDER BY id')]
+    finally:
+        conn.close()
+
+def insert_goal(goal):
+    return lambda conn: conn.execute('INSERT INTO goals (goal, details) VALUES (?, ?)', (goal, '')).lastrowid
+
+def test_failing_write_is_rolled_back_alone(databases):
+    database.use_group_commit(delay_ms=10000)
+    futures = [database.write_queue.submit(database.GOALS_DB_PATH, work)
+               for work in (insert_goal('Run'), insert_goal(None), insert_goal('Swim'))]
+    assert futures[0].result() == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result()
+    assert futures[2].result() == 2
+    assert committed_goals() == []  # The group is still open
+    database.flush_writes()
+    assert committed_goals() == ['Run', 'Swim']
+
+def test_reads_see_the_open_writes(databases):
+    database.use_group_commit(delay_ms=10000)
+    goal_id = database.add_goal('Run', 'far')
+    assert database.get_goal_by_id(goal_id).goal == 'Run'
+    assert committed_goals() == ['Run']  # The read committed the group
+
+def test_group_is_committed_after_max_writes(databases):
+    database.use_group_commit(delay_ms=10000, max_writes=2)
+    futures = [database.write_queue.submit(database.GOALS_DB_PATH, insert_goal(f'Goal {i}')) for i in range(3)]
+    assert [future.result() for future in futures] == [1, 2, 3]
+    assert committed_goals() == ['Goal 0', 'Goal 1']
+
+def test_committed_durability_returns_once_committed(databases):
+    database.use_group_commit(delay_ms=10000, durability='committed')
+    database.add_goal('Run', 'far')
+    assert committed_goals() == ['Run']
+    with pytest.raises(sqlite3.IntegrityError):
+        database.write_queue.run(database.GOALS_DB_PATH, insert_goal(None))
+    database.add_goal('Swim', 'far')
+    assert committed_goals() == ['Run', 'Swim']
+
+def test_turning_group_commit_off_commits_the_open_group(databases):
+    database.use_group_commit(delay_ms=10000)
+    database.add_goal('Run', 'far')
+    database.use_group_commit(None)
+    assert committed_goals() == ['Run']
+    database.add_goal('Swim', 'far')
+    assert committed_goals() == ['Run', 'Swim']
+
+def test_settings_are_checked():
+    with pytest.raises(ValueError):
+        database.GroupCommit(durability='eventually')
+    with pytest.raises(ValueError):
+        database.GroupCommit(max_writes=0)
+    assert database.GroupCommit(delay_ms=-5).delay == 0
+
+def violate_a_deferred_key(conn):
+    """Make a write whose commit fails: its deferred foreign key is only checked then."""
+    conn.execute('CREATE TEMP TABLE parent (id INTEGER PRIMARY KEY)')
+    conn.execute('CREATE TEMP TABLE child (parent_id REFERENCES parent (id) DEFERRABLE INITIALLY DEFERRED)')
+    conn.execute('INSERT INTO child VALUES (1)')
+
+def test_failed_group_commit_reloads_the_windows_and_is_raised_by_the_next_flush(databases, monkeypatch):
+    monkeypatch.setattr(database.connection_manager, 'pragmas',
+                        database.CONNECTION_PRAGMAS + ('PRAGMA foreign_keys = ON',))
+    database.close_connections()
+    database.use_group_commit(delay_ms=10000, max_writes=2)
+    changes = []
+    unsubscribe = events.subscribe(changes.append)
+    try:
+        assert database.add_goal('Run', 'far') == 1
+        database.write_queue.run(database.GOALS_DB_PATH, violate_a_deferred_key)  # Ends the group
+        with pytest.raises(sqlite3.IntegrityError):
+            database.flush_writes()
+    finally:
+        unsubscribe()
+    assert changes[-1] == Change('goals', 'update', None)
+    assert committed_goals() == []
+    assert database.get_goals() == []
+    database.flush_writes()  # The error was raised once
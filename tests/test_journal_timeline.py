@@ -0,0 +1,32 @@
+import database
+from models import JournalSummary
+
+def test_timeline_lists_the_newest_entries_first(databases):
+    database.add_journal_entries([('Monday', 'a', '2024-08-05'), ('Sunday', 'b', '2024-08-04'),
+                                  ('Also Monday', 'c', '05/08/2024')])
+    assert database.get_journal_timeline() == [JournalSummary(3, 'Also Monday', '2024-08-05'),
+                                               JournalSummary(1, 'Monday', '2024-08-05'),
+                                               JournalSummary(2, 'Sunday', '2024-08-04')]
+    assert [entry.id for entry in database.get_journal_timeline(2, 1)] == [1, 2]
+    assert [entry.id for entry in database.get_journal_timeline_page(('2024-08-05', 1), 10)] == [2]
+
+def test_content_is_read_when_an_entry_is_opened(databases):
+    entry_id = database.add_journal_entry('Day', 'fine', '2024-08-01')
+    assert database.get_journal_content(entry_id) == 'fine'
+    database.update_journal_entry(entry_id, 'Day', 'better')
+    assert database.get_journal_content(entry_id) == 'better'
+    database.delete_journal_entry(entry_id)
+    assert database.get_journal_content(entry_id) is None
+
+def test_timeline_is_read_from_its_index(databases):
+    conn = database.get_connection(database.JOURNAL_DB_PATH)
+    plan = database.explain_plan(conn, 'SELECT id, title, entry_date FROM journal '
+                                       'ORDER BY entry_date DESC, id DESC LIMIT ?', (10,))
+    assert any('COVERING INDEX idx_journal_timeline' in line for line in plan)
+    assert not any('TEMP B-TREE' in line for line in plan)
+
+def test_old_journal_gets_the_timeline_index(old_databases):
+    database.initialize_databases()
+    conn = database.get_connection(database.JOURNAL_DB_PATH)
+    indexes = [name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert 'idx_journal_timeline' in indexes
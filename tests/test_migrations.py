@@ -0,0 +1,105 @@
+import datetime
+import sqlite3
+import pytest
+import database
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+def test_new_files_are_created_at_the_latest_version(databases):
+    for path in database.service_db_paths().values():
+        assert user_version(path) == database.schema_version()
+
+def test_old_files_are_migrated(old_databases):
+    conn = sqlite3.connect('journal.db')
+    conn.execute("INSERT INTO journal (entry_date, entry) VALUES ('24/12/2023', 'Wrapped the presents')")
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect('goals.db')
+    conn.execute("INSERT INTO goals (goal, details) VALUES ('Learn SQL', 'window functions')")
+    conn.commit()
+    conn.close()
+
+    database.initialize_databases()
+
+    for path in database.service_db_paths().values():
+        assert user_version(path) == database.schema_version()
+    assert database.get_task_by_id(1).deadline == '2024-08-07'
+    assert [task.deadline for task in database.get_tasks(0)] == ['2024-08-07', '2024-08-08', '2024-08-09', '2024-08-10']
+    note = database.get_note_by_id(2)
+    assert (note.task_id, note.title, note.content) == (1, 'read read read', 'read read read')
+    assert note.created_at
+    assert database.get_expense_by_id(1).date == '2024-08-03'
+    assert database.get_expenses(8, 2024)[0].amount == 50.0
+    entry = database.get_journal_entry_by_id(1)
+    assert (entry.title, entry.content, entry.entry_date) == ('Wrapped the presents', 'Wrapped the presents', '2023-12-24')
+    assert database.get_goal_by_id(1).deadline is None
+    database.update_goal(1, 'Learn SQL', 'window functions', '31/12/2024')
+    assert database.get_goal_by_id(1).deadline == '2024-12-31'
+
+def test_rebuilt_tables_keep_their_autoincrement_counters(old_databases):
+    conn = sqlite3.connect('notes.db')
+    conn.execute('DELETE FROM notes WHERE id = 2')
+    conn.commit()
+    conn.close()
+    database.initialize_databases()
+    # The notes table is rebuilt with a title column; the id of the deleted
+    # last note is still not handed out again
+    assert database.save_notes('New', 'text', 1) == 3
+
+def test_registered_migration_runs_once(databases, monkeypatch):
+    monkeypatch.setattr(database, 'MIGRATIONS', list(database.MIGRATIONS))
+    latest = database.schema_version()
+    calls = []
+
+    @database.migration(latest + 1, 'goals')
+    def add_goal_priority(conn):
+        calls.append(conn)
+        conn.execute('ALTER TABLE goals ADD COLUMN priority INTEGER')
+
+    database.forget_migrations()
+    database.initialize_databases()
+    database.forget_migrations()
+    database.initialize_databases()
+
+    assert len(calls) == 1
+    assert database.schema_version() == latest + 1
+    assert user_version(database.GOALS_DB_PATH) == latest + 1
+    assert user_version(database.TASKS_DB_PATH) == latest + 1
+    assert 'priority' in database._table_columns(database.get_connection(database.GOALS_DB_PATH), 'goals')
+
+def test_failed_migration_is_rolled_back(databases, monkeypatch):
+    monkeypatch.setattr(database, 'MIGRATIONS', list(database.MIGRATIONS))
+    latest = database.schema_version()
+
+    @database.migration(latest + 1, 'tasks')
+    def broken(conn):
+        conn.execute('ALTER TABLE tasks ADD COLUMN done_at TEXT')
+        raise sqlite3.OperationalError('broken migration')
+
+    database.forget_migrations()
+    with pytest.raises(sqlite3.OperationalError):
+        database.initialize_databases()
+    assert user_version(database.TASKS_DB_PATH) == latest
+    assert 'done_at' not in database._table_columns(database.get_connection(database.TASKS_DB_PATH), 'tasks')
+
+def test_dates_are_stored_as_iso_and_shown_as_display_dates():
+    assert database.to_iso_date('07/08/2024') == '2024-08-07'
+    assert database.to_iso_date(' 2024-08-07 ') == '2024-08-07'
+    assert database.to_iso_date(datetime.date(2024, 8, 7)) == '2024-08-07'
+    assert database.to_display_date('2024-08-07') == '07/08/2024'
+    assert database.to_display_date(None) is None
+    assert database.to_display_date('someday') == 'someday'
+    for value in ('31/02/2024', '2024-13-01', 'tomorrow'):
+        with pytest.raises(ValueError):
+            database.to_iso_date(value)
+
+def test_date_ranges_use_iso_order(databases):
+    database.add_tasks([('Late', 'Preference', '01/12/2023', '', 0), ('Early', 'Preference', '02/01/2024', '', 0),
+                        ('Later', 'Preference', '15/02/2024', '', 0)])
+    assert [task.name for task in database.get_tasks_due_between('01/01/2024', '31/01/2024')] == ['Early']
+    assert [task.name for task in database.get_tasks_due_between('01/12/2023', '31/12/2024')] == ['Late', 'Early', 'Later']
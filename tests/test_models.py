@@ -0,0 +1,38 @@
+import models
+import database
+from models import Task, TaskSummary, Note, NoteSummary, Goal, JournalEntry, Expense, MonthTotals
+
+def test_queries_return_typed_rows(databases):
+    task_id = database.add_task('Read', 'Preference', '2024-08-01', 'chapter one')
+    note_id = database.save_notes('Summary', 'text', task_id)
+    goal_id = database.add_goal('Run', 'far', '2025-01-01')
+    entry_id = database.add_journal_entry('Day', 'fine', '2024-08-01')
+    expense_id = database.add_expense('Rent', 800.0, 'debit', '2024-08-01')
+
+    task = database.get_task_by_id(task_id)
+    assert task == Task(task_id, 'Read', 'Preference', '2024-08-01', 'chapter one', 0)
+    assert type(database.get_tasks(0)[0]) is TaskSummary
+    note = database.get_note_by_id(note_id)
+    assert type(note) is Note and (note.title, note.task_id) == ('Summary', task_id)
+    assert type(database.fetch_notes(task_id)[0]) is NoteSummary
+    assert database.get_goal_by_id(goal_id) == Goal(goal_id, 'Run', 'far', '2025-01-01', 0)
+    assert database.get_journal_entry_by_id(entry_id) == JournalEntry(entry_id, 'Day', 'fine', '2024-08-01')
+    assert database.get_expense_by_id(expense_id) == Expense(expense_id, 'Rent', 800.0, 'debit', '2024-08-01')
+    assert database.get_yearly_summary(2024) == [MonthTotals(8, 0.0, 800.0, -800.0)]
+
+def test_rows_are_plain_tuples():
+    task = Task(1, 'Read', 'Preference', '2024-08-01', '', 0)
+    assert isinstance(task, tuple)
+    assert task[0] == task.id == 1
+    assert not hasattr(task, '__dict__')
+    assert task.summary() == TaskSummary(1, 'Read', 'Preference', '2024-08-01')
+    assert task.summary() == (1, 'Read', 'Preference', '2024-08-01')
+
+def test_untyped_queries_return_tuples(databases):
+    database.add_task('Read', 'Preference', '2024-08-01')
+    assert database.fetch_query(database.TASKS_DB_PATH, 'SELECT id, name FROM tasks') == [(1, 'Read')]
+
+def test_every_model_is_registered():
+    classes = {name: value for name, value in vars(models).items()
+               if isinstance(value, type) and issubclass(value, tuple) and value.__module__ == 'models'}
+    assert models.MODELS == classes
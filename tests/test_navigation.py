@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from navigation import AppLoader
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def app_module(workdir, monkeypatch):
+    """Write an app module that takes a while to import; return its name."""
+    name = f'slow_app_{workdir.name}'
+    (workdir / f'{name}.py').write_text('import time\ntime.sleep(0.2)\n\nclass App:\n    pass\n')
+    monkeypatch.syspath_prepend(str(workdir))
+    yield name
+    sys.modules.pop(name, None)
+
+def test_load_imports_the_module_once(app_module):
+    loader = AppLoader()
+    assert app_module not in sys.modules
+    app_class = loader.load(app_module, 'App')
+    assert app_class.__name__ == 'App'
+    assert loader.load(app_module, 'App') is app_class
+    assert list(loader.timings) == [app_module]
+    assert loader.timings[app_module] >= 0.2
+
+def test_load_waits_for_the_prewarm_import(app_module):
+    loader = AppLoader()
+    loader.prewarm([app_module])
+    time.sleep(0.05)  # The prewarm thread is now in the middle of the import
+    assert loader.load(app_module, 'App').__name__ == 'App'
+    # Timed by whichever call did the import, once
+    assert list(loader.timings) == [app_module]
+
+def test_prewarm_reports_failed_imports(capsys):
+    loader = AppLoader()
+    loader.prewarm(['no_such_app_module'])
+    for _ in range(100):
+        if 'An error occurred' in capsys.readouterr().out:
+            break
+        time.sleep(0.01)
+    else:
+        pytest.fail("The failed import was not reported")
+    with pytest.raises(ImportError):
+        loader.load('no_such_app_module', 'App')
+
+def test_launcher_does_not_import_the_apps(workdir):
+    code = "import sys, navigation; print(sorted(m for m in ('todo_app', 'notes_app', 'tkcalendar') if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    output = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
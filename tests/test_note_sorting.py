@@ -0,0 +1,41 @@
+import pytest
+import database
+
+@pytest.fixture
+def notes(databases):
+    rows = [('beta', '', 1, '2024-08-02 10:00:00'),
+            ('Alpha', '', 1, '2024-08-03 10:00:00'),
+            ('gamma', '', 1, '2024-08-01 10:00:00'),
+            ('Other task', '', 2, '2024-08-01 09:00:00')]
+    database.run_transaction(database.NOTES_DB_PATH, lambda conn: conn.executemany(
+        'INSERT INTO notes (title, content, task_id, created_at) VALUES (?, ?, ?, ?)', rows))
+
+def titles(notes):
+    return [note.title for note in notes]
+
+def test_sort_orders(notes):
+    assert titles(database.fetch_notes(1)) == ['gamma', 'beta', 'Alpha']
+    assert titles(database.fetch_notes(1, 'newest')) == ['Alpha', 'beta', 'gamma']
+    assert titles(database.fetch_notes(1, 'title')) == ['Alpha', 'beta', 'gamma']
+    assert titles(database.fetch_notes(1, 'title', limit=2, offset=1)) == ['beta', 'gamma']
+    assert database.count_notes(1) == 3
+
+def test_unknown_sort_order_is_refused(notes):
+    with pytest.raises(ValueError):
+        database.fetch_notes(1, 'title; DROP TABLE notes')
+    assert database.count_notes(1) == 3
+
+@pytest.mark.parametrize('sort_by', sorted(database.NOTE_SORT_ORDERS))
+def test_sort_orders_need_no_sort(databases, sort_by):
+    conn = database.get_connection(database.NOTES_DB_PATH)
+    plan = database.explain_plan(conn, 'SELECT id, title, created_at FROM notes WHERE task_id = ? '
+                                       f'ORDER BY {database.NOTE_SORT_ORDERS[sort_by]}', (1,))
+    assert any('COVERING INDEX idx_notes_task_' in line for line in plan)
+    assert not any('TEMP B-TREE' in line for line in plan)
+
+def test_old_notes_get_the_sort_indexes(old_databases):
+    database.initialize_databases()
+    conn = database.get_connection(database.NOTES_DB_PATH)
+    indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_notes_task_created', 'idx_notes_task_title'} <= indexes
+    assert 'idx_notes_task_id' not in indexes
@@ -0,0 +1,44 @@
+import datetime
+import pytest
+import database
+import events
+
+@pytest.fixture
+def changes():
+    changes = []
+    unsubscribe = events.subscribe(changes.append, ('tasks',))
+    yield changes
+    unsubscribe()
+
+def test_overdue_incomplete_tasks_are_marked_missed(databases, changes):
+    database.add_tasks([
+        ('Overdue', 'Preference', '2024-03-01', '', 0),
+        ('Due today', 'Preference', '2024-03-10', '', 0),
+        ('Done late', 'Preference', '2024-03-01', '', 1),
+        ('Upcoming', 'Preference', '2024-04-01', '', 0),
+        ('Also overdue', 'Preference', '2023-12-31', '', 0),
+    ])
+    changes.clear()
+    assert sorted(database.mark_overdue_tasks_missed('10/03/2024')) == [1, 5]
+    assert [task.name for task in database.get_missed_tasks()] == ['Also overdue', 'Overdue']
+    assert [task.name for task in database.get_tasks(0)] == ['Due today', 'Upcoming']
+    assert [task.name for task in database.get_completed_tasks()] == ['Done late']
+    assert [(change.op, sorted(change.ids)) for change in changes] == [('update', [1, 5])]
+
+def test_a_sweep_with_nothing_overdue_publishes_nothing(databases, changes):
+    database.add_task('Upcoming', 'Preference', '2024-04-01')
+    changes.clear()
+    assert database.mark_overdue_tasks_missed(datetime.date(2024, 3, 10)) == []
+    assert changes == []
+
+def test_sweep_defaults_to_today(databases):
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    database.add_tasks([('Yesterday', 'Preference', yesterday, '', 0),
+                        ('Today', 'Preference', datetime.date.today(), '', 0)])
+    database.mark_overdue_tasks_missed()
+    assert [task.name for task in database.get_missed_tasks()] == ['Yesterday']
+
+def test_sweep_uses_the_status_deadline_index(databases):
+    conn = database.get_connection(database.TASKS_DB_PATH)
+    plan = database.explain_plan(conn, 'UPDATE tasks SET status = 2 WHERE status = 0 AND deadline < ?', ('2024-03-10',))
+    assert any('idx_tasks_status_deadline' in line for line in plan)
@@ -0,0 +1,59 @@
+import database
+
+def pages(fetch_page, page_key, limit):
+    """Read every page through fetch_page(after, limit); return the pages."""
+    result, after = [], None
+    while True:
+        page = fetch_page(after, limit)
+        if not page:
+            return result
+        result.append(page)
+        after = page_key(page[-1])
+
+def test_task_pages_follow_deadline_order_with_ties(databases):
+    # Many tasks share a deadline, so the id must break the ties
+    database.add_tasks([(f'Task {i}', 'Preference', f'2024-08-{i % 3 + 1:02}', '', i % 2) for i in range(50)])
+    task_pages = pages(lambda after, limit: database.get_tasks_page(0, after, limit),
+                       lambda task: (task.deadline, task.id), 7)
+    assert [len(page) for page in task_pages] == [7, 7, 7, 4]
+    assert [task for page in task_pages for task in page] == database.get_tasks(0)
+
+def test_iterators_match_the_full_lists(databases):
+    database.add_tasks([(f'Task {i}', 'Preference', f'2024-{i % 12 + 1:02}-01', '', 1) for i in range(23)])
+    database.add_goals([(f'Goal {i}', '', None) for i in range(23)])
+    database.update_goals_status(range(1, 24, 2), 1)
+    for i in range(23):
+        database.add_journal_entry(f'Entry {i}', '', '2024-01-01')
+    database.add_expenses([(f'Expense {i}', i, 'debit', '2024-03-01') for i in range(23)])
+    database.add_notes([(f'Note {i}', '', 4) for i in range(23)])
+    assert list(database.iter_tasks(1, batch_size=5)) == database.get_completed_tasks()
+    assert list(database.iter_goals(batch_size=5)) == database.get_goals()
+    assert list(database.iter_goals(1, batch_size=5)) == database.get_completed_goals()
+    assert list(database.iter_journal_entries(batch_size=5)) == database.get_journal_entries()
+    assert list(database.iter_expenses(3, 2024, batch_size=5)) == database.get_expenses(3, 2024)
+    assert list(database.iter_notes(4, batch_size=5)) == database.fetch_notes(4)
+
+def test_exact_multiple_of_the_batch_size(databases):
+    database.add_goals([(f'Goal {i}', '', None) for i in range(10)])
+    assert [goal.id for goal in database.iter_goals(batch_size=5)] == list(range(1, 11))
+
+def test_pages_are_not_shifted_by_deletes(databases):
+    database.add_goals([(f'Goal {i}', '', None) for i in range(10)])
+    first = database.get_goals_page(limit=4)
+    database.delete_goals([1, 2])
+    # With OFFSET 4, goals 5 and 6 would have been skipped
+    second = database.get_goals_page(first[-1].id, 4)
+    assert [goal.id for goal in second] == [5, 6, 7, 8]
+
+def test_timeline_pages_run_backwards(databases):
+    database.add_journal_entries([(f'Entry {i}', '', f'2024-01-{i % 5 + 1:02}') for i in range(12)])
+    timeline = pages(database.get_journal_timeline_page, lambda entry: (entry.entry_date, entry.id), 5)
+    assert [entry for page in timeline for entry in page] == database.get_journal_timeline()
+
+def test_page_queries_seek_through_an_index(databases):
+    conn = database.get_connection(database.TASKS_DB_PATH)
+    plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN SELECT id, name, priority, deadline FROM tasks '
+                                           'WHERE status = ? AND (deadline, id) > (?, ?) ORDER BY deadline, id LIMIT ?',
+                                           (0, '2024-01-01', 1, 10))]
+    assert any('idx_tasks_status_deadline' in line for line in plan)
+    assert not any('TEMP B-TREE' in line for line in plan)
@@ -0,0 +1,103 @@
+import sqlite3
+import pytest
+import database
+from database import QueryCache
+
+def test_values_are_cached_until_invalidated():
+    cache, loads = QueryCache(), []
+
+    def load():
+        loads.append(1)
+        return 'value'
+
+    assert cache.get(('tasks', 'get_tasks', ()), load) == 'value'
+    assert cache.get(('tasks', 'get_tasks', ()), load) == 'value'
+    assert len(loads) == 1
+    cache.invalidate('tasks')
+    cache.get(('tasks', 'get_tasks', ()), load)
+    assert len(loads) == 2
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+def test_row_invalidation_keeps_the_other_rows():
+    cache = QueryCache()
+    for key in (('tasks', 'row', 1, 'get'), ('tasks', 'row', 2, 'get'), ('tasks', 'get_tasks', ()),
+                ('notes', 'row', 1, 'get')):
+        cache.get(key, lambda: 'value')
+    cache.invalidate('tasks', [1])
+    assert set(cache.entries) == {('tasks', 'row', 2, 'get'), ('notes', 'row', 1, 'get')}
+
+def test_none_is_not_cached():
+    cache, loads = QueryCache(), []
+    cache.get(('tasks', 'row', 1, 'get'), lambda: loads.append(1))
+    cache.get(('tasks', 'row', 1, 'get'), lambda: loads.append(1))
+    assert len(loads) == 2
+
+def test_least_recently_used_entries_are_evicted():
+    cache = QueryCache(maxsize=2)
+    cache.get(('t', 'a', ()), lambda: 1)
+    cache.get(('t', 'b', ()), lambda: 2)
+    cache.get(('t', 'a', ()), lambda: 1)
+    cache.get(('t', 'c', ()), lambda: 3)
+    assert list(cache.entries) == [('t', 'a', ()), ('t', 'c', ())]
+    assert cache.stats()['evictions'] == 1
+
+def test_expired_entries_are_loaded_again():
+    cache, loads = QueryCache(ttl=0), []
+    cache.get(('t', 'a', ()), lambda: loads.append(1) or 1)
+    cache.get(('t', 'a', ()), lambda: loads.append(1) or 1)
+    assert len(loads) == 2
+
+def test_result_of_a_read_racing_with_a_write_is_not_cached():
+    cache = QueryCache()
+
+    def load():
+        cache.invalidate('tasks', [1])  # A write lands while the row is being read
+        return 'stale'
+
+    assert cache.get(('tasks', 'row', 1, 'get'), load) == 'stale'
+    assert cache.entries == {}
+    cache.clear()
+    cache.get(('tasks', 'row', 1, 'get'), lambda: 'fresh')
+    assert len(cache.entries) == 1
+
+def test_by_id_lookups_are_cached_and_invalidated_by_writes(databases):
+    task_id = database.add_task('Read', 'Preference', '2024-08-01')
+    assert database.get_task_by_id(task_id).name == 'Read'
+    hits = database.cache_stats()['hits']
+    assert database.get_task_by_id(task_id).name == 'Read'
+    assert database.cache_stats()['hits'] == hits + 1
+    database.update_task(task_id, name='Write')
+    assert database.get_task_by_id(task_id).name == 'Write'
+    database.delete_task(task_id)
+    assert database.get_task_by_id(task_id) is None
+
+def test_lookups_of_different_functions_do_not_collide(databases):
+    database.add_expenses([('Salary', 2000.0, 'credit', '2024-03-01'), ('Rent', 800.0, 'debit', '2024-03-02')])
+    assert database.get_expenses_total(3, 2024) == 2800.0
+    assert database.get_monthly_summary(3, 2024) == (2000.0, 800.0, 1200.0)
+
+def test_cached_lists_are_handed_out_as_copies(databases):
+    database.add_task('Read', 'Preference', '2024-08-01')
+    tasks = database.get_tasks(0)
+    tasks.clear()
+    assert len(database.get_tasks(0)) == 1
+
+def test_counts_follow_bulk_writes(databases):
+    assert database.count_goals() == 0
+    database.add_goals([('A', '', None), ('B', '', None)])
+    assert database.count_goals() == 2
+    database.update_goals_status([1], 1)
+    assert database.count_goals(1) == 1
+
+def test_failed_write_still_drops_its_rows(databases, monkeypatch):
+    goal_id = database.add_goal('Run', 'far')
+    database.get_goal_by_id(goal_id)
+    assert ('goals', 'row', goal_id, 'get_goal_by_id') in database.query_cache.entries
+
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(database, 'execute_query', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        database.update_goal(goal_id, 'Walk', 'near')
+    assert not any(key[0] == 'goals' for key in database.query_cache.entries)
@@ -0,0 +1,82 @@
+import json
+import sqlite3
+import pytest
+import database
+from database import QueryStats, StatementStats
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = QueryStats(slow_ms=None)
+    monkeypatch.setattr(database, 'query_stats', stats)
+    return stats
+
+def statement(stats, text):
+    return stats.snapshot()['statements'][text]
+
+def test_reads_and_writes_are_counted(databases, stats):
+    database.add_tasks([(f'Task {i}', 'Preference', '2024-08-01', '', 0) for i in range(3)])
+    database.fetch_query(database.TASKS_DB_PATH, 'SELECT id FROM tasks  WHERE status = ?', (0,))
+    database.fetch_query(database.TASKS_DB_PATH, 'SELECT id FROM tasks\n WHERE status = ?', (1,))
+    insert = statement(stats, 'INSERT INTO tasks (name, priority, deadline, notes, status) VALUES (?, ?, ?, ?, ?)')
+    assert (insert['calls'], insert['rows']) == (1, 3)
+    # Statements differing only in whitespace are counted together
+    select = statement(stats, 'SELECT id FROM tasks WHERE status = ?')
+    assert (select['calls'], select['rows'], select['errors']) == (2, 3, 0)
+    assert select['plan'] is None
+
+def test_streamed_rows_are_counted_once_consumed(databases, stats):
+    database.add_goals([(f'Goal {i}', '', None) for i in range(5)])
+    rows = database.iter_query(database.GOALS_DB_PATH, 'SELECT id FROM goals', batch_size=2)
+    assert len(list(rows)) == 5
+    assert statement(stats, 'SELECT id FROM goals')['rows'] == 5
+
+def test_errors_are_counted_and_raised(databases, stats):
+    with pytest.raises(sqlite3.OperationalError):
+        database.fetch_query(database.TASKS_DB_PATH, 'SELECT * FROM no_such_table')
+    assert statement(stats, 'SELECT * FROM no_such_table')['errors'] == 1
+
+def test_slow_queries_are_logged_with_their_plan(databases, stats, capsys):
+    stats.slow_ms = 0.0
+    database.get_tasks_page(0, ('2024-01-01', 1), 10)
+    entry = stats.snapshot()['slow_queries'][0]
+    assert entry['query'].startswith('SELECT id, name, priority, deadline FROM tasks')
+    assert any('idx_tasks_status_deadline' in line for line in entry['plan'])
+    assert 'Slow query' in capsys.readouterr().err
+
+def test_slow_log_is_bounded(databases, stats, capsys):
+    stats.slow_ms = 0.0
+    stats.slow_log_size = 3
+    for _ in range(5):
+        database.fetch_query(database.TASKS_DB_PATH, 'SELECT 1')
+    assert len(stats.snapshot()['slow_queries']) == 3
+
+def test_plans_are_captured_once_per_statement(databases, stats):
+    stats.capture_plans = True
+    database.fetch_notes(1)
+    database.fetch_notes(2)
+    plans = [value['plan'] for query, value in stats.snapshot()['statements'].items() if 'FROM notes' in query]
+    assert len(plans) == 1
+    assert any('idx_notes_task_created' in line for line in plans[0])
+
+def test_latency_percentiles():
+    statement_stats = StatementStats()
+    for elapsed_ms in [0.05] * 90 + [3.0] * 9 + [700.0]:
+        statement_stats.add(elapsed_ms, 1)
+    result = statement_stats.as_dict()
+    assert result['calls'] == 100
+    assert result['p50_ms'] == 0.1
+    assert result['p95_ms'] == 5
+    assert result['max_ms'] == 700.0
+    assert result['histogram'] == {'0.1': 90, '5': 9, '1000': 1}
+
+def test_dump_and_report(databases, stats, workdir, capsys):
+    database.get_goals()
+    database.dump_query_stats(str(workdir / 'stats.json'))
+    with open(workdir / 'stats.json') as f:
+        dumped = json.load(f)
+    assert list(dumped) == ['statements', 'slow_queries']
+    assert 'SELECT id, goal, deadline, status FROM goals ORDER BY id' in dumped['statements']
+    stats.report()
+    assert 'FROM goals' in capsys.readouterr().err
+    stats.reset()
+    assert stats.snapshot() == {'statements': {}, 'slow_queries': []}
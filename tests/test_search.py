@@ -0,0 +1,47 @@
+import database
+
+def test_search_follows_inserts_updates_and_deletes(databases):
+    note_id = database.save_notes('Groceries', 'milk, eggs and bread', 1)
+    assert [note.id for note in database.search_notes('eggs')] == [note_id]
+    database.update_note(note_id, 'milk and butter')
+    assert database.search_notes('eggs') == []
+    assert [note.id for note in database.search_notes('butter')] == [note_id]
+    database.delete_notes(note_id)
+    assert database.search_notes('butter') == []
+    assert database.search_notes('groceries') == []
+
+def test_journal_and_tasks_are_indexed(databases):
+    database.add_journal_entry('Hike', 'Walked up the hill', '2024-05-01')
+    database.add_journal_entry('Rain', 'Stayed home and read', '2024-05-02')
+    assert [entry.title for entry in database.search_journal('hill')] == ['Hike']
+    database.add_tasks([('Plan trip', 'Preference', '2024-06-01', 'book the train', 0)])
+    match = database.search_tasks('train')[0]
+    assert (match.name, match.status) == ('Plan trip', 0)
+    assert '[train]' in match.snippet
+
+def test_last_word_matches_as_a_prefix(databases):
+    database.save_notes('Meeting', 'discuss the budget', 1)
+    assert len(database.search_notes('bud')) == 1
+    assert len(database.search_notes('discuss bud')) == 1
+    assert database.search_notes('bud discuss') == []
+
+def test_titles_rank_above_contents(databases):
+    database.save_notes('Shopping', 'a list for the garden', 1)
+    database.save_notes('Garden', 'plant the tomatoes', 1)
+    assert [note.title for note in database.search_notes('garden')] == ['Garden', 'Shopping']
+
+def test_query_syntax_in_the_search_text_is_ignored(databases):
+    database.save_notes('Read', 'chapter "one" AND two', 1)
+    assert len(database.search_notes('"one" AND')) == 1
+    assert len(database.search_notes('one OR NOT (two')) == 0
+    assert database.search_notes('  ') == []
+    assert database.search_notes('*:-') == []
+
+def test_limit(databases):
+    database.add_notes([(f'Note {i}', 'same words here', 1) for i in range(10)])
+    assert len(database.search_notes('words', limit=3)) == 3
+
+def test_existing_rows_are_indexed_by_the_migration(old_databases):
+    database.initialize_databases()
+    assert sorted(task.id for task in database.search_tasks('modules')) == [1, 3]
+    assert [note.id for note in database.search_notes('read')] == [2]
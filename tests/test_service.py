@@ -0,0 +1,199 @@
+import asyncio
+import datetime
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import pytest
+import database
+import events
+import service
+from models import Task, TaskSummary, MonthlySummary
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def round_trip(result):
+    return service.decode_result(service.encode_result(result))
+
+def test_results_keep_their_row_types():
+    tasks = [TaskSummary(1, 'Read', 'Preference', '2024-08-01'), TaskSummary(2, 'Write', 'Supremacy', '2024-08-02')]
+    decoded = round_trip(tasks)
+    assert decoded == tasks and type(decoded[0]) is TaskSummary
+    summary = round_trip(MonthlySummary(10.0, 2.5, 7.5))
+    assert summary.savings == 7.5
+    assert round_trip([(1, 2), (3, 4)]) == [(1, 2), (3, 4)]
+    assert round_trip([]) == []
+    assert round_trip(3) == 3
+    assert round_trip(None) is None
+    assert round_trip({'hits': 1}) == {'hits': 1}
+    assert round_trip(['a', 'b']) == ['a', 'b']
+
+def test_arguments_are_encoded():
+    assert service.encode_value(datetime.date(2024, 8, 1)) == '2024-08-01'
+    assert service.encode_value(x for x in (1, 2)) == [1, 2]
+    assert service.encode_value({3}) == [3]
+    with pytest.raises(TypeError):
+        service.encode_value(object())
+
+def test_errors_are_rebuilt_with_their_type():
+    def rebuilt(error):
+        return service.decode_error({'error': str(error), 'type': service.error_type(error)})
+
+    assert type(rebuilt(ValueError('bad date'))) is ValueError
+    assert type(rebuilt(sqlite3.IntegrityError('NOT NULL'))) is sqlite3.IntegrityError
+    unknown = rebuilt(service.ServiceError('odd'))
+    assert type(unknown) is service.ServiceError and str(unknown) == 'odd'
+    assert type(service.decode_error({'error': 'x', 'type': 'os.system'})) is service.ServiceError
+
+def test_parse_address():
+    assert service.parse_address('127.0.0.1:8765') == ('127.0.0.1', 8765)
+    assert service.parse_address(':9000') == ('127.0.0.1', 9000)
+    assert service.parse_address('initiatives.sock') == 'initiatives.sock'
+
+def test_service_runs_reads_and_writes(databases):
+    async def run():
+        database_service = service.DatabaseService()
+        try:
+            task_id = await database_service.call('add_task', ['Read', 'Preference', '01/08/2024'], {})
+            task = await database_service.call('get_task_by_id', [task_id], {})
+            with pytest.raises(ValueError):
+                await database_service.call('drop_everything', [], {})
+            return task, database_service.stats
+        finally:
+            database_service.shutdown()
+
+    task, stats = asyncio.run(run())
+    assert task == Task(1, 'Read', 'Preference', '2024-08-01', '', 0)
+    assert (stats['reads'], stats['writes']) == (1, 1)
+
+@pytest.fixture
+def server(databases):
+    """Serve the test databases from a thread; return the socket address."""
+    address = 'service.sock' if hasattr(service.socket, 'AF_UNIX') else '127.0.0.1:18765'
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(service.serve(address))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if service.service_running(address):
+            break
+        time.sleep(0.02)
+    yield address
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join()
+    loop.close()
+
+def test_client_calls_through_the_socket(server):
+    client = service.ServiceClient(server)
+    try:
+        task_id = client.call('add_task', ('Read', 'Preference', datetime.date(2024, 8, 1)))
+        assert client.call('get_tasks', (0,)) == [TaskSummary(task_id, 'Read', 'Preference', '2024-08-01')]
+        assert type(client.call('get_task_by_id', (task_id,))) is Task
+        with pytest.raises(ValueError):
+            client.call('add_task', ('Write', 'Preference', '31/02/2024'))
+        assert client.call('service_stats')['errors'] == 1
+    finally:
+        client.close()
+
+def test_clients_on_several_threads(server):
+    client, errors = service.ServiceClient(server), []
+
+    def add_goals(number):
+        try:
+            for i in range(10):
+                client.call('add_goal', (f'Goal {number}.{i}', ''))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add_goals, args=(number,)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert errors == []
+        assert client.call('count_goals') == 40
+    finally:
+        client.close()
+
+@pytest.fixture
+def service_process(databases):
+    """Run service.py on the test databases in a process of its own; use it from this one."""
+    address = 'service.sock' if hasattr(service.socket, 'AF_UNIX') else '127.0.0.1:18766'
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, 'service.py'), '--address', address],
+                               cwd=os.getcwd(), stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(250):
+            if service.service_running(address):
+                break
+            time.sleep(0.02)
+        database.use_service(address)
+        yield address
+    finally:
+        database.use_service(None)
+        process.terminate()
+        process.wait()
+
+def test_use_service_forwards_and_publishes_writes(service_process, monkeypatch):
+    changes = []
+    unsubscribe = events.subscribe(changes.append, ('goals',))
+    try:
+        goal_id = database.add_goal('Run', 'a marathon')
+        assert database.get_goal_by_id(goal_id).goal == 'Run'
+        database.update_goals_status(iter([goal_id]), 1)
+    finally:
+        unsubscribe()
+    assert changes == [events.Change('goals', 'insert', (goal_id,)), events.Change('goals', 'update', (goal_id,))]
+
+    # The service migrates the files; the clients leave them alone
+    def migrate(path, services):
+        raise AssertionError("A client migrated a database file")
+
+    monkeypatch.setattr(database, '_migrate_file', migrate)
+    database.forget_migrations()
+    database.initialize_databases()
+
+def test_cache_sees_writes_of_other_processes(databases):
+    task_id = database.add_task('Read', 'Preference', '2024-08-01')
+    assert database.get_task_by_id(task_id).name == 'Read'
+    assert database.count_notes(task_id) == 0
+    other = sqlite3.connect(database.TASKS_DB_PATH)
+    other.execute("UPDATE tasks SET name = 'Write' WHERE id = ?", (task_id,))
+    other.commit()
+    other.close()
+    other = sqlite3.connect(database.NOTES_DB_PATH)
+    other.execute("INSERT INTO notes (title, content, task_id) VALUES ('Note', '', ?)", (task_id,))
+    other.commit()
+    other.close()
+    assert database.get_task_by_id(task_id).name == 'Write'
+    assert database.count_notes(task_id) == 1
+
+def test_local_writes_keep_the_cached_rows_they_did_not_touch(workdir):
+    database.use_unified_storage('all.db')
+    database.initialize_databases()
+    first = database.add_task('Read', 'Preference', '2024-08-01')
+    second = database.add_task('Write', 'Preference', '2024-08-02')
+    goal_id = database.add_goal('Run', 'far')
+
+    def read():
+        database.get_task_by_id(first)
+        database.get_goal_by_id(goal_id)
+
+    read()
+    hits = database.cache_stats()['hits']
+    database.update_task(second, name='Rewrite')
+    read()
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    assert database.cache_stats()['hits'] == hits + 4
+    assert database.get_task_by_id(second).name == 'Rewrite'
@@ -0,0 +1,74 @@
+import pytest
+import database
+from events import Change
+
+pytest.importorskip("tkcalendar")
+import todo_app
+
+class ListStub:
+    """Stands in for a VirtualListbox; counts the redraws."""
+
+    def __init__(self):
+        self.refreshes = self.resets = 0
+
+    def refresh(self):
+        self.refreshes += 1
+
+    def reset(self):
+        self.resets += 1
+
+class ExecutorStub:
+    """Runs the submitted work right away, as if the result had been delivered."""
+
+    def submit(self, func, *args, callback=None, key=None, owner=None, **kwargs):
+        result = func(*args, **kwargs)
+        if callback is not None:
+            callback(result)
+
+@pytest.fixture
+def app(databases):
+    database.add_tasks([
+        ('Write report', 'Supremacy', '2024-08-07', '', 0),
+        ('Read book', 'Preference', '2024-08-01', '', 0),
+        ('Call bank', 'Antecedence', '2024-08-05', '', 1),
+        ('Pay rent', 'Supremacy', '2024-07-01', '', 2),
+    ])
+    app = todo_app.TODOApp.__new__(todo_app.TODOApp)
+    app.root = None
+    app.executor = ExecutorStub()
+    app.task_listboxes = {status: ListStub() for status in (0, 1, 2)}
+    app.search_box = ListStub()
+    app.set_tasks(app.fetch_tasks())
+    return app
+
+def assert_model_matches_database(app):
+    assert app.task_lists == app.fetch_tasks()
+    assert app.task_keys == {status: [(task.deadline, task.id) for task in tasks]
+                             for status, tasks in app.task_lists.items()}
+    assert app.task_rows == {task.id: (status, task) for status, tasks in app.task_lists.items() for task in tasks}
+
+def test_changes_move_insert_and_remove_only_their_rows(app):
+    completed_id = database.add_task('Buy milk', 'Preference', '2024-08-03')
+    database.update_task(completed_id, status=1)
+    database.update_task(1, deadline='2024-07-30')
+    database.delete_task(2)
+    app.on_task_changes([Change('tasks', 'insert', (completed_id,)), Change('tasks', 'update', (completed_id, 1)),
+                         Change('tasks', 'delete', (2,))])
+    assert_model_matches_database(app)
+    assert [task.name for task in app.task_lists[1]] == ['Buy milk', 'Call bank']
+    assert [app.task_listboxes[status].refreshes for status in (0, 1, 2)] == [1, 1, 0]
+    assert app.search_box.refreshes == 1
+
+def test_unchanged_rows_are_not_redrawn(app):
+    database.update_task(3, notes='only the notes changed')
+    app.on_task_changes([Change('tasks', 'update', (3,))])
+    assert_model_matches_database(app)
+    assert [app.task_listboxes[status].refreshes for status in (0, 1, 2)] == [0, 0, 0]
+    assert app.search_box.refreshes == 0
+
+def test_changes_of_unknown_rows_reload_the_lists(app):
+    database.update_tasks_status([1, 2], 2)
+    database.add_tasks([('Gym', 'Preference', '2024-08-02', '', 0)])
+    app.on_task_changes([Change('tasks', 'insert', None)])
+    assert_model_matches_database(app)
+    assert [app.task_listboxes[status].resets for status in (0, 1, 2)] == [2, 2, 2]
@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import pytest
+import database
+
+def add_tasks_with_notes():
+    database.add_tasks([('One', 'Preference', '2024-08-01', '', 0), ('Two', 'Preference', '2024-08-02', '', 1)])
+    database.add_notes([('First', 'a', 1), ('Second', 'b', 1), ('Third', 'c', 2)])
+
+def test_cross_service_query_attaches_the_other_files(databases):
+    add_tasks_with_notes()
+    assert database.get_tasks_with_notes(0) == [(1, 'One', 1, 'First'), (1, 'One', 2, 'Second')]
+    assert database.get_notes_for_tasks([2, 1]) == [(1, 1, 'First'), (1, 2, 'Second'), (2, 3, 'Third')]
+    assert database.get_notes_for_tasks([]) == []
+
+def test_migrate_to_unified_storage_copies_every_service(databases):
+    add_tasks_with_notes()
+    database.add_goal('Run', 'a marathon', '2025-01-01')
+    database.add_expense('Rent', 800.0, 'debit', '2024-03-02')
+    database.add_journal_entry('Day', 'went hiking', '2024-03-02')
+    database.delete_task(2)
+    database.add_task('Two again', 'Preference', '2024-08-02')
+    database.delete_task(3)
+
+    database.migrate_to_unified_storage()
+
+    assert database.resolve_db_path(database.GOALS_DB_PATH) == database.UNIFIED_DB_PATH
+    assert os.path.exists('initiatives.db') and os.path.exists('tasks.db')
+    assert [task.name for task in database.get_tasks(0)] == ['One']
+    assert database.get_goal_by_id(1).goal == 'Run'
+    assert database.get_expenses_total(3, 2024) == 800.0
+    assert database.get_journal_entry_by_id(1).content == 'went hiking'
+    assert database.get_tasks_with_notes(0) == [(1, 'One', 1, 'First'), (1, 'One', 2, 'Second')]
+    # The AUTOINCREMENT counter is carried over, so the deleted ids are not reused
+    database.add_task('Four', 'Preference', '2024-08-03')
+    assert [task[0] for task in database.get_tasks(0)] == [1, 4]
+
+def test_unified_file_is_not_overwritten(databases):
+    database.migrate_to_unified_storage()
+    database.use_separate_storage()
+    with pytest.raises(FileExistsError):
+        database.migrate_to_unified_storage()
+
+def test_new_unified_storage_holds_every_table(workdir):
+    database.use_unified_storage('all.db')
+    database.initialize_databases()
+    database.add_task('One', 'Preference', '2024-08-01')
+    database.save_notes('Note', 'text', 1)
+    assert database.get_tasks_with_notes(0) == [(1, 'One', 1, 'Note')]
+    assert sorted(os.listdir(workdir)) == ['all.db', 'all.db-shm', 'all.db-wal']
+    conn = sqlite3.connect('all.db')
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert {'tasks', 'notes', 'goals', 'journal', 'expenses', 'expense_rollups'} <= tables
+
+def test_open_group_commit_is_migrated(databases):
+    database.use_group_commit(delay_ms=10000)
+    database.add_goal('Run', 'far')
+    database.migrate_to_unified_storage()
+    assert [goal.goal for goal in database.get_goals()] == ['Run']
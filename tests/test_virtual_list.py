@@ -0,0 +1,143 @@
+import pytest
+from virtual_list import VirtualListbox
+
+class Source:
+    """`count` rows of (id, name), recording the pages read."""
+
+    def __init__(self, count):
+        self.rows = [(row_id, f'Row {row_id}') for row_id in range(1, count + 1)]
+        self.reads = []
+
+    def fetch_page(self, offset, limit):
+        self.reads.append(offset)
+        return self.rows[offset:offset + limit]
+
+    def count(self):
+        return len(self.rows)
+
+class ExecutorStub:
+    """Records the submitted reads; `run` runs them and delivers their results."""
+
+    def __init__(self):
+        self.requests = []
+
+    def submit(self, func, *args, callback=None, key=None, owner=None, **kwargs):
+        self.requests.append((func, args, callback))
+
+    def run(self):
+        requests, self.requests = self.requests, []
+        for func, args, callback in requests:
+            callback(func(*args))
+
+@pytest.fixture
+def source():
+    return Source(10000)
+
+@pytest.fixture
+def rows(tk_root, source):
+    widget = VirtualListbox(tk_root, source.fetch_page, source.count, lambda row: row[1],
+                            page_size=100, cached_pages=3, height=10)
+    widget.reset()
+    return widget
+
+def test_only_the_visible_rows_are_materialized(rows, source):
+    assert rows.total == 10000
+    assert rows.listbox.size() == 10
+    assert rows.listbox.get(0, 'end') == tuple(f'Row {row_id}' for row_id in range(1, 11))
+    assert source.reads == [0]
+
+def test_scrolling_reads_pages_on_demand(rows, source):
+    rows.scroll_to(5000)
+    assert rows.visible_ids == list(range(5001, 5011))
+    assert rows.id_at(0) == 5001
+    assert source.reads == [0, 5000]
+    rows.scroll_rows(-1)
+    assert rows.visible_ids[0] == 5000
+    assert source.reads == [0, 5000, 4900]
+    rows.scroll_to(20000)
+    assert rows.top == 9990
+    assert rows.visible_ids[-1] == 10000
+
+def test_page_cache_is_bounded(rows):
+    for top in range(0, 1000, 100):
+        rows.scroll_to(top)
+    assert len(rows.pages) == 3
+
+def test_rows_spanning_two_pages(rows):
+    assert [row[0] for row in rows.rows(95, 105)] == list(range(96, 106))
+
+def test_selection_follows_the_row(rows, source):
+    rows.scroll_to(50)
+    rows.listbox.selection_set(2)
+    rows.on_select(None)
+    assert rows.selected_id() == 53
+    assert rows.selected_row() == (53, 'Row 53')
+    source.rows[52] = (53, 'Renamed')
+    rows.refresh()
+    assert rows.selected_row() == (53, 'Renamed')
+    rows.scroll_to(500)
+    rows.refresh()
+    assert rows.selected_id() is None
+
+def test_refresh_after_rows_are_removed(rows, source):
+    rows.scroll_to(9990)
+    del source.rows[100:]
+    rows.refresh()
+    assert rows.total == 100
+    assert rows.top == 90
+    assert rows.visible_ids == list(range(91, 101))
+
+def test_empty_source(tk_root):
+    widget = VirtualListbox(tk_root, lambda offset, limit: [], lambda: 0, str, height=5)
+    widget.reset()
+    assert widget.listbox.size() == 0
+    assert widget.selected_id() is None
+
+def test_selection_is_looked_up_by_id_after_a_refresh(rows, source):
+    rows.listbox.selection_set(2)
+    rows.on_select(None)
+    assert rows.selected_id() == 3
+    source.rows.insert(0, (0, 'New'))
+    rows.refresh()
+    assert rows.selected_id() == 3
+    assert rows.listbox.curselection() == (3,)
+    del source.rows[3]
+    rows.refresh()
+    assert rows.selected_id() is None
+    assert rows.listbox.curselection() == ()
+
+def test_pages_missing_while_scrolling_are_read_on_the_executor(rows, source):
+    executor = ExecutorStub()
+    rows.refresh_async(executor)
+    executor.run()
+    source.reads.clear()
+    rows.scroll_to(5095)
+    assert source.reads == []
+    assert rows.listbox.get(0, 'end') == ('...',) * 10
+    assert rows.visible_ids == [None] * 10
+    rows.scroll_rows(1)
+    assert len(executor.requests) == 2  # Each page is read once
+    executor.run()
+    assert source.reads == [5000, 5100]
+    assert rows.visible_ids == list(range(5097, 5107))
+
+def test_pages_read_before_a_refresh_are_dropped(rows, source):
+    executor = ExecutorStub()
+    rows.refresh_async(executor)
+    executor.run()
+    rows.scroll_to(5000)
+    (func, args, callback), = executor.requests
+    executor.requests.clear()
+    stale = func(*args)
+    source.rows[5000] = (5001, 'Renamed')
+    rows.refresh_async(executor)
+    executor.run()
+    callback(stale)  # Arrives after the refresh
+    assert rows.listbox.get(0) == 'Renamed'
+
+def test_refresh_async_reads_every_visible_page(rows, source):
+    executor = ExecutorStub()
+    rows.scroll_to(95)
+    rows.refresh_async(executor)
+    executor.run()
+    assert rows.visible_ids == list(range(96, 106))
@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+import time
+import pytest
+import database
+
+@pytest.fixture
+def short_waits(monkeypatch):
+    """Give up on a locked database quickly, so the retries show."""
+    monkeypatch.setattr(database, 'BUSY_TIMEOUT', 0.01)
+    monkeypatch.setattr(database, 'WRITE_RETRY_DELAY', 0.02)
+
+def lock_database(path, seconds):
+    """Hold the write lock of `path` from another connection for `seconds`; return the thread."""
+    locked = threading.Event()
+
+    def hold():
+        conn = sqlite3.connect(path)
+        conn.execute('BEGIN IMMEDIATE')
+        locked.set()
+        time.sleep(seconds)
+        conn.rollback()
+        conn.close()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait(5)
+    return thread
+
+def test_writes_of_many_threads_all_land(databases):
+    errors = []
+
+    def add_tasks(number):
+        try:
+            for i in range(20):
+                database.add_task(f'Task {number}.{i}', 'Preference', '2024-08-01')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add_tasks, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(database.get_tasks(0)) == 160
+
+def test_locked_database_is_retried(databases, short_waits):
+    locker = lock_database(database.GOALS_DB_PATH, 0.1)
+    try:
+        assert database.add_goal('Run', 'far') == 1
+    finally:
+        locker.join()
+    assert database.count_goals() == 1
+
+def test_error_is_raised_once_the_attempts_are_used_up(databases, short_waits, monkeypatch):
+    monkeypatch.setattr(database, 'WRITE_ATTEMPTS', 2)
+    locker = lock_database(database.GOALS_DB_PATH, 0.5)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            database.add_goal('Run', 'far')
+    finally:
+        locker.join()
+    assert database.count_goals() == 0
+
+def test_other_errors_are_not_retried(databases):
+    attempts = []
+
+    def work(conn):
+        attempts.append(1)
+        conn.execute('INSERT INTO tasks (name) VALUES (NULL)')
+
+    with pytest.raises(sqlite3.IntegrityError):
+        database.run_transaction(database.TASKS_DB_PATH, work)
+    assert len(attempts) == 1
+
+def test_write_made_by_a_write_runs_in_a_savepoint(databases):
+    def work(conn):
+        conn.execute("INSERT INTO tasks (name, priority, deadline) VALUES ('Outer', 'Preference', '2024-08-01')")
+        inner_id = database.add_task('Inner', 'Preference', '2024-08-02')
+        with pytest.raises(sqlite3.IntegrityError):
+            database.execute_query(database.TASKS_DB_PATH, 'INSERT INTO tasks (name) VALUES (NULL)', commit=True)
+        return inner_id
+
+    assert database.run_transaction(database.TASKS_DB_PATH, work) == 2
+    assert [task.name for task in database.get_tasks(0)] == ['Outer', 'Inner']
+
+def test_failed_transaction_is_rolled_back(databases):
+    def work(conn):
+        conn.execute("INSERT INTO tasks (name, priority, deadline) VALUES ('Lost', 'Preference', '2024-08-01')")
+        raise RuntimeError('changed my mind')
+
+    with pytest.raises(RuntimeError):
+        database.run_transaction(database.TASKS_DB_PATH, work)
+    assert database.get_tasks(0) == []
+
+def test_writes_run_on_one_thread_per_file(databases):
+    threads = set()
+
+    def work(conn):
+        threads.add(threading.current_thread().name)
+
+    for path in (database.TASKS_DB_PATH, database.TASKS_DB_PATH, database.NOTES_DB_PATH):
+        database.run_transaction(path, work)
+    assert threads == {'database-writer:tasks.db', 'database-writer:notes.db'}
+
+def test_submitted_writes_run_in_order(databases):
+    futures = [database.write_queue.submit(database.GOALS_DB_PATH, lambda conn, i=i: conn.execute(
+        'INSERT INTO goals (goal, details) VALUES (?, ?)', (f'Goal {i}', '')).lastrowid) for i in range(10)]
+    assert [future.result() for future in futures] == list(range(1, 11))
+
+def test_shutdown_finishes_the_queued_writes(databases):
+    for i in range(5):
+        database.write_queue.submit(database.GOALS_DB_PATH, lambda conn, i=i: conn.execute(
+            'INSERT INTO goals (goal, details) VALUES (?, ?)', (f'Goal {i}', '')))
+    database.write_queue.shutdown()
+    assert database.count_goals() == 5
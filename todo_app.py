@@ -1,16 +1,33 @@
+import bisect
 import datetime
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 from tkcalendar import DateEntry
-from database import add_task, get_tasks, update_task, delete_task, get_task_by_id, get_completed_tasks, get_missed_tasks
+from database import (add_task, get_tasks, update_task, delete_task, delete_tasks_by_status, get_task_by_id,
+                      mark_overdue_tasks_missed,
+                      get_tasks_by_ids, get_completed_tasks, get_missed_tasks, search_tasks, initialize_databases,
+                      to_display_date)
+from db_executor import ChangeListener, flush_writes_on_close, get_executor
+from events import changed_ids
+from notes_app import NotesApp
+from search_box import SearchBox
+from virtual_list import VirtualListbox
+
+# How often overdue tasks are moved to the missed list
+SWEEP_INTERVAL_MS = 60 * 1000
 
 class TODOApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Initiatives")
         self.root.geometry("900x600")
+        self.executor = get_executor(self.root)
 
         self.create_widgets()
+        self.set_tasks({0: [], 1: [], 2: []})
+        ChangeListener(self.root, self.on_task_changes, ("tasks",))
+        flush_writes_on_close(self.root)
+        self.sweep_overdue_tasks()
         self.load_tasks()
         self.update_clock()
 
@@ -54,15 +71,13 @@ class TODOApp:
 
         # Incomplete Tasks
         tk.Label(self.task_list_frame, text="Incomplete Tasks", bg="#f0f0f0", font=("Arial", 14, "bold")).grid(row=0, column=0, padx=10, pady=5, sticky="w")
-        self.incomplete_tasks_listbox = tk.Listbox(self.task_list_frame, selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#FFFFED", activestyle="none", font=("Arial", 12), width=28, height=10)
+        self.incomplete_tasks_listbox = self.create_task_list(self.task_list_frame, 0, selectbackground="#FFFFED", width=28, height=10)
         self.incomplete_tasks_listbox.grid(row=1, column=0, padx=10, pady=1, sticky="nsew")
-        self.incomplete_tasks_listbox.bind("<Double-1>", self.show_notes)
 
         # Completed Tasks
         tk.Label(self.task_list_frame, text="Completed Tasks", bg="#f0f0f0", font=("Arial", 14, "bold")).grid(row=0, column=1, padx=10, pady=5, sticky="w")
-        self.completed_tasks_listbox = tk.Listbox(self.task_list_frame, selectmode=tk.SINGLE, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none", font=("Arial", 12), width=29, height=10)
+        self.completed_tasks_listbox = self.create_task_list(self.task_list_frame, 1, selectbackground="#e0e0e0", width=29, height=10)
         self.completed_tasks_listbox.grid(row=1, column=1, padx=10, pady=1, sticky="nsew")
-        self.completed_tasks_listbox.bind("<Double-1>", self.show_notes)
 
         # Buttons
         self.button_frame = tk.Frame(self.main_frame, bg="#f0f0f0", padx=10, pady=5)
@@ -72,6 +87,7 @@ class TODOApp:
         tk.Button(self.button_frame, text="Complete Task", command=self.complete_task, bg="#4CAF50", fg="white").pack(side=tk.LEFT, padx=7)
         tk.Button(self.button_frame, text="Mark as Missed", command=self.mark_as_missed, bg="#9C27B0", fg="white").pack(side=tk.LEFT, padx=7)
         tk.Button(self.button_frame, text="Add Again", command=self.add_again, bg="#FF9800", fg="white").pack(side=tk.LEFT, padx=7)
+        tk.Button(self.button_frame, text="Notes", command=self.open_notes, bg="#795548", fg="white").pack(side=tk.LEFT, padx=7)
         tk.Button(self.button_frame, text="Clear Completed Tasks", command=self.clear_completed_tasks, bg="#607D8B", fg="white").pack(side=tk.LEFT, padx=7)
         tk.Button(self.button_frame, text="Delete Task", command=self.delete_task, bg="#f44336", fg="white").pack(side=tk.LEFT, padx=7)
 
@@ -88,9 +104,32 @@ class TODOApp:
         self.missed_tasks_frame.pack(fill=tk.BOTH, expand=True)
 
         tk.Label(self.missed_tasks_frame, text="Missed Tasks", bg="#f0f0f0", font=("Arial", 14, "bold")).pack(anchor="w", padx=10)
-        self.missed_tasks_listbox = tk.Listbox(self.missed_tasks_frame, bg="#ffffff", selectbackground="#e0e0e0", activestyle="none", font=("Arial", 12), width=40, height=15)
+        self.missed_tasks_listbox = self.create_task_list(self.missed_tasks_frame, 2, selectbackground="#e0e0e0", width=40, height=15)
         self.missed_tasks_listbox.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
-        self.missed_tasks_listbox.bind("<Double-1>", self.show_notes)
+
+        # Full-text search over task names and notes
+        self.search_box = SearchBox(self.right_frame, search_tasks,
+            format_row=lambda task: f"{task.name} - {task.snippet}",
+            on_open=self.show_task_details, font=("Arial", 11), width=40, height=6)
+        self.search_box.pack(padx=10, pady=5, fill=tk.X)
+
+        # Listbox for each task status
+        self.task_listboxes = {
+            0: self.incomplete_tasks_listbox,
+            1: self.completed_tasks_listbox,
+            2: self.missed_tasks_listbox,
+        }
+
+    def create_task_list(self, master, status, **options):
+        # Rows are served from the in-memory model; only the visible window is put in Tk
+        task_list = VirtualListbox(
+            master,
+            fetch_page=lambda offset, limit: self.task_lists[status][offset:offset + limit],
+            count=lambda: len(self.task_lists[status]),
+            format_row=self.format_task,
+            selectmode=tk.SINGLE, bg="#ffffff", activestyle="none", font=("Arial", 12), **options)
+        task_list.bind_rows("<Double-1>", self.show_notes)
+        return task_list
 
     def add_task(self):
         name = self.task_name_entry.get()
@@ -100,9 +139,8 @@ class TODOApp:
         if not name or not priority:
             messagebox.showwarning("Input Error", "Please fill in all fields")
             return
-        add_task(name, priority, deadline, notes)
-        self.load_tasks()
-        self.clear_task_inputs()
+        self.executor.submit(add_task, name, priority, deadline, notes,
+                             callback=lambda task_id: self.clear_task_inputs(), owner=self.root)
 
     def clear_task_inputs(self):
         self.task_name_entry.delete(0, tk.END)
@@ -111,158 +149,181 @@ class TODOApp:
         self.notes_entry.delete(0, tk.END)
 
     def load_tasks(self):
-        self.incomplete_tasks_listbox.delete(0, tk.END)
-        self.completed_tasks_listbox.delete(0, tk.END)
-        self.missed_tasks_listbox.delete(0, tk.END)
-
-        incomplete_tasks = get_tasks(status=0)
-        completed_tasks = get_completed_tasks()
-        missed_tasks = get_missed_tasks()
-
-        for task in incomplete_tasks:
-            self.incomplete_tasks_listbox.insert(tk.END, f"{task[0]} | {task[1]} | {task[2]} | {task[3]}")
-
-        for task in completed_tasks:
-            self.completed_tasks_listbox.insert(tk.END, f"{task[0]} | {task[1]} | {task[2]} | {task[3]}")
-
-        for task in missed_tasks:
-            self.missed_tasks_listbox.insert(tk.END, f"{task[0]} | {task[1]} | {task[2]} | {task[3]}")
-
-    def delete_task(self):
-        selected_index = self.incomplete_tasks_listbox.curselection()
-        if not selected_index:
-            messagebox.showwarning("Select Task", "Please select a task to delete")
+        # Read the lists in the background; set_tasks fills them on the Tk thread
+        self.executor.submit(self.fetch_tasks, callback=self.set_tasks, key=(self, "load_tasks"), owner=self.root)
+
+    def sweep_overdue_tasks(self):
+        # Runs on the executor before any load submitted after it, then every SWEEP_INTERVAL_MS
+        self.executor.submit(mark_overdue_tasks_missed, key=(self, "sweep"), owner=self.root)
+        self.root.after(SWEEP_INTERVAL_MS, self.sweep_overdue_tasks)
+
+    def on_task_changes(self, changes):
+        # Writes of this window, other windows and the sweeper all arrive here
+        task_ids = changed_ids(changes, "tasks")
+        if task_ids is None:
+            self.load_tasks()
             return
+        self.refresh_tasks(task_ids)
+
+    def fetch_tasks(self):
+        return {0: get_tasks(status=0), 1: get_completed_tasks(), 2: get_missed_tasks()}
+
+    def set_tasks(self, task_lists):
+        self.build_task_model(task_lists)
+        for status in task_lists:
+            self.task_listboxes[status].reset()
+
+    def build_task_model(self, task_lists):
+        # In-memory model of the lists: the rows of each list in display order
+        # with their sort keys, and (status, row) for every task shown
+        self.task_lists = {}
+        self.task_keys = {}
+        self.task_rows = {}
+
+        for status, tasks in task_lists.items():
+            self.task_lists[status] = tasks
+            self.task_keys[status] = [self.task_sort_key(task) for task in tasks]
+            for task in tasks:
+                self.task_rows[task.id] = (status, task)
+
+    def refresh_tasks(self, task_ids):
+        """Re-read the given tasks and move, insert or remove only their rows."""
+        # Through the executor, so the reads apply in the order of the writes
+        task_ids = list(task_ids)
+        self.executor.submit(get_tasks_by_ids, task_ids, callback=lambda tasks: self.apply_task_changes(task_ids, tasks),
+                             owner=self.root)
+
+    def apply_task_changes(self, task_ids, tasks):
+        # Tasks that were deleted are not found, and their rows are removed
+        current = {task.id: task for task in tasks}
+        changed = set()
+        for task_id in task_ids:
+            shown = self.task_rows.get(task_id)
+            task = current.get(task_id)
+            new = (task.status, task.summary()) if task else None
+            if shown == new:
+                continue
+            if shown:
+                changed.add(self.remove_task_row(task_id))
+            if new and new[0] in self.task_listboxes:
+                changed.add(self.insert_task_row(*new))
+        for status in changed:
+            self.task_listboxes[status].refresh()
+        if changed:
+            self.search_box.refresh()
+
+    def insert_task_row(self, status, task):
+        keys = self.task_keys[status]
+        key = self.task_sort_key(task)
+        index = bisect.bisect_left(keys, key)
+        keys.insert(index, key)
+        self.task_lists[status].insert(index, task)
+        self.task_rows[task.id] = (status, task)
+        return status
+
+    def remove_task_row(self, task_id):
+        status, task = self.task_rows.pop(task_id)
+        keys = self.task_keys[status]
+        index = bisect.bisect_left(keys, self.task_sort_key(task))
+        del keys[index]
+        del self.task_lists[status][index]
+        return status
+
+    def task_sort_key(self, task):
+        # Matches the ORDER BY deadline, id of the task queries
+        return (task.deadline, task.id)
+
+    def format_task(self, task):
+        return f"{task.id} | {task.name} | {task.priority} | {to_display_date(task.deadline)}"
 
-        task_string = self.incomplete_tasks_listbox.get(selected_index)
-        task_id = self.get_task_id_from_string(task_string)
-
+    def delete_task(self):
+        task_id = self.incomplete_tasks_listbox.selected_id()
         if not task_id:
-            messagebox.showerror("Error", "Task details not found")
+            messagebox.showwarning("Select Task", "Please select a task to delete")
             return
 
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this task?"):
-            delete_task(task_id)
-            self.load_tasks()
+            self.executor.submit(delete_task, task_id, owner=self.root)
 
     def show_notes(self, event):
-        selected_listbox = event.widget
-        selection = selected_listbox.curselection()
-        if not selection:
-            print("No selection made in the listbox.")
+        task_id = event.widget.selected_id()
+        if not task_id:
             return
+        self.show_task_details(task_id)
 
-        index = selection[0]
-        task_string = selected_listbox.get(index)
-        task_id = self.get_task_id_from_string(task_string)
-
+    def open_notes(self):
+        task_id = next((listbox.selected_id() for listbox in self.task_listboxes.values() if listbox.selected_id()), None)
         if not task_id:
-            messagebox.showerror("Error", "Task details not found")
+            messagebox.showwarning("Select Task", "Please select a task to see its notes")
             return
+        NotesApp(tk.Toplevel(self.root), task_id)
 
-        task = get_task_by_id(task_id)
-        if task:
-            task_details = f"Task Name: {task[0]}\nPriority: {task[1]}\nDeadline: {task[2]}\nNotes: {task[3]}"
-            messagebox.showinfo("Task Details", task_details)
-        else:
-            messagebox.showerror("Error", "Task details not found")
+    def with_task(self, task_id, func):
+        # Read the task in the background, then call func(task) on the Tk thread
+        self.executor.run_with_row(get_task_by_id, task_id, func, "Task details not found", owner=self.root)
 
-    def get_task_id_from_string(self, task_string):
-        parts = task_string.split(" | ")
-        if len(parts) > 0:
-            try:
-                return int(parts[0])
-            except ValueError:
-                return None
-        return None
+    def show_task_details(self, task_id):
+        self.with_task(task_id, lambda task: messagebox.showinfo("Task Details",
+            f"Task Name: {task.name}\nPriority: {task.priority}\nDeadline: {to_display_date(task.deadline)}\nNotes: {task.notes}"))
 
     def edit_task(self):
-        selected_index = self.incomplete_tasks_listbox.curselection()
-        if not selected_index:
+        task_id = self.incomplete_tasks_listbox.selected_id()
+        if not task_id:
             messagebox.showwarning("Select Task", "Please select a task to edit")
             return
 
-        task_string = self.incomplete_tasks_listbox.get(selected_index)
-        task_id = self.get_task_id_from_string(task_string)
+        self.with_task(task_id, self.ask_task_changes)
 
-        if not task_id:
-            messagebox.showerror("Error", "Task details not found")
-            return
-
-        task = get_task_by_id(task_id)
-        if task:
-            new_name = simpledialog.askstring("Edit Task", "Enter new task name:", initialvalue=task[0])
-            new_priority = simpledialog.askstring("Edit Task", "Enter new priority:", initialvalue=task[1])
-            new_deadline = simpledialog.askstring("Edit Task", "Enter new deadline (dd/mm/yyyy):", initialvalue=task[2])
-            new_notes = simpledialog.askstring("Edit Task", "Enter new notes:", initialvalue=task[3])
-            if new_name and new_priority and new_deadline and new_notes:
-                update_task(task_id, new_name, new_priority, new_deadline, new_notes)
-                self.load_tasks()
-            else:
-                messagebox.showwarning("Input Error", "Please fill in all fields")
+    def ask_task_changes(self, task):
+        new_name = simpledialog.askstring("Edit Task", "Enter new task name:", initialvalue=task.name)
+        new_priority = simpledialog.askstring("Edit Task", "Enter new priority:", initialvalue=task.priority)
+        new_deadline = simpledialog.askstring("Edit Task", "Enter new deadline (dd/mm/yyyy):", initialvalue=to_display_date(task.deadline))
+        new_notes = simpledialog.askstring("Edit Task", "Enter new notes:", initialvalue=task.notes)
+        if new_name and new_priority and new_deadline and new_notes:
+            self.executor.submit(update_task, task.id, new_name, new_priority, new_deadline, new_notes,
+                                 error_callback=self.executor.show_date_error, owner=self.root)
+        else:
+            messagebox.showwarning("Input Error", "Please fill in all fields")
 
     def complete_task(self):
-        selected_index = self.incomplete_tasks_listbox.curselection()
-        if not selected_index:
+        task_id = self.incomplete_tasks_listbox.selected_id()
+        if not task_id:
             messagebox.showwarning("Select Task", "Please select a task to complete")
             return
 
-        task_string = self.incomplete_tasks_listbox.get(selected_index)
-        task_id = self.get_task_id_from_string(task_string)
-
-        if not task_id:
-            messagebox.showerror("Error", "Task details not found")
-            return
-
-        update_task(task_id, status=1)
-        self.load_tasks()
+        self.executor.submit(update_task, task_id, status=1, owner=self.root)
 
     def mark_as_missed(self):
-        selected_index = self.incomplete_tasks_listbox.curselection()
-        if not selected_index:
-            messagebox.showwarning("Select Task", "Please select a task to mark as missed")
-            return
-
-        task_string = self.incomplete_tasks_listbox.get(selected_index)
-        task_id = self.get_task_id_from_string(task_string)
-
+        task_id = self.incomplete_tasks_listbox.selected_id()
         if not task_id:
-            messagebox.showerror("Error", "Task details not found")
+            messagebox.showwarning("Select Task", "Please select a task to mark as missed")
             return
 
-        update_task(task_id, status=2)
-        self.load_tasks()
+        self.executor.submit(update_task, task_id, status=2, owner=self.root)
 
     def add_again(self):
-        selected_index = self.completed_tasks_listbox.curselection()
-        if not selected_index:
+        task_id = self.completed_tasks_listbox.selected_id()
+        if not task_id:
             messagebox.showwarning("Select Task", "Please select a task to add again")
             return
 
-        task_string = self.completed_tasks_listbox.get(selected_index)
-        task_id = self.get_task_id_from_string(task_string)
-
-        if not task_id:
-            messagebox.showerror("Error", "Task details not found")
-            return
+        self.with_task(task_id, self.add_task_again)
 
-        task = get_task_by_id(task_id)
-        if task:
-            name = task[0]
-            priority = task[1]
-            deadline = task[2]
-            notes = task[3]
-            add_task(name, priority, deadline, notes)
-            update_task(task_id, status=0)
-            self.load_tasks()
-        else:
-            messagebox.showerror("Error", "Task details not found")
+    def add_task_again(self, task):
+        self.executor.submit(add_task, task.name, task.priority, task.deadline, task.notes, owner=self.root)
+        self.executor.submit(update_task, task.id, status=0, owner=self.root)
 
     def clear_completed_tasks(self):
-        completed_tasks = get_completed_tasks()
-        for task in completed_tasks:
-            delete_task(task[0])
-        self.load_tasks()
+        self.executor.submit(delete_tasks_by_status, 1, callback=self.drop_completed_tasks, owner=self.root)
+
+    def drop_completed_tasks(self, task_ids):
+        # Every completed task is gone, so drop the whole list at once; the
+        # change event that follows then finds none of them left to remove
+        for task in self.task_lists[1]:
+            del self.task_rows[task.id]
+        self.task_lists[1] = []
+        self.task_keys[1] = []
+        self.completed_tasks_listbox.reset()
 
     def update_clock(self):
         now = datetime.datetime.now().strftime("%H:%M:%S")
@@ -270,6 +331,7 @@ class TODOApp:
         self.root.after(1000, self.update_clock)  # Update the clock every second
         
 def main():
+    initialize_databases()
     root = tk.Tk()
     app = TODOApp(root)
     root.mainloop()
@@ -0,0 +1,239 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+class VirtualListbox(tk.Frame):
+    """A listbox that only materializes the rows currently visible.
+
+    Rows are read on demand from `fetch_page(offset, limit)`, which returns a
+    list of rows whose first item is the row id, and `count()`, which returns
+    the total number of rows. Fetched pages are kept in a small cache, and the
+    Tk listbox only ever holds the strings of the visible window, so memory
+    and population time do not grow with the size of the result set. Once
+    `refresh_async` was called, the pages missing while scrolling are read
+    on its executor too, with placeholder rows shown until they arrive.
+    """
+
+    def __init__(self, master, fetch_page, count, format_row, page_size=200, cached_pages=8, **listbox_options):
+        super().__init__(master, bg=listbox_options.get("bg"))
+        self.fetch_page = fetch_page
+        self.count = count
+        self.format_row = format_row
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+
+        self.listbox = tk.Listbox(self, exportselection=False, **listbox_options)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.total = 0
+        self.top = 0  # Index of the first visible row
+        self.visible_rows = int(listbox_options.get("height", 10))
+        self.visible_ids = []  # Row index in the listbox -> row id
+        self.pages = {}
+        self.selected = None
+        self.executor = None
+        self.loading = set()  # Pages being read on the executor
+        self.generation = 0  # Pages read before a refresh are dropped
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll_rows(-1 if event.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_rows(-1))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_rows(1))
+        self.listbox.bind("<Up>", lambda event: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda event: self.move_selection(1))
+        self.listbox.bind("<Prior>", lambda event: self.scroll_rows(-self.visible_rows))
+        self.listbox.bind("<Next>", lambda event: self.scroll_rows(self.visible_rows))
+
+    def bind_rows(self, sequence, callback, add=False):
+        """Bind `callback` to an event on the rows; `event.widget` is this list.
+
+        With `add`, the binding is added to the existing ones; <<ListboxSelect>>
+        needs it to keep the list's own selection tracking.
+        """
+        def handler(event):
+            event.widget = self
+            return callback(event)
+        self.listbox.bind(sequence, handler, add)
+
+    def refresh(self):
+        """Drop cached pages and redraw the visible window from the source.
+
+        The selection is kept only if the selected row is still visible.
+        """
+        self.drop_pages()
+        self.total = self.count()
+        self.top = self.clamp_top(self.top)
+        self.render()
+        self.resolve_selection()
+
+    def drop_pages(self):
+        self.pages.clear()
+        self.loading.clear()
+        self.generation += 1
+
+    def resolve_selection(self):
+        """Look the selected row up again by id among the rows shown; clear the selection if it is gone."""
+        if self.selected and self.selected[0] not in self.visible_ids:
+            self.selected = None
+            self.listbox.selection_clear(0, tk.END)
+
+    def reset(self):
+        """Scroll back to the first row, clear the selection and refresh."""
+        self.top = 0
+        self.selected = None
+        self.refresh()
+
+    def refresh_async(self, executor, key=None):
+        """Like `refresh`, but count and read the visible pages on `executor`.
+
+        The current rows stay on screen until the result arrives; a newer
+        refresh of the same list supersedes one still in flight.
+        """
+        self.executor = executor
+        top, visible_rows, page_size = self.top, self.visible_rows, self.page_size
+
+        def load():
+            total = self.count()
+            first = max(0, min(top, total - visible_rows))
+            last = min(first + visible_rows, total) - 1
+            pages = {page: self.fetch_page(page * page_size, page_size)
+                     for page in range(first // page_size, last // page_size + 1)} if total else {}
+            return total, first, pages
+
+        executor.submit(load, callback=self.apply_refresh, key=self if key is None else key, owner=self)
+
+    def reset_async(self, executor, key=None):
+        """Like `reset`, but load the first page on `executor`."""
+        self.top = 0
+        self.selected = None
+        self.refresh_async(executor, key)
+
+    def apply_refresh(self, result):
+        total, top, pages = result
+        self.drop_pages()
+        self.pages.update(pages)
+        self.total = total
+        self.top = top
+        self.render()
+        self.resolve_selection()
+
+    def selected_id(self):
+        """Return the id of the selected row, or None."""
+        return self.selected[0] if self.selected else None
+
+    def selected_row(self):
+        """Return the selected row as returned by `fetch_page`, or None."""
+        return self.selected
+
+    def id_at(self, index):
+        """Return the id of the row shown at listbox position `index`."""
+        return self.visible_ids[index]
+
+    def rows(self, start, stop):
+        """Return rows [start, stop), fetching pages that are not cached.
+
+        With an executor, a missing page is read on it instead and its rows
+        are None until it arrives.
+        """
+        result = []
+        first_page, last_page = start // self.page_size, (stop - 1) // self.page_size
+        for page in range(first_page, last_page + 1):
+            offset = page * self.page_size
+            rows = self.pages.pop(page, None)
+            if rows is None:
+                if self.executor is not None:
+                    self.load_page(page)
+                    result.extend([None] * (min(stop, offset + self.page_size) - max(start, offset)))
+                    continue
+                rows = self.fetch_page(offset, self.page_size)
+            self.pages[page] = rows
+            result.extend(rows[max(start - offset, 0):stop - offset])
+        while len(self.pages) > self.cached_pages:
+            del self.pages[next(iter(self.pages))]
+        return result
+
+    def load_page(self, page):
+        """Read `page` on the executor and redraw the visible window once it arrives."""
+        if page in self.loading:
+            return
+        self.loading.add(page)
+        generation = self.generation
+
+        def loaded(rows):
+            if generation != self.generation:
+                return  # Read before a refresh
+            self.loading.discard(page)
+            self.pages[page] = rows
+            self.render()
+
+        self.executor.submit(self.fetch_page, page * self.page_size, self.page_size,
+                             callback=loaded, key=(self, "page", page), owner=self)
+
+    def render(self):
+        stop = min(self.top + self.visible_rows, self.total)
+        rows = self.rows(self.top, stop) if stop > self.top else []
+        self.visible_ids = [row[0] if row else None for row in rows]
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *[self.format_row(row) if row else "..." for row in rows])
+        if self.selected:
+            for index, row in enumerate(rows):
+                if row and row[0] == self.selected[0]:
+                    self.selected = row
+                    self.listbox.selection_set(index)
+                    break
+        if self.total:
+            self.scrollbar.set(self.top / self.total, stop / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def clamp_top(self, top):
+        return max(0, min(top, self.total - self.visible_rows))
+
+    def scroll_to(self, top):
+        top = self.clamp_top(top)
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def scroll_rows(self, delta):
+        self.scroll_to(self.top + delta)
+        return "break"
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(amount) * self.total))
+        elif action == tk.SCROLL:
+            step = self.visible_rows if unit == tk.PAGES else 1
+            self.scroll_rows(int(amount) * step)
+
+    def on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection and self.top + selection[0] < self.total:
+            index = self.top + selection[0]
+            self.selected = self.rows(index, index + 1)[0]  # None while its page is being read
+
+    def move_selection(self, delta):
+        selection = self.listbox.curselection()
+        index = (selection[0] if selection else -1) + delta
+        if index < 0:
+            self.scroll_rows(-1)
+            index = 0
+        elif index >= len(self.visible_ids):
+            self.scroll_rows(1)
+            index = len(self.visible_ids) - 1
+        if 0 <= index < len(self.visible_ids):
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(index)
+            self.listbox.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    def on_resize(self, event):
+        font = tkfont.Font(font=self.listbox.cget("font"))
+        line_height = font.metrics("linespace") + 2 * int(self.listbox.cget("selectborderwidth"))
+        visible_rows = max(1, event.height // line_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.top = self.clamp_top(self.top)
+            self.render()